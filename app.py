@@ -1,31 +1,186 @@
-from flask import Flask, render_template, request, send_from_directory, redirect, url_for, Response
-from functools import wraps
+from flask import Flask, render_template, request, redirect, url_for, Response, g, abort, stream_with_context, jsonify, has_request_context
+from functools import wraps, lru_cache, partial
+from werkzeug.security import safe_join
+from markupsafe import Markup, escape
+from jinja2 import FileSystemBytecodeCache
+from urllib.parse import urlencode, urlsplit, quote
 import sqlite3
-import qrcode
 import os
 import socket
 import csv
-from io import StringIO
+from io import StringIO, BytesIO
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import atexit
+import click
+import zipfile
+import zlib
+import unicodedata
+import base64
+import hashlib
+import hmac
+import mimetypes
+import re
+import gzip
+import json
+import logging
+import math
+import queue
+import random
+import secrets
+import sys
+import threading
+import time
+import tempfile
+from logging.handlers import QueueHandler, QueueListener
+try:
+    import brotli  # Optional: br encoding for the review form
+except ImportError:
+    brotli = None
+# Imported on first use instead (see PostgresStorage and S3BlobStore): boto3
+# alone would add over 100 ms to every import of this module
+psycopg2 = None  # Only needed when DATABASE_URL points at PostgreSQL
+boto3 = None     # Only needed for BLOB_STORE=s3
+try:
+    import prometheus_client  # Optional: /metrics for Prometheus
+    from prometheus_client import multiprocess as prometheus_multiprocess
+except ImportError:
+    prometheus_client = None
 
 
+app = Flask(__name__, static_folder=None)  # /static is served from the blob store below
+app.json.compact = True  # Keep API responses small, even in debug mode
 
+# ------------------- LOGGING -------------------
+# Log lines are JSON objects on stdout, tagged with the request's correlation
+# ID. Request threads only put records on a queue; a listener thread formats
+# and writes them, so a slow log pipe never holds up a guest's submission.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # json, or text for reading locally
+# With LOG_LEVEL=DEBUG, keep the DEBUG lines of only this share of requests
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.01))
+TEXT_LOG_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(message)s'
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
 
+# Everything else on a record is an extra={...} field and goes into the JSON
+STANDARD_LOG_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'request_id'}
 
-# Create necessary folders if they don't exist
-for folder in ['qr_codes', 'database']:
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields become top-level keys"""
 
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'msg': record.getMessage(),
+            'pid': record.process,
+        }
+        if getattr(record, 'request_id', '-') != '-':
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in STANDARD_LOG_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
 
-app = Flask(__name__)
+class RequestContextFilter(logging.Filter):
+    """Tag records with the request ID and sample DEBUG lines per request"""
+
+    def filter(self, record):
+        in_request = has_request_context()
+        record.request_id = g.get('request_id', '-') if in_request else '-'
+        if record.levelno > logging.DEBUG:
+            return True
+        # All or none of a request's DEBUG lines, so a sampled request reads end to end
+        return g.get('log_sampled', False) if in_request else random.random() < LOG_DEBUG_SAMPLE_RATE
+
+class BackgroundLogHandler(QueueHandler):
+    """Queue records for a listener thread that writes them with `target`.
+
+    Like the alert dispatcher, the listener is started lazily per process so
+    it survives gunicorn forking.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Merge %-args and render the traceback now, while they are still
+        # valid; the JSON encoding is left to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        self.queue.put_nowait(record)
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self.queue = queue.SimpleQueue()  # Records queued in the parent are not ours
+                self._listener = QueueListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        """Write out everything queued and stop the listener (called at exit)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+# Looking up the multiprocessing process name is most of the cost of
+# creating a record, and the JSON has the pid already
+logging.logMultiprocessing = False
+
+log_handler = BackgroundLogHandler(logging.StreamHandler(sys.stdout))
+log_handler.target.setFormatter(JsonLogFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_LOG_FORMAT))
+log_handler.addFilter(RequestContextFilter())
+atexit.register(log_handler.stop)
+
+# app.logger is this logger too, so Flask's own error reports are JSON as well
+logger = logging.getLogger(app.name)
+logger.addHandler(log_handler)
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+
+@app.before_request
+def assign_request_id():
+    """Reuse the proxy's X-Request-ID when it looks sane, otherwise make one"""
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else secrets.token_hex(8)
+    g.log_sampled = random.random() < LOG_DEBUG_SAMPLE_RATE
+
+@app.after_request
+def send_request_id(response):
+    if 'request_id' in g:
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+    return response
 
 # ------------------- HOTEL CONFIGURATION -------------------
+# Defaults for the first property. More properties live in the properties
+# table (see PROPERTIES and `flask add-property`) and can override these.
 HOTEL_NAME = "Hotel Yash Undri"  # Hotel name constant
 HOTEL_LOGO = "Hotel image.jpeg"  # Hotel logo filename
+DEFAULT_PROPERTY_ID = 1          # Reviews without ?property= belong here
+DEFAULT_PROPERTY_SLUG = "main"
+
+# ------------------- DASHBOARD CONFIGURATION -------------------
+ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 20))  # Feedback cards per dashboard page
+ADMIN_MAX_PAGE_SIZE = 100  # Upper bound for ?per_page= on the dashboard
 
 # ------------------- ALERT CONFIGURATION -------------------
 ALERT_THRESHOLDS = {
@@ -48,40 +203,30 @@ EMAIL_CONFIG = {
     'smtp_port': 587,
     'sender_email': 'admin@example.com',  # Update this
     'sender_password': 'ogsp prln yhwc rbze',  # Use app password, not regular password
+    'use_tls': True,  # STARTTLS before login
     'enable_emails': True  # Set to True after configuring email
 }
 
 # DISABLE emails on Render to prevent timeouts
 if os.environ.get('RENDER'):
     EMAIL_CONFIG['enable_emails'] = False
-    print("⚠️ Running on Render - Email alerts DISABLED to prevent timeouts")
-# ------------------- CREATE FOLDERS -------------------
+    logger.warning("Running on Render - email alerts disabled to prevent timeouts")
+# ------------------- FOLDERS -------------------
+# Created by create_app(), not at import time
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 QR_FOLDER = os.path.join(BASE_DIR, "qr_codes")
 DB_FOLDER = os.path.join(BASE_DIR, "database")
 STATIC_FOLDER = os.path.join(BASE_DIR, "static")
-
-if not os.path.exists(QR_FOLDER):
-    os.makedirs(QR_FOLDER)
-
-if not os.path.exists(DB_FOLDER):
-    os.makedirs(DB_FOLDER)
-
-if not os.path.exists(STATIC_FOLDER):
-    os.makedirs(STATIC_FOLDER)
-
-# ------------------- GET IP ADDRESS -------------------
-
+DB_PATH = os.path.join(DB_FOLDER, "reviews.db")
 
 # ------------------- URL CONFIGURATION -------------------
-import os
-
 # ALWAYS use Render URL for QR codes to work globally
 RENDER_URL = "hotel-feedback-render.onrender.com"
 BASE_URL = f"https://{RENDER_URL}"  # QR codes ALWAYS point to Render (works globally)
 
+@lru_cache(maxsize=None)
 def get_local_ip():
-    """Get local IP for terminal display only"""
+    """Get local IP for display only; looked up on first use, not at import"""
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
@@ -91,7 +236,37 @@ def get_local_ip():
     except:
         return "127.0.0.1"
 
-LOCAL_IP = get_local_ip()
+# ------------------- TEMPLATE HELPERS -------------------
+@app.context_processor
+def inject_hotel_context():
+    """Values shared by every page template, for the current property"""
+    prop = current_property()
+    return {
+        'hotel_name': prop['name'],
+        'hotel_logo': prop['logo'],
+        'base_url': BASE_URL,
+        'local_ip': get_local_ip(),
+        'thresholds': prop['thresholds'],
+        'property_query': prop['query'],
+        'property_param': prop['query'].replace('?', '&'),
+    }
+
+_fragment_cache = {}
+
+@app.template_global()
+def cached_fragment(template_name, **context):
+    """Render a template fragment once per distinct context and reuse the HTML.
+
+    Only use this for markup that depends on configuration, never on request
+    data: the cache lives for the life of the worker process. Entries are
+    per property, and an edited property gets fresh ones.
+    """
+    key = (template_name, current_property()['version'], tuple(sorted(context.items())))
+    html = _fragment_cache.get(key)
+    if html is None:
+        html = _fragment_cache[key] = Markup(render_template(template_name, **context))
+    return html
+
 # ------------------- HELPER FUNCTIONS -------------------
 def get_rating_emoji(rating):
     """Return emoji for rating value"""
@@ -104,16 +279,17 @@ def get_rating_emoji(rating):
     }
     return emojis.get(rating, '😐')
 
-def check_alert_thresholds(feedback_data):
-    """Check if any rating falls below thresholds"""
+def check_alert_thresholds(feedback_data, thresholds=None):
+    """Check if any rating falls below thresholds (ALERT_THRESHOLDS by default)"""
     alerts = []
     
     # Check individual categories
-    for category, threshold in ALERT_THRESHOLDS.items():
+    for category, threshold in (thresholds or ALERT_THRESHOLDS).items():
         if category in feedback_data:
             rating = feedback_data[category]
             if rating < threshold:
                 alerts.append({
+                    'key': category,
                     'category': category.replace('_', ' ').title(),
                     'rating': rating,
                     'threshold': threshold,
@@ -126,197 +302,498 @@ def test_email_config():
     """Test email configuration"""
     # Check if emails are disabled first
     if not EMAIL_CONFIG['enable_emails']:
-        print("📧 Email functionality is DISABLED in configuration")
-        print("   Set EMAIL_CONFIG['enable_emails'] = True to enable")
+        logger.info("Email alerts are disabled; set EMAIL_CONFIG['enable_emails'] = True to enable")
         return False
         
-    print("\n📧 Testing Email Configuration...")
-    print(f"SMTP Server: {EMAIL_CONFIG['smtp_server']}:{EMAIL_CONFIG['smtp_port']}")
-    print(f"Sender Email: {EMAIL_CONFIG['sender_email']}")
-    print(f"Enable Emails: {EMAIL_CONFIG['enable_emails']}")
+    smtp = {'smtp_server': f"{EMAIL_CONFIG['smtp_server']}:{EMAIL_CONFIG['smtp_port']}",
+            'sender': EMAIL_CONFIG['sender_email']}
+    logger.info("Testing email configuration", extra=smtp)
     
+    import smtplib
     try:
         # Simple connection test
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
+        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], timeout=10)
         server.starttls()
-        print("✅ SMTP Connection successful")
         
         # Try to login
         try:
             server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-            print("✅ Login successful")
+            logger.info("SMTP connection and login successful", extra=smtp)
             server.quit()
             return True
         except smtplib.SMTPAuthenticationError:
-            print("❌ Login failed - Invalid credentials")
-            print("   Please check your email and password")
-            print("   For Gmail, use App Password, not regular password")
+            logger.error("SMTP login failed: invalid credentials (for Gmail, use an App Password)", extra=smtp)
         except Exception as e:
-            print(f"❌ Login error: {str(e)}")
+            logger.error("SMTP login error: %s", e, extra=smtp)
         
         server.quit()
     except Exception as e:
-        print(f"❌ SMTP Connection error: {str(e)}")
+        logger.error("SMTP connection error: %s", e, extra=smtp)
     
     return False
 
-def send_alert_email(alerts, feedback_id):
-    """Send email alert for low ratings"""
+def build_alert_message(alert_groups, prop=None):
+    """Build one alert email for a list of (feedback_id, alerts) pairs of one property"""
+    # Mail modules are imported where they are used: most processes never send one
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    
+    prop = prop or get_property()
+    hotel_name = prop['name']
+    msg = MIMEMultipart()
+    if len(alert_groups) == 1:
+        msg['Subject'] = f'⚠️ LOW RATING ALERT - {hotel_name} - Feedback #{alert_groups[0][0]}'
+    else:
+        msg['Subject'] = f'⚠️ LOW RATING ALERTS - {hotel_name} - {len(alert_groups)} Feedbacks'
+    msg['From'] = EMAIL_CONFIG['sender_email']
+    msg['To'] = ', '.join(prop['alert_emails'])
+    
+    feedback_ids = ', '.join(f'#{feedback_id}' for feedback_id, _ in alert_groups)
+    
+    # Create email body
+    body = f"""
+    <h2>⚠️ LOW RATING ALERT</h2>
+    <p><strong>Hotel:</strong> {hotel_name}</p>
+    <p><strong>Feedback ID:</strong> {feedback_ids}</p>
+    <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %I:%M %p')}</p>
+    
+    <h3>Critical Ratings Below Threshold:</h3>
+    <table border="1" cellpadding="8" style="border-collapse: collapse;">
+        <tr style="background-color: #ffcccc;">
+            <th>Feedback</th>
+            <th>Category</th>
+            <th>Rating</th>
+            <th>Threshold</th>
+            <th>Comments</th>
+        </tr>
+    """
+    
+    rows = []
+    for feedback_id, alerts in alert_groups:
+        for alert in alerts:
+            rows.append(f"""
+        <tr>
+            <td>#{feedback_id}</td>
+            <td><strong>{alert['category']}</strong></td>
+            <td style="color: red;"><strong>{alert['rating']}/5</strong></td>
+            <td>{alert['threshold']}/5</td>
+            <td>{alert['comments'][:100]}{'...' if len(alert['comments']) > 100 else ''}</td>
+        </tr>
+        """)
+    body += ''.join(rows)
+    
+    body += f"""
+    </table>
+    
+    <p style="margin-top: 20px;">
+        <a href="{BASE_URL}/admin{prop['query']}" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+            View Full Details in Admin Panel
+        </a>
+    </p>
+    
+    <hr>
+    <p style="color: #666; font-size: 12px;">
+        This is an automated alert from {hotel_name} Feedback System.
+    </p>
+    """
+    
+    msg.attach(MIMEText(body, 'html'))
+    return msg
+
+def open_smtp_connection():
+    """Open and authenticate an SMTP connection using EMAIL_CONFIG"""
+    import smtplib
+    server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], timeout=10)
+    server.ehlo()
+    if EMAIL_CONFIG.get('use_tls', True):
+        server.starttls()
+        server.ehlo()
+    if EMAIL_CONFIG['sender_password']:
+        server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
+    return server
+
+def send_alert_email(alerts, feedback_id, prop=None):
+    """Send email alert for low ratings right away (used by /test_email)"""
+    prop = prop or get_property()
     # COMPLETELY skip if emails are disabled - don't even process alerts
     if not EMAIL_CONFIG['enable_emails']:
         # Minimal logging - don't process alerts array to save resources
-        print(f"📧 Email alerts disabled. Skipping email for feedback #{feedback_id}")
+        logger.info("Email alerts disabled, not sending", extra={'feedback_id': feedback_id})
         return True  # Return True so form submission doesn't fail
     
+    import smtplib
+    email = {'feedback_id': feedback_id, 'recipients': prop['alert_emails'], 'alert_count': len(alerts)}
     try:
-        print(f"\n📧 Attempting to send alert email for feedback #{feedback_id}")
-        print(f"   Recipients: {ALERT_EMAILS}")
-        print(f"   Number of alerts: {len(alerts)}")
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['Subject'] = f'⚠️ LOW RATING ALERT - {HOTEL_NAME} - Feedback #{feedback_id}'
-        msg['From'] = EMAIL_CONFIG['sender_email']
-        msg['To'] = ', '.join(ALERT_EMAILS)
-        
-        # Create email body
-        body = f"""
-        <h2>⚠️ LOW RATING ALERT</h2>
-        <p><strong>Hotel:</strong> {HOTEL_NAME}</p>
-        <p><strong>Feedback ID:</strong> #{feedback_id}</p>
-        <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %I:%M %p')}</p>
-        
-        <h3>Critical Ratings Below Threshold:</h3>
-        <table border="1" cellpadding="8" style="border-collapse: collapse;">
-            <tr style="background-color: #ffcccc;">
-                <th>Category</th>
-                <th>Rating</th>
-                <th>Threshold</th>
-                <th>Comments</th>
-            </tr>
-        """
-        
-        for alert in alerts:
-            body += f"""
-            <tr>
-                <td><strong>{alert['category']}</strong></td>
-                <td style="color: red;"><strong>{alert['rating']}/5</strong></td>
-                <td>{alert['threshold']}/5</td>
-                <td>{alert['comments'][:100]}{'...' if len(alert['comments']) > 100 else ''}</td>
-            </tr>
-            """
-        
-        body += f"""
-        </table>
-        
-        <p style="margin-top: 20px;">
-            <a href="{BASE_URL}/admin" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                View Full Details in Admin Panel
-            </a>
-        </p>
-        
-        <hr>
-        <p style="color: #666; font-size: 12px;">
-            This is an automated alert from {HOTEL_NAME} Feedback System.
-        </p>
-        """
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        print(f"   Connecting to {EMAIL_CONFIG['smtp_server']}:{EMAIL_CONFIG['smtp_port']}")
+        msg = build_alert_message([(feedback_id, alerts)], prop)
         
         # Send email with timeout protection
         server = None
+        started = time.perf_counter()
         try:
-            server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], timeout=10)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            
-            print(f"   Logging in as {EMAIL_CONFIG['sender_email']}")
-            server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-            
-            print(f"   Sending email to {ALERT_EMAILS}")
+            server = open_smtp_connection()
             server.send_message(msg)
             server.quit()
+            observe_smtp_send(started, ok=True)
             
-            print(f"✅ Alert email sent successfully for feedback #{feedback_id}")
+            logger.info("Alert email sent", extra=email)
             return True
             
         except smtplib.SMTPAuthenticationError as e:
-            print(f"❌ SMTP Authentication Error: {str(e)}")
-            print("   Most likely incorrect email or password")
-            print("   For Gmail, make sure:")
-            print("   1. You've enabled 'Less secure app access' OR")
-            print("   2. You're using an App Password (recommended)")
+            observe_smtp_send(started, ok=False)
+            logger.error("SMTP authentication failed: %s (check the email and password; "
+                         "Gmail needs an App Password)", e, extra=email)
             if server:
                 server.quit()
             return True  # Still return True so form submission doesn't fail
                 
         except Exception as e:
-            print(f"❌ Failed to send alert email: {str(e)}")
+            observe_smtp_send(started, ok=False)
+            logger.error("Failed to send alert email: %s", e, extra=email)
             if server:
                 server.quit()
             return True  # Still return True so form submission doesn't fail
             
-    except Exception as e:
-        print(f"❌ Error in email preparation: {str(e)}")
+    except Exception:
+        logger.exception("Failed to prepare alert email", extra=email)
         return True  # Still return True so form submission doesn't fail
 
-def get_recent_alerts(hours=24):
-    """Get alerts from recent feedback (last X hours)"""
+# ------------------- BACKGROUND ALERT DISPATCH -------------------
+ALERT_BATCH_WINDOW = 5.0     # Seconds to wait for more alerts before sending a digest
+ALERT_MAX_BATCH = 50         # Max feedbacks coalesced into one digest
+ALERT_MAX_RETRIES = 5        # Attempts before a digest is dropped
+ALERT_RETRY_BASE_DELAY = 2.0 # Backoff: 2s, 4s, 8s, ...
+SMTP_IDLE_TIMEOUT = 60.0     # Close the kept-alive SMTP connection after this idle time
+
+class AlertDispatcher:
+    """Sends alert emails from a background thread.
+
+    review() only enqueues (feedback_id, alerts, property); the worker thread
+    groups everything that arrives within ALERT_BATCH_WINDOW into one digest
+    per property, sent to that property's recipients. It
+    reuses a single SMTP connection between digests and retries failed
+    sends with exponential backoff. The thread is started lazily per
+    process so it survives gunicorn forking.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._smtp = None
+        self._smtp_last_used = 0.0
+
+    def enqueue(self, alerts, feedback_id, prop=None):
+        """Queue alerts for feedback_id; never blocks on the mail server"""
+        if not EMAIL_CONFIG['enable_emails']:
+            logger.debug("Email alerts disabled, not queued", extra={'feedback_id': feedback_id})
+            return
+        self._ensure_started()
+        self._queue.put((feedback_id, alerts, prop or get_property()))
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()  # Items queued in the parent are not ours
+                    self._smtp = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Block for the first alert, then collect more for ALERT_BATCH_WINDOW"""
+        try:
+            first = self._queue.get(timeout=SMTP_IDLE_TIMEOUT)
+        except queue.Empty:
+            return []
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + ALERT_BATCH_WINDOW
+        while len(batch) < ALERT_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Let the loop see the stop signal after sending
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self._close_smtp()
+                return
+            if not batch:
+                self._close_smtp()  # Idle: don't hold the connection open
+                continue
+            by_property = {}
+            for feedback_id, alerts, prop in batch:
+                by_property.setdefault(prop['id'], (prop, []))[1].append((feedback_id, alerts))
+            for prop, alert_groups in by_property.values():
+                self._send_with_retry(alert_groups, prop)
+
+    def _send_with_retry(self, batch, prop):
+        feedback_ids = [feedback_id for feedback_id, _ in batch]
+        msg = build_alert_message(batch, prop)
+        for attempt in range(1, ALERT_MAX_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                self._get_smtp().send_message(msg)
+                observe_smtp_send(started, ok=True)
+                self._smtp_last_used = time.monotonic()
+                logger.info("Alert digest sent", extra={'feedback_ids': feedback_ids, 'property': prop['slug']})
+                return True
+            except Exception as e:
+                observe_smtp_send(started, ok=False)
+                self._close_smtp()
+                if attempt == ALERT_MAX_RETRIES:
+                    logger.error("Giving up on alert digest after %d attempts: %s", attempt, e,
+                                 extra={'feedback_ids': feedback_ids, 'property': prop['slug']})
+                    return False
+                delay = ALERT_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                logger.warning("Alert digest attempt %d failed (%s); retrying in %.0fs", attempt, e, delay,
+                               extra={'feedback_ids': feedback_ids, 'property': prop['slug']})
+                time.sleep(delay)
+
+    def _get_smtp(self):
+        """Reuse the open SMTP connection if it still answers NOOP"""
+        import smtplib
+        if self._smtp is not None:
+            if time.monotonic() - self._smtp_last_used < SMTP_IDLE_TIMEOUT:
+                try:
+                    if self._smtp.noop()[0] == 250:
+                        return self._smtp
+                except smtplib.SMTPException:
+                    pass
+            self._close_smtp()
+        self._smtp = open_smtp_connection()
+        self._smtp_last_used = time.monotonic()
+        return self._smtp
+
+    def _close_smtp(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def stop(self, timeout=10):
+        """Flush queued alerts and stop the worker (called at exit)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+alert_dispatcher = AlertDispatcher()
+atexit.register(alert_dispatcher.stop)
+
+def record_alerts(cur, feedback_id, alerts):
+    """Store alerts raised by a review, stamped with the review's created_at"""
+    cur.executemany(INSERT_ALERT_SQL,
+                    [(feedback_id, alert['key'], alert['rating'], alert['threshold'], feedback_id)
+                     for alert in alerts])
+
+def get_recent_alerts(hours=24, include_acknowledged=True, property_id=DEFAULT_PROPERTY_ID):
+    """Get one property's alerts from recent feedback (last X hours), grouped by feedback"""
     try:
-        conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
+        conn = get_db()
         cur = conn.cursor()
         
-        # Get feedback from last X hours
+        # Get alerts from last X hours - one range scan on idx_alerts_property_created_at
         time_threshold = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+        acknowledged_filter = "" if include_acknowledged else "AND a.acknowledged = 0"
         
-        cur.execute("""
-            SELECT * FROM reviews 
-            WHERE created_at >= ? 
-            ORDER BY created_at DESC
-        """, (time_threshold,))
-        
-        recent_feedback = cur.fetchall()
-        conn.close()
+        cur.execute(f"""
+            SELECT a.id, a.feedback_id, a.category, a.rating, a.threshold,
+                   a.created_at, a.acknowledged,
+                   COALESCE(CASE a.category
+                       WHEN 'food_quality' THEN r.food_quality_comments
+                       WHEN 'seating_arrangement' THEN r.seating_arrangement_comments
+                       WHEN 'parking' THEN r.parking_comments
+                       WHEN 'washroom' THEN r.washroom_comments
+                       WHEN 'hotel_service' THEN r.hotel_service_comments
+                       ELSE 'No comments'
+                   END, '') AS comments,
+                   (r.food_quality + r.seating_arrangement + r.parking + r.washroom + r.hotel_service) / 5.0 AS overall
+            FROM alerts a
+            JOIN reviews r ON r.id = a.feedback_id
+            WHERE a.property_id = ? AND a.created_at >= ? {acknowledged_filter}
+            ORDER BY a.created_at DESC, a.feedback_id DESC, a.id
+        """, (property_id, time_threshold))
         
-        # Check each feedback for alerts
+        # Group rows per feedback, keeping newest-first order
         all_alerts = []
-        for feedback in recent_feedback:
-            feedback_data = {
-                'food_quality': feedback[1],
-                'food_quality_comments': feedback[2],
-                'seating_arrangement': feedback[3],
-                'seating_arrangement_comments': feedback[4],
-                'parking': feedback[5],
-                'parking_comments': feedback[6],
-                'washroom': feedback[7],
-                'washroom_comments': feedback[8],
-                'hotel_service': feedback[9],
-                'hotel_service_comments': feedback[10]
-            }
-            
-            # Calculate overall average
-            ratings = [feedback[1], feedback[3], feedback[5], feedback[7], feedback[9]]
-            overall_avg = sum(ratings) / len(ratings)
-            feedback_data['overall'] = overall_avg
-            
-            alerts = check_alert_thresholds(feedback_data)
-            if alerts:
+        for row in cur.fetchall():
+            if not all_alerts or all_alerts[-1]['feedback_id'] != row[1]:
                 all_alerts.append({
-                    'feedback_id': feedback[0],
-                    'date': feedback[12],
-                    'alerts': alerts,
-                    'overall': overall_avg
+                    'feedback_id': row[1],
+                    'date': row[5],
+                    'alerts': [],
+                    'overall': row[8],
+                    'acknowledged': True
                 })
+            all_alerts[-1]['alerts'].append({
+                'id': row[0],
+                'key': row[2],
+                'category': row[2].replace('_', ' ').title(),
+                'rating': row[3],
+                'threshold': row[4],
+                'comments': row[7],
+                'acknowledged': bool(row[6])
+            })
+            all_alerts[-1]['acknowledged'] = all_alerts[-1]['acknowledged'] and bool(row[6])
         
         return all_alerts
         
-    except Exception as e:
-        print(f"Error getting recent alerts: {e}")
+    except Exception:
+        logger.exception("Error getting recent alerts")
         return []
 
+# ------------------- KEYSET PAGINATION -------------------
+def encode_cursor(created_at, review_id):
+    """Encode a (created_at, id) position as an opaque URL-safe cursor"""
+    raw = f"{created_at or ''}|{review_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor back to (created_at, id), or None if it is invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, review_id = raw.rsplit('|', 1)
+        return created_at, int(review_id)
+    except Exception:
+        return None
+
+def get_page_size(value):
+    """Clamp a requested page size to 1..ADMIN_MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return ADMIN_PAGE_SIZE
+    return max(1, min(size, ADMIN_MAX_PAGE_SIZE))
+
+def fetch_reviews_page(cur, cursor=None, direction='next', page_size=ADMIN_PAGE_SIZE,
+                       conditions=(), params=(), source='reviews'):
+    """Fetch one page of reviews, newest first, seeking on (created_at, id).
+
+    Only page_size + 1 rows are read whatever the table size; the extra row
+    tells us whether another page exists in the direction we are moving.
+    source, conditions and params come from review_filter_conditions.
+    Returns (rows, prev_cursor, next_cursor) where a cursor is None when
+    there is no page in that direction.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    conditions, params = list(conditions), list(params)
+
+    if position and direction == 'prev':
+        # Walk towards newer rows, then flip back to newest-first order
+        conditions.append("(created_at, id) > (?, ?)")
+        params.extend(position)
+        order = "created_at ASC, id ASC"
+    elif position:
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(position)
+        order = "created_at DESC, id DESC"
+    else:
+        order = "created_at DESC, id DESC"
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur.execute(f"""
+        SELECT reviews.* FROM {source}
+        {where}
+        ORDER BY {order}
+        LIMIT ?
+    """, params + [page_size + 1])
+    rows = cur.fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if position and direction == 'prev':
+        rows = list(reversed(rows))
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(position), has_more
+
+    prev_cursor = encode_cursor(rows[0][12], rows[0][0]) if rows and has_newer else None
+    next_cursor = encode_cursor(rows[-1][12], rows[-1][0]) if rows and has_older else None
+    return rows, prev_cursor, next_cursor
+
+# ------------------- SERVER-SIDE REVIEW FILTERS -------------------
+REVIEW_FILTER_PARAMS = ['q', 'category', 'min_rating', 'max_rating', 'low', 'location', 'start_date', 'end_date']
+
+def fts_match_query(text):
+    """Turn free text into a safe FTS5 query: every word, prefix-matched"""
+    words = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{word}"*' for word in words if word)
+
+def tsquery_prefix_query(text):
+    """PostgreSQL equivalent of fts_match_query(), for to_tsquery()"""
+    words = re.findall(r'\w+', text.lower())
+    return ' & '.join(f"'{word}':*" for word in words)
+
+def review_filter_conditions(args, property_id=DEFAULT_PROPERTY_ID):
+    """Build the FROM source and WHERE conditions for one property's reviews
+    from request args. Returns (source, conditions, params); params holds
+    the source's parameters first, then the conditions'.
+
+    q           full-text search over all comment columns
+    category    rating column that min_rating/max_rating apply to
+                (the overall average when omitted or 'all')
+    low=1       only reviews with a low rating in any category
+    location    one room/table
+    start_date, end_date   inclusive YYYY-MM-DD range
+    Raises ValueError for invalid input.
+    """
+    conditions, params = ["property_id = ?"], [property_id]
+    
+    if args.get('location'):
+        conditions.append("location = ?")
+        params.append(clean_location(args['location']))
+    
+    start, end = parse_export_date_range(args)
+    if start:
+        conditions.append("created_at >= ?")
+        params.append(start)
+    if end:
+        conditions.append("created_at < ?")
+        params.append(end)
+    
+    category = args.get('category', 'all') or 'all'
+    if category != 'all' and category not in RATING_CATEGORIES:
+        raise ValueError(f"Unknown category: {category}")
+    rating_sql = category if category != 'all' else API_REVIEW_FIELDS['overall']
+    if args.get('min_rating'):
+        conditions.append(f"{rating_sql} >= ?")
+        params.append(float(args['min_rating']))
+    if args.get('max_rating'):
+        conditions.append(f"{rating_sql} <= ?")
+        params.append(float(args['max_rating']))
+    
+    if args.get('low') in ('1', 'true', 'on'):
+        conditions.append(LOW_RATING_CONDITION)
+    
+    source = 'reviews'
+    search = storage.comment_search(args.get('q', ''))
+    if search:
+        source, condition, param = search
+        if condition:
+            conditions.append(condition)
+            params.append(param)
+        else:
+            params.insert(0, param)  # Bound in the FROM clause, before any condition
+    
+    return source, conditions, params
+
 # ------------------- ADMIN PASSWORD PROTECTION -------------------
 def admin_required(f):
     """Decorator to protect admin page with password"""
@@ -329,182 +806,1604 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
-# ------------------- DATABASE SETUP -------------------
-def init_db():
-    conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
-    cur = conn.cursor()
-    cur.execute("DROP TABLE IF EXISTS reviews")
-    cur.execute("""
-        CREATE TABLE reviews(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            food_quality INTEGER,
-            food_quality_comments TEXT,
-            seating_arrangement INTEGER,
-            seating_arrangement_comments TEXT,
-            parking INTEGER,
-            parking_comments TEXT,
-            washroom INTEGER,
-            washroom_comments TEXT,
-            hotel_service INTEGER,
-            hotel_service_comments TEXT,
-            general_comments TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-    print("✅ Database created successfully with correct schema!")
+# Browsers resend Basic credentials on their own, so another site could get
+# a logged-in admin's browser to post an admin form. Forms that change data
+# carry a token only our pages contain and must come from this site. Every
+# instance needs the same SECRET_KEY; without one each start picks its own.
+SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 
-# ------------------- CHECK AND FIX DATABASE -------------------
-def check_and_fix_db():
-    """Check if database has correct schema, fix if needed"""
-    try:
-        conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(reviews)")
-        columns = cur.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Check if we have the new schema
-        expected_columns = ['food_quality_comments', 'seating_arrangement_comments', 
-                           'parking_comments', 'washroom_comments', 'hotel_service_comments']
-        
-        if not all(col in column_names for col in expected_columns):
-            print("⚠️ Database schema outdated. Fixing...")
-            conn.close()
-            init_db()
-        else:
-            print("✅ Database schema is correct!")
-            conn.close()
-    except sqlite3.OperationalError:
-        print("📊 Creating new database...")
-        init_db()
+@app.template_global()
+def csrf_token():
+    """Hidden field value for admin forms that change data"""
+    return hmac.new(SECRET_KEY.encode('utf-8'), b'admin-form', hashlib.sha256).hexdigest()
 
-# ------------------- CSV EXPORT FUNCTION -------------------
-@app.route("/admin/export/csv")
+def same_origin():
+    """False if the Origin (or else Referer) header names another site"""
+    source = request.headers.get('Origin') or request.headers.get('Referer')
+    if not source:
+        return True  # Stripped by the browser or a privacy setting; the token still has to match
+    return urlsplit(source).netloc == request.host
+
+def csrf_protected(f):
+    """Decorator for admin POSTs: 403 without our token or from another site"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not same_origin() or not hmac.compare_digest(request.form.get('csrf_token', ''), csrf_token()):
+            logger.warning("Rejected cross-site or tokenless admin form", extra={'path': request.path})
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated
+
+# ------------------- METRICS -------------------
+# Request latency per route, requests in flight, SQL statement timings and
+# SMTP send times, scraped from /metrics. Under gunicorn every worker writes
+# its samples to PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) and
+# /metrics sums them, so any worker can answer the scrape.
+METRICS_ENABLED = prometheus_client is not None and os.environ.get('METRICS_ENABLED', '1') != '0'
+SQL_OPERATION_PATTERN = re.compile(r'\s*(\w+)')
+
+if METRICS_ENABLED:
+    REQUEST_DURATION = prometheus_client.Histogram(
+        'hotel_http_request_duration_seconds', 'Time to serve a request, streamed body included',
+        ['route', 'method'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+    REQUESTS_TOTAL = prometheus_client.Counter(
+        'hotel_http_requests_total', 'Requests served', ['route', 'method', 'status'])
+    REQUESTS_IN_FLIGHT = prometheus_client.Gauge(
+        'hotel_http_requests_in_flight', 'Requests being served right now', multiprocess_mode='livesum')
+    DB_QUERY_DURATION = prometheus_client.Histogram(
+        'hotel_db_query_duration_seconds', 'Time to execute one SQL statement',
+        ['backend', 'operation'], buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+    SMTP_SEND_DURATION = prometheus_client.Histogram(
+        'hotel_smtp_send_duration_seconds', 'Time to connect and hand an alert email to the SMTP server',
+        ['result'], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+    RATE_LIMITED_TOTAL = prometheus_client.Counter(
+        'hotel_rate_limited_total', 'Requests refused with 429 by the rate limiter', ['limit'])
+
+@lru_cache(maxsize=None)
+def metric_child(metric, labels):
+    """metric.labels(*labels), looked up once per label set (routes and SQL verbs are few)"""
+    return metric.labels(*labels)
+
+def observe_query(backend, sql, started):
+    """Record one statement that began at perf_counter() value `started`"""
+    match = SQL_OPERATION_PATTERN.match(sql)
+    operation = match.group(1).lower() if match else 'unknown'
+    metric_child(DB_QUERY_DURATION, (backend, operation)).observe(time.perf_counter() - started)
+
+def observe_smtp_send(started, ok):
+    if METRICS_ENABLED:
+        metric_child(SMTP_SEND_DURATION, ('ok' if ok else 'error',)).observe(time.perf_counter() - started)
+
+class TimedSQLiteCursor(sqlite3.Cursor):
+    """sqlite3 cursor that records every statement in DB_QUERY_DURATION"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            observe_query('sqlite', sql, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            observe_query('sqlite', sql, started)
+
+class TimedSQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors and execute() shortcuts are timed"""
+
+    def cursor(self, factory=TimedSQLiteCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _finish_request_metrics(route, method, status, started):
+    metric_child(REQUEST_DURATION, (route, method)).observe(time.perf_counter() - started)
+    metric_child(REQUESTS_TOTAL, (route, method, status)).inc()
+    REQUESTS_IN_FLIGHT.dec()
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        """Observe once the body is sent, so streamed CSV exports count in full"""
+        started = g.pop('request_started', None)
+        if started is not None:
+            # The URL rule, not the path, keeps label cardinality bounded
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            response.call_on_close(partial(_finish_request_metrics, route, request.method,
+                                           response.status_code, started))
+        return response
+
+@app.route("/metrics")
 @admin_required
-def export_csv():
-    """Export all feedback data to CSV"""
-    try:
-        conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM reviews ORDER BY created_at DESC")
-        reviews = cur.fetchall()
-        conn.close()
-        
-        # Create CSV in memory
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'ID', 'Date', 'Time',
-            'Food Quality', 'Food Comments',
-            'Seating Arrangement', 'Seating Comments',
-            'Parking Facility', 'Parking Comments',
-            'Washroom Cleanliness', 'Washroom Comments',
-            'Hotel Service', 'Service Comments',
-            'General Comments',
-            'Overall Average'
-        ])
-        
-        # Write data rows
-        for review in reviews:
-            # Calculate overall average
-            ratings = [review[1], review[3], review[5], review[7], review[9]]
-            overall_avg = sum(ratings) / len(ratings) if ratings else 0
-            
-            # Format date and time
-            created_at = review[12]
-            if created_at:
-                try:
-                    date_obj = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                    date_str = date_obj.strftime('%Y-%m-%d')
-                    time_str = date_obj.strftime('%H:%M:%S')
-                except:
-                    date_str = created_at[:10] if len(created_at) > 10 else created_at
-                    time_str = created_at[11:19] if len(created_at) > 19 else ''
+def metrics():
+    """Prometheus text format, summed across gunicorn workers"""
+    if not METRICS_ENABLED:
+        abort(404)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        prometheus_multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    response = Response(prometheus_client.generate_latest(registry),
+                        content_type=prometheus_client.CONTENT_TYPE_LATEST)
+    response.cache_control.no_store = True
+    return response
+
+# ------------------- RATE LIMITING -------------------
+# Token buckets per client IP and route: a guest can post a burst of
+# RATE_LIMIT_<NAME>_BURST requests, after which tokens come back at
+# RATE_LIMIT_<NAME> (e.g. 6/minute). Requests with no token left get a 429
+# with Retry-After. Buckets live in each worker's memory by default, so with
+# N gunicorn workers a client gets up to N times the limit;
+# RATE_LIMIT_STORE=sqlite shares them between the workers on one host, and
+# RATE_LIMIT_STORE=off turns limiting off.
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory').lower()
+RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH',
+                                    os.path.join(tempfile.gettempdir(), 'hotel_feedback_ratelimit.db'))
+RATE_LIMIT_SWEEP_EVERY = 1000  # Drop refilled buckets after this many checks
+# Behind Render's proxy every request comes from the proxy's address; the
+# guest's is the one the proxy appended to X-Forwarded-For
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1 if os.environ.get('RENDER') else 0))
+RATE_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+def parse_rate(spec):
+    """'6/minute' -> tokens per second"""
+    count, _, period = spec.partition('/')
+    return float(count) / RATE_PERIODS[period.strip().lower() or 'second']
+
+def rate_limit_setting(name, rate, burst):
+    env = f"RATE_LIMIT_{name.upper()}"
+    return {'rate': parse_rate(os.environ.get(env, rate)),
+            'burst': int(os.environ.get(f"{env}_BURST", burst))}
+
+# Guests on hotel Wi-Fi share one public IP, so the review bucket is sized
+# for a whole hotel, not one guest: a checkout rush of 300 guests behind one
+# NAT gets through, and after it a single address still gets 10 reviews a
+# second, a small share of what one worker writes. The trade-off is that a
+# script on one address can post that many junk reviews before it is slowed
+# down; the bucket caps a flood, it doesn't tell guests from scripts, and
+# every guest key (idempotency key, cookie) is one a script can mint too.
+# Hotels with a dedicated address and fewer rooms can lower it through
+# RATE_LIMIT_REVIEW and RATE_LIMIT_REVIEW_BURST.
+RATE_LIMITS = {
+    'review': rate_limit_setting('review', '600/minute', 300),
+    'export': rate_limit_setting('export', '6/minute', 3),
+}
+
+def client_ip():
+    """The client's address, looking past TRUSTED_PROXY_COUNT proxies"""
+    if TRUSTED_PROXY_COUNT:
+        forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_COUNT:
+            return forwarded[-TRUSTED_PROXY_COUNT]
+    return request.remote_addr or 'unknown'
+
+class MemoryRateLimitStore:
+    """Token buckets in a dict, private to this worker process"""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated, full_at)
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    def take(self, key, rate, burst):
+        """Spend one token; return 0 if allowed, else seconds until one is back"""
+        now = time.monotonic()
+        with self._lock:
+            self._checks += 1
+            if self._checks % RATE_LIMIT_SWEEP_EVERY == 0:
+                self._buckets = {k: b for k, b in self._buckets.items() if b[2] > now}
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
             else:
-                date_str = ''
-                time_str = ''
-            
-            writer.writerow([
-                review[0],  # ID
-                date_str,   # Date
-                time_str,   # Time
-                review[1],  # Food Quality
-                review[2] or '',  # Food Comments
-                review[3],  # Seating Arrangement
-                review[4] or '',  # Seating Comments
-                review[5],  # Parking Facility
-                review[6] or '',  # Parking Comments
-                review[7],  # Washroom Cleanliness
-                review[8] or '',  # Washroom Comments
-                review[9],  # Hotel Service
-                review[10] or '',  # Service Comments
-                review[11] or '',  # General Comments
-                f"{overall_avg:.2f}"  # Overall Average
-            ])
-        
-        # Create response with CSV file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{HOTEL_NAME.replace(' ', '_')}_Feedback_{timestamp}.csv"
-        
-        return Response(
-            output.getvalue(),
-            mimetype="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Type": "text/csv; charset=utf-8"
-            }
-        )
-        
-    except Exception as e:
-        return f"""
-        <html>
-        <head><title>Export Error</title></head>
-        <body>
-            <h2>CSV Export Error</h2>
-            <p>Error: {str(e)}</p>
-            <a href="/admin">Back to Admin</a>
-        </body>
-        </html>
-        """
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
 
-@app.route("/admin/export/recent_alerts_csv")
-@admin_required
-def export_recent_alerts_csv():
-    """Export recent alerts to CSV"""
-    try:
-        alerts_data = get_recent_alerts(hours=168)  # Last 7 days
-        
-        # Create CSV in memory
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Feedback ID', 'Date', 'Time',
-            'Alert Category', 'Rating', 'Threshold',
-            'Comments', 'Overall Rating'
-        ])
-        
+class SQLiteRateLimitStore:
+    """Token buckets in a small SQLite file shared by every worker on the host.
+
+    Kept out of reviews.db so limiter writes never queue behind review
+    inserts. Durability doesn't matter here (synchronous=OFF): after a crash
+    buckets simply start full again.
+    """
+
+    def __init__(self, path=RATE_LIMIT_DB_PATH):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        # SQLite takes one writer at a time anyway; threads of this worker
+        # queue here rather than in SQLite's sleeping busy handler
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL
+                )
+            """)
+            self._conn, self._pid = conn, os.getpid()  # One inherited through fork is left alone
+        return self._conn
+
+    def take(self, key, rate, burst):
+        """Spend one token; return 0 if allowed, else seconds until one is back"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()  # Shared between processes, so wall-clock time
+            self._checks += 1
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._checks % RATE_LIMIT_SWEEP_EVERY == 0:
+                    conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                             (key, tokens, now, now + (burst - tokens) / rate))
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            return wait
+
+def create_rate_limit_store():
+    if RATE_LIMIT_STORE == 'off':
+        return None
+    if RATE_LIMIT_STORE == 'sqlite':
+        return SQLiteRateLimitStore()
+    if RATE_LIMIT_STORE != 'memory':
+        raise RuntimeError(f"Unknown RATE_LIMIT_STORE {RATE_LIMIT_STORE!r}; use memory, sqlite or off")
+    return MemoryRateLimitStore()
+
+rate_limit_store = create_rate_limit_store()
+
+def too_many_requests(retry_after):
+    """429 response; guests posting the form get the usual error page"""
+    headers = {'Retry-After': str(retry_after)}
+    if request.endpoint == 'review':
+        message = f"Too many submissions from your network. Please try again in {retry_after} seconds."
+        body = render_template('review_error.html', error=message, review_url=request.full_path.rstrip('?'))
+        return body, 429, headers
+    return f"Too many requests, retry in {retry_after} seconds", 429, headers
+
+def rate_limited(name, methods=None):
+    """Decorator: apply RATE_LIMITS[name] per client IP and route (to methods, if given)"""
+    limit = RATE_LIMITS[name]
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            store = rate_limit_store
+            if store is not None and (methods is None or request.method in methods):
+                try:
+                    wait = store.take(f"{request.endpoint}:{client_ip()}", limit['rate'], limit['burst'])
+                except sqlite3.Error as e:
+                    # A busy or broken limiter must not take the site down with it
+                    logger.warning("Rate limiter unavailable, allowing request: %s", e)
+                    wait = 0
+                if wait:
+                    if METRICS_ENABLED:
+                        metric_child(RATE_LIMITED_TOTAL, (name,)).inc()
+                    logger.info("Rate limited", extra={'limit': name, 'client_ip': client_ip()})
+                    return too_many_requests(max(1, math.ceil(wait)))
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+# ------------------- DATABASE CONNECTION POOL -------------------
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))  # Idle connections kept per worker
+DB_BUSY_TIMEOUT_MS = 5000  # Wait this long for a writer lock instead of failing
+
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",         # Readers never block the single writer
+    "PRAGMA synchronous=NORMAL",       # Safe with WAL, one fsync per checkpoint
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA mmap_size=268435456",      # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+]
+
+class SQLitePool:
+    """Small per-process pool of SQLite connections.
+
+    Connections are opened once with the pragmas above and reused across
+    requests. Each one is health-checked when handed out, and the pool is
+    discarded automatically in a forked child (gunicorn preload) so workers
+    never share a connection with the master.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                               factory=TimedSQLiteConnection if METRICS_ENABLED else sqlite3.Connection)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _reset_after_fork(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Inherited connections belong to the parent; drop without closing
+                self._idle = queue.LifoQueue(maxsize=self.size)
+                self._pid = os.getpid()
+
+    def acquire(self):
+        """Return a healthy connection, reusing an idle one when possible"""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                conn.execute("SELECT 1").fetchone()
+                return conn
+            except sqlite3.Error:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+
+    def release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full"""
+        if self._pid != os.getpid():
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# ------------------- POSTGRESQL CONNECTION POOL -------------------
+# When DATABASE_URL is set (Render's managed database) reviews live in
+# PostgreSQL so several web instances can share them. The rest of this file
+# writes SQL once, in the SQLite dialect: ? placeholders and execute()
+# returning the cursor. The wrappers below translate that for psycopg2.
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))  # Connections opened up front per worker
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # Seconds to wait for a free connection
+
+_prepared_statements = {}  # SQL text -> server-side statement name
+
+def prepared_statement(sql):
+    """Mark a fixed, frequently run statement for server-side preparation.
+
+    PostgreSQL connections PREPARE it on first use and EXECUTE it after that.
+    sqlite3 already keeps compiled statements per connection, so SQLite runs
+    it as-is.
+    """
+    _prepared_statements.setdefault(sql, f"stmt_{len(_prepared_statements) + 1}")
+    return sql
+
+@lru_cache(maxsize=512)
+def to_pyformat(sql):
+    """Rewrite ? placeholders as psycopg2's %s, escaping literal % signs"""
+    return sql.replace('%', '%%').replace('?', '%s')
+
+def to_numbered(sql):
+    """Rewrite ? placeholders as $1, $2, ... for PREPARE"""
+    parts = sql.split('?')
+    return parts[0] + ''.join(f"${number}{part}" for number, part in enumerate(parts[1:], 1))
+
+class PostgresCursor:
+    """psycopg2 cursor accepting the SQLite-style SQL used in this file"""
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        params = tuple(params)
+        started = time.perf_counter()
+        try:
+            name = _prepared_statements.get(sql)
+            if name and self._cursor.name is None:
+                self._conn.prepare(name, sql)
+                args = f" ({', '.join(['%s'] * len(params))})" if params else ""
+                self._cursor.execute(f"EXECUTE {name}{args}", params)
+            else:
+                self._cursor.execute(to_pyformat(sql), params)
+        finally:
+            if METRICS_ENABLED:
+                observe_query('postgresql', sql, started)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class PostgresConnection:
+    """psycopg2 connection wrapper that remembers its prepared statements"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._prepared = set()
+
+    def cursor(self, name=None):
+        return PostgresCursor(self, self.raw.cursor(name) if name else self.raw.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def prepare(self, name, sql):
+        if name not in self._prepared:
+            self.raw.cursor().execute(f"PREPARE {name} AS {to_numbered(sql)}")
+            self._prepared.add(name)
+
+    @property
+    def in_transaction(self):
+        return self.raw.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+class PostgresPool:
+    """psycopg2 ThreadedConnectionPool, created lazily in each worker process.
+
+    A pool inherited through fork (gunicorn preload) is dropped without
+    closing, like SQLitePool, so workers never share a socket. When every
+    connection is checked out, callers (threads or gevent greenlets) wait up
+    to DB_POOL_TIMEOUT for one instead of failing straight away.
+    """
+
+    def __init__(self, dsn, minconn=DB_POOL_MIN, maxconn=DB_POOL_SIZE):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self._pool = None
+        self._pid = None
+        self._wrappers = {}
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(self.minconn, self.maxconn, self.dsn)
+                    self._wrappers = {}
+                    self._slots = threading.BoundedSemaphore(self.maxconn)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def acquire(self):
+        """Return a pooled connection, replacing one the server has dropped"""
+        pool = self._get_pool()
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError("no database connection free after %ss" % DB_POOL_TIMEOUT)
+        try:
+            while True:
+                raw = pool.getconn()
+                if not raw.closed:
+                    break
+                self._wrappers.pop(id(raw), None)
+                pool.putconn(raw, close=True)
+        except BaseException:
+            self._slots.release()
+            raise
+        conn = self._wrappers.get(id(raw))
+        if conn is None or conn.raw is not raw:
+            conn = self._wrappers[id(raw)] = PostgresConnection(raw)
+        return conn
+
+    def release(self, conn):
+        """Roll back anything left open and return the connection"""
+        if self._pid != os.getpid():
+            return
+        raw = conn.raw
+        try:
+            if not raw.closed and conn.in_transaction:
+                raw.rollback()
+        except psycopg2.Error:
+            pass
+        if raw.closed:
+            self._wrappers.pop(id(raw), None)
+        try:
+            self._pool.putconn(raw, close=bool(raw.closed))
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.closeall()
+            self._pool = self._pid = None  # Reopened on the next acquire()
+
+# ------------------- STORAGE BACKEND -------------------
+DATABASE_URL = os.environ.get('DATABASE_URL', '').strip()
+# Comment searches matching up to this many reviews are driven from the
+# full-text index; commoner words walk the created_at index instead
+FTS_DRIVEN_MAX_MATCHES = 1000
+# Seconds a starting process waits for another one's SQLite migration
+SQLITE_MIGRATION_TIMEOUT = 300
+
+class SQLiteStorage:
+    """Reviews in the local database/reviews.db file (default)"""
+    name = 'sqlite'
+    Error = sqlite3.Error
+
+    def __init__(self, path):
+        self.path = path
+        self.pool = SQLitePool(path)
+
+    def acquire(self):
+        return self.pool.acquire()
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+    def connect(self):
+        """A dedicated connection for migrations and CLI commands"""
+        return sqlite3.connect(self.path)
+
+    def migrate(self):
+        """Apply pending migrations, tracked with PRAGMA user_version.
+
+        Each one takes the write lock before checking the version again, so
+        processes starting together apply it once, one waiting for the other.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self.connect()
+        conn.isolation_level = None  # We manage BEGIN/COMMIT ourselves
+        try:
+            cur = conn.cursor()
+            cur.execute(f"PRAGMA busy_timeout = {SQLITE_MIGRATION_TIMEOUT * 1000}")
+            current_version = cur.execute("PRAGMA user_version").fetchone()[0]
+            for version, description, migration in MIGRATIONS:
+                if version <= current_version:
+                    continue
+                cur.execute("BEGIN IMMEDIATE")
+                try:
+                    current_version = cur.execute("PRAGMA user_version").fetchone()[0]
+                    if version <= current_version:
+                        cur.execute("COMMIT")  # Another process applied it while we waited
+                        continue
+                    logger.info("Applying migration %d: %s", version, description)
+                    migration(cur)
+                    cur.execute(f"PRAGMA user_version = {version}")
+                    cur.execute("COMMIT")
+                except Exception:
+                    cur.execute("ROLLBACK")
+                    raise
+                current_version = version
+            return current_version
+        finally:
+            conn.close()
+
+    def comment_search(self, text):
+        """(source, condition, param) for reviews whose comments contain text.
+
+        Rare words drive the query from the full-text index: source joins
+        its matches to reviews, so only those rows are read and sorted
+        rather than walking the property's rows until a page turns up.
+        Common words do walk: a page of matches is only a few rows away,
+        while reading every match would cost more than the walk. Counting
+        up to FTS_DRIVEN_MAX_MATCHES tells the two apart.
+        """
+        query = fts_match_query(text)
+        if not query:
+            return None
+        matches = get_db().execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM reviews_fts WHERE reviews_fts MATCH ? LIMIT ?)",
+            (query, FTS_DRIVEN_MAX_MATCHES + 1)).fetchone()[0]
+        if matches > FTS_DRIVEN_MAX_MATCHES:
+            return 'reviews', "id IN (SELECT rowid FROM reviews_fts WHERE reviews_fts MATCH ?)", query
+        return ("(SELECT rowid AS match_id FROM reviews_fts WHERE reviews_fts MATCH ?) AS matches "
+                "CROSS JOIN reviews ON reviews.id = matches.match_id"), None, query
+
+    def streaming_cursor(self, conn):
+        """Cursor whose fetchmany() reads rows incrementally"""
+        return conn.cursor()
+
+class PostgresStorage:
+    """Reviews in the PostgreSQL database at DATABASE_URL"""
+    name = 'postgresql'
+
+    def __init__(self, url):
+        global psycopg2
+        try:
+            import psycopg2
+            import psycopg2.extensions
+            import psycopg2.pool
+        except ImportError:
+            raise RuntimeError("DATABASE_URL is set but psycopg2 is not installed")
+        self.Error = psycopg2.Error
+        self.url = url
+        self.pool = PostgresPool(url)
+        
+        # Hand timestamps and dates back as text, and NUMERIC as int/float,
+        # so rows look exactly like the ones sqlite3 returns
+        extensions = psycopg2.extensions
+        extensions.register_type(extensions.new_type(
+            (1114, 1082), 'TIMESTAMP_AS_TEXT', lambda value, cur: value))
+        extensions.register_type(extensions.new_type(
+            (1700,), 'NUMERIC_AS_NUMBER', lambda value, cur: None if value is None else _sqlite_number(value)))
+
+    def acquire(self):
+        return self.pool.acquire()
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+    def connect(self):
+        """A dedicated connection for migrations and CLI commands"""
+        return PostgresConnection(psycopg2.connect(self.url))
+
+    def migrate(self):
+        """Apply pending migrations, tracked in the schema_version table.
+
+        Everything runs in one transaction behind an advisory lock, so web
+        instances starting together migrate one at a time.
+        """
+        conn = self.connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT pg_advisory_xact_lock(?)", (POSTGRES_MIGRATION_LOCK_ID,))
+            cur.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            current_version = cur.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+            for version, description, migration in POSTGRES_MIGRATIONS:
+                if version <= current_version:
+                    continue
+                logger.info("Applying migration %d: %s", version, description)
+                migration(cur)
+                cur.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+                current_version = version
+            conn.commit()
+            return current_version
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def comment_search(self, text):
+        """(source, condition, param) for reviews whose comments contain text.
+
+        A plain condition: the planner weighs the GIN index against walking
+        the property's created_at index by how common the words are.
+        """
+        query = tsquery_prefix_query(text)
+        if not query:
+            return None
+        return 'reviews', f"{POSTGRES_COMMENTS_TSVECTOR} @@ to_tsquery('simple', ?)", query
+
+    def streaming_cursor(self, conn):
+        """Server-side cursor, so fetchmany() does not load the whole table"""
+        cur = conn.cursor(name='reviews_stream')
+        cur.itersize = CSV_EXPORT_BATCH_SIZE
+        return cur
+
+def _sqlite_number(value):
+    """Parse a NUMERIC the way SQLite's NUMERIC affinity stores it"""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def create_storage():
+    """PostgreSQL when DATABASE_URL is set, otherwise the local SQLite file"""
+    if DATABASE_URL:
+        return PostgresStorage(DATABASE_URL)
+    return SQLiteStorage(DB_PATH)
+
+storage = create_storage()
+
+def get_db():
+    """Get the pooled connection for the current request"""
+    if 'db_conn' not in g:
+        g.db_conn = storage.acquire()
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """Hand the request's connection back to the pool"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        storage.release(conn)
+
+# Hot statements shared by both backends (see prepared_statement)
+INSERT_REVIEW_SQL = prepared_statement("""
+    INSERT INTO reviews
+        (food_quality, food_quality_comments,
+         seating_arrangement, seating_arrangement_comments,
+         parking, parking_comments,
+         washroom, washroom_comments,
+         hotel_service, hotel_service_comments,
+         general_comments, idempotency_key, property_id, location)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (idempotency_key) DO NOTHING
+    RETURNING id
+""")
+
+FIND_REVIEW_BY_KEY_SQL = prepared_statement(
+    "SELECT id FROM reviews WHERE idempotency_key = ?")
+
+# ------------------- PROPERTIES -------------------
+# One deployment serves several hotels. Each review, alert and rollup row
+# carries property_id, guests arrive with ?property=<slug> in their QR URL
+# (no parameter means the default property) and every dashboard query and
+# cache is scoped to one property.
+PROPERTY_CACHE_TTL = 60  # Seconds before a worker re-reads the properties table
+PROPERTY_SLUG_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]{0,49}$')
+LOCATION_MAX_LENGTH = 50
+
+def _property_from_row(row):
+    """Property dict with the module defaults filled in for empty settings"""
+    property_id, slug, name, logo, thresholds, emails = row
+    return {
+        'id': property_id,
+        'slug': slug,
+        'name': name,
+        'logo': logo or HOTEL_LOGO,
+        'thresholds': {**ALERT_THRESHOLDS, **json.loads(thresholds or '{}')},
+        'alert_emails': [email.strip() for email in (emails or '').split(',') if email.strip()] or ALERT_EMAILS,
+        # Query string that selects this property in links
+        'query': '' if property_id == DEFAULT_PROPERTY_ID else f'?property={slug}',
+        # Changes whenever the row does, so caches keyed on it never go stale
+        'version': row,
+    }
+
+DEFAULT_PROPERTY_ROW = (DEFAULT_PROPERTY_ID, DEFAULT_PROPERTY_SLUG, HOTEL_NAME, HOTEL_LOGO, '{}', '')
+_properties = {'expires': 0.0, 'by_id': {}, 'by_slug': {}}
+
+def load_properties():
+    """Return {'by_id', 'by_slug'} for all properties, cached for PROPERTY_CACHE_TTL"""
+    cached = _properties
+    if cached['expires'] > time.monotonic():
+        return cached
+    try:
+        conn = storage.acquire()
+        try:
+            rows = conn.execute(
+                "SELECT id, slug, name, logo, alert_thresholds, alert_emails FROM properties ORDER BY id"
+            ).fetchall()
+        finally:
+            storage.release(conn)
+        expires = time.monotonic() + PROPERTY_CACHE_TTL
+    except storage.Error:
+        # Schema not migrated yet: serve the default property, ask again next time
+        rows, expires = [DEFAULT_PROPERTY_ROW], 0.0
+    properties = [_property_from_row(tuple(row)) for row in rows]
+    cached = {
+        'expires': expires,
+        'by_id': {prop['id']: prop for prop in properties},
+        'by_slug': {prop['slug']: prop for prop in properties},
+    }
+    _properties.update(cached)
+    return cached
+
+def get_property(slug=None):
+    """The property with this slug (None if unknown), or the default one"""
+    properties = load_properties()
+    if slug:
+        return properties['by_slug'].get(slug)
+    return get_property_by_id(DEFAULT_PROPERTY_ID)
+
+def get_property_by_id(property_id):
+    properties = load_properties()
+    prop = properties['by_id'].get(property_id)
+    if prop is None:
+        # Unknown or deleted property: keep working with the defaults
+        prop = _property_from_row(DEFAULT_PROPERTY_ROW)
+    return prop
+
+def current_property():
+    """The property this request is for, from ?property= (or the form on POST)
+
+    Unknown slugs are a 404. Outside a request this is the default property.
+    """
+    if not has_request_context():
+        return get_property()
+    if 'hotel_property' not in g:
+        slug = request.values.get('property', '').strip().lower()
+        prop = get_property(slug) if slug else get_property()
+        if prop is None:
+            abort(404)
+        g.hotel_property = prop
+    return g.hotel_property
+
+def clean_location(value):
+    """Room/table label from the QR URL, trimmed to LOCATION_MAX_LENGTH"""
+    return (value or '').strip()[:LOCATION_MAX_LENGTH]
+
+@app.cli.command("add-property")
+@click.argument("slug")
+@click.argument("name")
+@click.option("--logo", default="", help="Logo filename in static/ (default: HOTEL_LOGO)")
+@click.option("--email", "emails", multiple=True, help="Alert recipient; repeat for several")
+@click.option("--threshold", "thresholds", multiple=True, help="Override, e.g. --threshold washroom=3")
+def add_property_command(slug, name, logo, emails, thresholds):
+    """Create or update the property SLUG named NAME."""
+    if not PROPERTY_SLUG_PATTERN.match(slug):
+        raise click.BadParameter("use lowercase letters, digits and dashes", param_hint="SLUG")
+    overrides = {}
+    for item in thresholds:
+        category, _, value = item.partition('=')
+        if category not in ALERT_THRESHOLDS:
+            raise click.BadParameter(f"unknown category {category!r}", param_hint="--threshold")
+        overrides[category] = float(value)
+    migrate_db()
+    conn = storage.connect()
+    try:
+        conn.execute("""
+            INSERT INTO properties (slug, name, logo, alert_thresholds, alert_emails)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (slug) DO UPDATE SET
+                name = excluded.name, logo = excluded.logo,
+                alert_thresholds = excluded.alert_thresholds, alert_emails = excluded.alert_emails
+        """, (slug, name, logo, json.dumps(overrides), ','.join(emails)))
+        conn.commit()
+    finally:
+        conn.close()
+    query = '' if slug == DEFAULT_PROPERTY_SLUG else f'?property={slug}'
+    click.echo(f"✅ Property {slug!r} saved. Feedback form: {BASE_URL}/review{query}")
+
+INSERT_ALERT_SQL = prepared_statement("""
+    INSERT INTO alerts (feedback_id, category, rating, threshold, created_at, property_id)
+    SELECT ?, ?, ?, ?, created_at, property_id FROM reviews WHERE id = ?
+""")
+
+# ------------------- DATABASE SETUP -------------------
+# Any review with a category rating at or below this value counts as a
+# low-rating row; the partial index below only covers those rows.
+LOW_RATING_CUTOFF = 2
+RATING_CATEGORIES = ['food_quality', 'seating_arrangement', 'parking', 'washroom', 'hotel_service']
+
+def low_rating_condition(row_prefix=''):
+    """SQL condition matching reviews with any rating <= LOW_RATING_CUTOFF"""
+    terms = [f"{row_prefix}{category} <= {LOW_RATING_CUTOFF}" for category in RATING_CATEGORIES]
+    return f"({' OR '.join(terms)})"
+
+LOW_RATING_CONDITION = low_rating_condition()
+
+# Ratings are 1-5 stars; daily_stats only has histogram buckets for those
+RATING_MIN, RATING_MAX = 1, 5
+
+def rating_range_condition(row_prefix=''):
+    """SQL condition that is false when any rating is outside 1-5"""
+    terms = [f"{row_prefix}{category} BETWEEN {RATING_MIN} AND {RATING_MAX}" for category in RATING_CATEGORIES]
+    return f"({' AND '.join(terms)})"
+
+RATING_RANGE_CONDITION = rating_range_condition()
+
+def parse_rating(value):
+    """A submitted star rating as an int; ValueError unless it is 1-5"""
+    rating = int(value)
+    if not RATING_MIN <= rating <= RATING_MAX:
+        raise ValueError(f"Ratings must be between {RATING_MIN} and {RATING_MAX}, got {rating}")
+    return rating
+
+def _migration_create_reviews(cur):
+    """Create the reviews table, adding comment columns missing from old schemas"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS reviews(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            food_quality INTEGER,
+            food_quality_comments TEXT,
+            seating_arrangement INTEGER,
+            seating_arrangement_comments TEXT,
+            parking INTEGER,
+            parking_comments TEXT,
+            washroom INTEGER,
+            washroom_comments TEXT,
+            hotel_service INTEGER,
+            hotel_service_comments TEXT,
+            general_comments TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("PRAGMA table_info(reviews)")
+    column_names = [col[1] for col in cur.fetchall()]
+    for column in ['food_quality_comments', 'seating_arrangement_comments',
+                   'parking_comments', 'washroom_comments', 'hotel_service_comments',
+                   'general_comments']:
+        if column not in column_names:
+            cur.execute(f"ALTER TABLE reviews ADD COLUMN {column} TEXT")
+
+def _migration_review_indexes(cur):
+    """Index created_at for time windows, keyset pages and low-rating scans"""
+    # id is the rowid, which SQLite appends to every index entry, so this
+    # index is already ordered by (created_at, id) and serves keyset seeks.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_created_at ON reviews(created_at)")
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reviews_low_rating
+        ON reviews(created_at) WHERE {LOW_RATING_CONDITION}
+    """)
+
+# ------------------- DAILY STATS ROLLUP -------------------
+# Per day and location: review count, rating sums, a 1-5 histogram per
+# category and the number of low-rating reviews. Dashboard aggregates read
+# this table, so they cost O(days) instead of O(reviews).
+DAILY_STATS_COLUMNS = (
+    ['review_count']
+    + [f'{category}_sum' for category in RATING_CATEGORIES]
+    + [f'{category}_{rating}' for category in RATING_CATEGORIES for rating in range(1, 6)]
+    + ['low_rating_count']
+)
+
+def _daily_stats_values(row_prefix):
+    """SQL expressions for one review's contribution to each rollup column"""
+    values = ['1']
+    values += [f'{row_prefix}{category}' for category in RATING_CATEGORIES]
+    values += [f'CASE WHEN {row_prefix}{category} = {rating} THEN 1 ELSE 0 END'
+               for category in RATING_CATEGORIES for rating in range(1, 6)]
+    values.append(f'CASE WHEN {low_rating_condition(row_prefix)} THEN 1 ELSE 0 END')
+    return values
+
+def _migration_daily_stats(cur):
+    """Create daily_stats, keep it current with a trigger and backfill it"""
+    columns = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in DAILY_STATS_COLUMNS)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_stats(
+            day TEXT NOT NULL,
+            location TEXT NOT NULL DEFAULT '',
+{columns},
+            PRIMARY KEY (day, location)
+        )
+    """)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in DAILY_STATS_COLUMNS)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reviews_daily_stats_insert AFTER INSERT ON reviews
+        BEGIN
+            INSERT INTO daily_stats (day, location, {', '.join(DAILY_STATS_COLUMNS)})
+            VALUES (date(NEW.created_at), '', {', '.join(_daily_stats_values('NEW.'))})
+            ON CONFLICT(day, location) DO UPDATE SET {updates};
+        END
+    """)
+    _backfill_daily_stats_v3(cur)
+
+def _migration_alerts(cur):
+    """Create the alerts table and evaluate existing reviews into it"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS alerts(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            feedback_id INTEGER NOT NULL REFERENCES reviews(id),
+            category TEXT NOT NULL,
+            rating NUMERIC NOT NULL,
+            threshold NUMERIC NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            acknowledged INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_feedback_id ON alerts(feedback_id)")
+    _backfill_alerts(cur)
+
+def _backfill_alerts(cur):
+    """Evaluate every stored review against the thresholds into alerts"""
+    cur.execute("SELECT id, food_quality, seating_arrangement, parking, washroom, hotel_service FROM reviews")
+    for row in cur.fetchall():
+        ratings = dict(zip(RATING_CATEGORIES, row[1:]))
+        if any(rating is None for rating in ratings.values()):
+            continue
+        ratings['overall'] = sum(ratings.values()) / len(RATING_CATEGORIES)
+        alerts = check_alert_thresholds(ratings)
+        if alerts:
+            # Schema as of migration 4: alerts has no property_id yet
+            cur.executemany("""
+                INSERT INTO alerts (feedback_id, category, rating, threshold, created_at)
+                VALUES (?, ?, ?, ?, (SELECT created_at FROM reviews WHERE id = ?))
+            """, [(row[0], alert['key'], alert['rating'], alert['threshold'], row[0]) for alert in alerts])
+
+REVIEW_COMMENT_COLUMNS = [f'{category}_comments' for category in RATING_CATEGORIES] + ['general_comments']
+
+def _migration_comments_fts(cur):
+    """Full-text index over the comment columns, kept in sync by triggers"""
+    columns = ', '.join(REVIEW_COMMENT_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in REVIEW_COMMENT_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in REVIEW_COMMENT_COLUMNS)
+    cur.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+            {columns}, content='reviews', content_rowid='id'
+        )
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_insert AFTER INSERT ON reviews BEGIN
+            INSERT INTO reviews_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_delete AFTER DELETE ON reviews BEGIN
+            INSERT INTO reviews_fts(reviews_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_update AFTER UPDATE ON reviews BEGIN
+            INSERT INTO reviews_fts(reviews_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO reviews_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    cur.execute("INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')")
+
+def rebuild_daily_stats(cur):
+    """Recompute daily_stats from scratch out of the reviews table"""
+    sums = ', '.join(f'SUM({value})' for value in _daily_stats_values(''))
+    cur.execute("DELETE FROM daily_stats")
+    cur.execute(f"""
+        INSERT INTO daily_stats (property_id, day, location, {', '.join(DAILY_STATS_COLUMNS)})
+        SELECT property_id, date(created_at), location, {sums}
+        FROM reviews
+        GROUP BY property_id, date(created_at), location
+    """)
+
+def _backfill_daily_stats_v3(cur):
+    """rebuild_daily_stats() as of migration 3, before reviews had property_id"""
+    sums = ', '.join(f'SUM({value})' for value in _daily_stats_values(''))
+    cur.execute("DELETE FROM daily_stats")
+    cur.execute(f"""
+        INSERT INTO daily_stats (day, location, {', '.join(DAILY_STATS_COLUMNS)})
+        SELECT date(created_at), '', {sums}
+        FROM reviews
+        GROUP BY date(created_at)
+    """)
+
+def _migration_idempotency_keys(cur):
+    """One row per submission token; NULL (no token) never conflicts"""
+    cur.execute("PRAGMA table_info(reviews)")
+    if 'idempotency_key' not in [col[1] for col in cur.fetchall()]:
+        cur.execute("ALTER TABLE reviews ADD COLUMN idempotency_key TEXT")
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_idempotency_key
+        ON reviews(idempotency_key)
+    """)
+
+PROPERTIES_TABLE_COLUMNS = """
+            slug TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            logo TEXT NOT NULL DEFAULT '',
+            alert_thresholds TEXT NOT NULL DEFAULT '{}',
+            alert_emails TEXT NOT NULL DEFAULT ''
+"""
+
+def _insert_default_property(cur):
+    """The property every existing review belongs to; '' settings mean the defaults"""
+    cur.execute("""
+        INSERT INTO properties (id, slug, name)
+        VALUES (?, ?, ?)
+        ON CONFLICT (id) DO NOTHING
+    """, (DEFAULT_PROPERTY_ID, DEFAULT_PROPERTY_SLUG, HOTEL_NAME))
+
+def _daily_stats_by_property_sql(day_type, excluded_prefix):
+    """(CREATE TABLE, upsert) for daily_stats keyed by (property_id, day, location)"""
+    columns = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in DAILY_STATS_COLUMNS)
+    create = f"""
+        CREATE TABLE daily_stats(
+            property_id INTEGER NOT NULL,
+            day {day_type} NOT NULL,
+            location TEXT NOT NULL DEFAULT '',
+{columns},
+            PRIMARY KEY (property_id, day, location)
+        )
+    """
+    updates = ', '.join(f'{column} = {excluded_prefix}{column} + excluded.{column}' for column in DAILY_STATS_COLUMNS)
+    upsert = f"""
+            INSERT INTO daily_stats (property_id, day, location, {', '.join(DAILY_STATS_COLUMNS)})
+            VALUES (NEW.property_id, {{day}}, NEW.location, {', '.join(_daily_stats_values('NEW.'))})
+            ON CONFLICT (property_id, day, location) DO UPDATE SET {updates};
+    """
+    return create, upsert
+
+def _migration_properties(cur):
+    """Add properties, property_id/location on reviews and alerts, and make
+    indexes and the daily_stats rollup property-scoped"""
+    cur.execute(f"CREATE TABLE IF NOT EXISTS properties(id INTEGER PRIMARY KEY AUTOINCREMENT, {PROPERTIES_TABLE_COLUMNS})")
+    _insert_default_property(cur)
+    
+    cur.execute("PRAGMA table_info(reviews)")
+    review_columns = [col[1] for col in cur.fetchall()]
+    if 'property_id' not in review_columns:
+        cur.execute(f"ALTER TABLE reviews ADD COLUMN property_id INTEGER NOT NULL DEFAULT {DEFAULT_PROPERTY_ID} REFERENCES properties(id)")
+    if 'location' not in review_columns:
+        cur.execute("ALTER TABLE reviews ADD COLUMN location TEXT NOT NULL DEFAULT ''")
+    cur.execute("PRAGMA table_info(alerts)")
+    if 'property_id' not in [col[1] for col in cur.fetchall()]:
+        cur.execute(f"ALTER TABLE alerts ADD COLUMN property_id INTEGER NOT NULL DEFAULT {DEFAULT_PROPERTY_ID}")
+    
+    # Every dashboard query starts with property_id = ?, so it leads each index
+    cur.execute("DROP INDEX IF EXISTS idx_reviews_created_at")
+    cur.execute("DROP INDEX IF EXISTS idx_reviews_low_rating")
+    cur.execute("DROP INDEX IF EXISTS idx_alerts_created_at")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_property_created_at ON reviews(property_id, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_property_location ON reviews(property_id, location, created_at)")
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reviews_property_low_rating
+        ON reviews(property_id, created_at) WHERE {LOW_RATING_CONDITION}
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_property_created_at ON alerts(property_id, created_at)")
+    
+    # daily_stats gets property_id in its primary key: recreate and refill it
+    create, upsert = _daily_stats_by_property_sql('TEXT', '')
+    cur.execute("DROP TRIGGER IF EXISTS reviews_daily_stats_insert")
+    cur.execute("DROP TABLE IF EXISTS daily_stats")
+    cur.execute(create)
+    cur.execute(f"""
+        CREATE TRIGGER reviews_daily_stats_insert AFTER INSERT ON reviews
+        BEGIN
+{upsert.format(day='date(NEW.created_at)')}
+        END
+    """)
+    rebuild_daily_stats(cur)
+
+def _clamp_out_of_range_ratings(cur):
+    """Pull ratings stored before they were validated into 1-5 and refill
+    daily_stats, whose sums counted them but whose histograms could not"""
+    clamped = ', '.join(
+        f"{category} = CASE WHEN {category} < {RATING_MIN} THEN {RATING_MIN} "
+        f"WHEN {category} > {RATING_MAX} THEN {RATING_MAX} ELSE {category} END"
+        for category in RATING_CATEGORIES)
+    cur.execute(f"UPDATE reviews SET {clamped} WHERE NOT {RATING_RANGE_CONDITION}")
+    if cur.rowcount:
+        logger.warning("Clamped out-of-range ratings in %d reviews to %d-%d",
+                       cur.rowcount, RATING_MIN, RATING_MAX)
+        rebuild_daily_stats(cur)
+
+def _migration_rating_range(cur):
+    """Refuse ratings outside 1-5. SQLite can't add a CHECK constraint to an
+    existing table, so BEFORE triggers raise the same constraint error."""
+    _clamp_out_of_range_ratings(cur)
+    for event in ['INSERT', 'UPDATE']:
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS reviews_rating_range_{event.lower()} BEFORE {event} ON reviews
+            WHEN NOT {rating_range_condition('NEW.')}
+            BEGIN
+                SELECT RAISE(ABORT, 'CHECK constraint failed: ratings must be between {RATING_MIN} and {RATING_MAX}');
+            END
+        """)
+
+# Ordered list of (version, description, function). Never edit or reorder a
+# released migration - append a new one instead.
+MIGRATIONS = [
+    (1, "create reviews table", _migration_create_reviews),
+    (2, "add created_at, keyset and low-rating indexes", _migration_review_indexes),
+    (3, "add daily_stats rollup table", _migration_daily_stats),
+    (4, "add alerts table", _migration_alerts),
+    (5, "add full-text index over comments", _migration_comments_fts),
+    (6, "add idempotency keys to reviews", _migration_idempotency_keys),
+    (7, "add properties and per-property locations, indexes and rollups", _migration_properties),
+    (8, "keep ratings within 1-5", _migration_rating_range),
+]
+
+# ------------------- POSTGRESQL SCHEMA -------------------
+# Same versions as MIGRATIONS, written for PostgreSQL. created_at is a
+# TIMESTAMP(0) in UTC, which psycopg2 hands back as 'YYYY-MM-DD HH:MM:SS'
+# text exactly like SQLite's CURRENT_TIMESTAMP.
+POSTGRES_MIGRATION_LOCK_ID = 7324501  # Arbitrary pg_advisory_xact_lock key
+
+POSTGRES_COMMENTS_TSVECTOR = "to_tsvector('simple', {})".format(
+    " || ' ' || ".join(f"coalesce({column}, '')" for column in REVIEW_COMMENT_COLUMNS))
+
+def _pg_migration_create_reviews(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS reviews(
+            id SERIAL PRIMARY KEY,
+            food_quality INTEGER,
+            food_quality_comments TEXT,
+            seating_arrangement INTEGER,
+            seating_arrangement_comments TEXT,
+            parking INTEGER,
+            parking_comments TEXT,
+            washroom INTEGER,
+            washroom_comments TEXT,
+            hotel_service INTEGER,
+            hotel_service_comments TEXT,
+            general_comments TEXT,
+            created_at TIMESTAMP(0) NOT NULL DEFAULT date_trunc('second', CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+        )
+    """)
+
+def _pg_migration_review_indexes(cur):
+    # Unlike SQLite there is no implicit rowid in index entries, so id is
+    # part of the key to serve (created_at, id) keyset seeks directly
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_created_at ON reviews(created_at, id)")
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reviews_low_rating
+        ON reviews(created_at, id) WHERE {LOW_RATING_CONDITION}
+    """)
+
+def _pg_migration_daily_stats(cur):
+    columns = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in DAILY_STATS_COLUMNS)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_stats(
+            day DATE NOT NULL,
+            location TEXT NOT NULL DEFAULT '',
+{columns},
+            PRIMARY KEY (day, location)
+        )
+    """)
+    updates = ', '.join(f'{column} = daily_stats.{column} + excluded.{column}' for column in DAILY_STATS_COLUMNS)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION reviews_daily_stats_insert() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO daily_stats (day, location, {', '.join(DAILY_STATS_COLUMNS)})
+            VALUES (NEW.created_at::date, '', {', '.join(_daily_stats_values('NEW.'))})
+            ON CONFLICT (day, location) DO UPDATE SET {updates};
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS reviews_daily_stats_insert ON reviews")
+    cur.execute("""
+        CREATE TRIGGER reviews_daily_stats_insert AFTER INSERT ON reviews
+        FOR EACH ROW EXECUTE FUNCTION reviews_daily_stats_insert()
+    """)
+    _backfill_daily_stats_v3(cur)
+
+def _pg_migration_alerts(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS alerts(
+            id SERIAL PRIMARY KEY,
+            feedback_id INTEGER NOT NULL REFERENCES reviews(id),
+            category TEXT NOT NULL,
+            rating NUMERIC NOT NULL,
+            threshold NUMERIC NOT NULL,
+            created_at TIMESTAMP(0) NOT NULL,
+            acknowledged INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_feedback_id ON alerts(feedback_id)")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alerts_unacknowledged
+        ON alerts(created_at) WHERE acknowledged = 0
+    """)
+    _backfill_alerts(cur)
+
+def _pg_migration_comments_fts(cur):
+    # An expression index replaces the FTS5 table: nothing to keep in sync
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reviews_comments_fts
+        ON reviews USING GIN ({POSTGRES_COMMENTS_TSVECTOR})
+    """)
+
+def _pg_migration_idempotency_keys(cur):
+    cur.execute("ALTER TABLE reviews ADD COLUMN IF NOT EXISTS idempotency_key TEXT")
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_idempotency_key
+        ON reviews(idempotency_key)
+    """)
+
+def _pg_migration_properties(cur):
+    cur.execute(f"CREATE TABLE IF NOT EXISTS properties(id SERIAL PRIMARY KEY, {PROPERTIES_TABLE_COLUMNS})")
+    _insert_default_property(cur)
+    # The explicit id above did not advance the sequence
+    cur.execute("SELECT setval(pg_get_serial_sequence('properties', 'id'), (SELECT MAX(id) FROM properties))")
+    
+    cur.execute(f"ALTER TABLE reviews ADD COLUMN IF NOT EXISTS property_id INTEGER NOT NULL DEFAULT {DEFAULT_PROPERTY_ID} REFERENCES properties(id)")
+    cur.execute("ALTER TABLE reviews ADD COLUMN IF NOT EXISTS location TEXT NOT NULL DEFAULT ''")
+    cur.execute(f"ALTER TABLE alerts ADD COLUMN IF NOT EXISTS property_id INTEGER NOT NULL DEFAULT {DEFAULT_PROPERTY_ID}")
+    
+    cur.execute("DROP INDEX IF EXISTS idx_reviews_created_at")
+    cur.execute("DROP INDEX IF EXISTS idx_reviews_low_rating")
+    cur.execute("DROP INDEX IF EXISTS idx_alerts_created_at")
+    cur.execute("DROP INDEX IF EXISTS idx_alerts_unacknowledged")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_property_created_at ON reviews(property_id, created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_property_location ON reviews(property_id, location, created_at, id)")
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reviews_property_low_rating
+        ON reviews(property_id, created_at, id) WHERE {LOW_RATING_CONDITION}
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_property_created_at ON alerts(property_id, created_at, id)")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alerts_property_unacknowledged
+        ON alerts(property_id, created_at) WHERE acknowledged = 0
+    """)
+    
+    create, upsert = _daily_stats_by_property_sql('DATE', 'daily_stats.')
+    cur.execute("DROP TABLE IF EXISTS daily_stats")
+    cur.execute(create)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION reviews_daily_stats_insert() RETURNS trigger AS $$
+        BEGIN
+{upsert.format(day='NEW.created_at::date')}
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    rebuild_daily_stats(cur)
+
+def _pg_migration_rating_range(cur):
+    _clamp_out_of_range_ratings(cur)
+    cur.execute(f"ALTER TABLE reviews ADD CONSTRAINT reviews_rating_range CHECK {RATING_RANGE_CONDITION}")
+
+POSTGRES_MIGRATIONS = [
+    (1, "create reviews table", _pg_migration_create_reviews),
+    (2, "add created_at, keyset and low-rating indexes", _pg_migration_review_indexes),
+    (3, "add daily_stats rollup table", _pg_migration_daily_stats),
+    (4, "add alerts table", _pg_migration_alerts),
+    (5, "add full-text index over comments", _pg_migration_comments_fts),
+    (6, "add idempotency keys to reviews", _pg_migration_idempotency_keys),
+    (7, "add properties and per-property locations, indexes and rollups", _pg_migration_properties),
+    (8, "keep ratings within 1-5", _pg_migration_rating_range),
+]
+
+def migrate_db():
+    """Bring the configured database up to the latest schema version"""
+    return storage.migrate()
+
+def init_db():
+    """Create or upgrade the database schema without dropping data"""
+    version = migrate_db()
+    logger.info("Database schema is at version %d", version)
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Backfill the daily_stats rollup from all reviews."""
+    migrate_db()
+    conn = storage.connect()
+    try:
+        cur = conn.cursor()
+        rebuild_daily_stats(cur)
+        conn.commit()
+        days = cur.execute("SELECT COUNT(*) FROM daily_stats").fetchone()[0]
+    finally:
+        conn.close()
+    click.echo(f"✅ daily_stats rebuilt: {days} day/location rows")
+
+# ------------------- CHECK AND FIX DATABASE -------------------
+def check_and_fix_db():
+    """Check if database has correct schema, fix if needed"""
+    try:
+        init_db()
+    except storage.Error:
+        logger.exception("Database migration failed")
+        raise
+
+# ------------------- APP FACTORY -------------------
+# Importing app.py only defines things: no folders, database, sockets or
+# threads, so CLI commands and scripts start quickly. create_app() does the
+# one-off setup. gunicorn calls it once in the master (preload_app), so the
+# schema is migrated and the caches are warm before the workers fork:
+#
+#     gunicorn -c gunicorn.conf.py 'app:create_app()'
+WARM_TEMPLATES = ['review_form.html', 'thankyou.html', 'review_error.html', 'admin.html',
+                  'trends.html', 'home.html', 'generate_qr.html', 'qr_batch.html']
+_app_ready = False
+_app_ready_lock = threading.Lock()
+
+def warm_up():
+    """Compile the hot templates and pre-render every property's review form"""
+    for name in WARM_TEMPLATES:
+        app.jinja_env.get_template(name)
+    for prop in load_properties()['by_id'].values():
+        with app.test_request_context(f"/review{prop['query']}"):
+            review_form_variants(prop)
+
+def create_app():
+    """Create folders, migrate the database and warm caches once; return the app"""
+    global _app_ready
+    with _app_ready_lock:
+        if not _app_ready:
+            for folder in [QR_FOLDER, DB_FOLDER, STATIC_FOLDER]:
+                os.makedirs(folder, exist_ok=True)
+            # Compiled templates are cached on disk so new workers skip the
+            # Jinja parse step. With no directory given, Jinja uses a
+            # per-user temp folder it creates 0700 and refuses to use if
+            # another user owns it, so nobody else can plant bytecode there.
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+            check_and_fix_db()
+            warm_up()
+            # Forked workers open their own connections
+            storage.pool.close_all()
+            _app_ready = True
+    return app
+
+# ------------------- CSV EXPORT FUNCTION -------------------
+CSV_EXPORT_BATCH_SIZE = 500  # Rows fetched and flushed to the client per chunk
+
+def attachment_disposition(filename):
+    """Content-Disposition for a download named after a property.
+
+    The quoted filename= is an ASCII fallback; filename*= (RFC 5987) carries
+    the real name for names with accents or other non-ASCII characters.
+    """
+    fallback = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    fallback = re.sub(r'[^A-Za-z0-9._-]+', '_', fallback) or 'download'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def parse_export_date_range(args):
+    """Read optional ?start_date=/?end_date= (YYYY-MM-DD, inclusive) from args"""
+    start_date = args.get('start_date', '').strip()
+    end_date = args.get('end_date', '').strip()
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    if start and end and end <= start:
+        raise ValueError("End date must not be before start date")
+    return (start.strftime('%Y-%m-%d %H:%M:%S') if start else None,
+            end.strftime('%Y-%m-%d %H:%M:%S') if end else None)
+
+def split_created_at(created_at):
+    """Split a created_at timestamp into (date, time) strings for CSV output"""
+    if not created_at:
+        return '', ''
+    try:
+        date_obj = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+        return date_obj.strftime('%Y-%m-%d'), date_obj.strftime('%H:%M:%S')
+    except:
+        date_str = created_at[:10] if len(created_at) > 10 else created_at
+        time_str = created_at[11:19] if len(created_at) > 19 else ''
+        return date_str, time_str
+
+def generate_reviews_csv(start=None, end=None, property_id=DEFAULT_PROPERTY_ID):
+    """Yield one property's reviews as CSV text, one fetchmany() batch at a time"""
+    output = StringIO()
+    writer = csv.writer(output)
+    
+    def flush():
+        data = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return data
+    
+    # Write header
+    writer.writerow([
+        'ID', 'Date', 'Time',
+        'Food Quality', 'Food Comments',
+        'Seating Arrangement', 'Seating Comments',
+        'Parking Facility', 'Parking Comments',
+        'Washroom Cleanliness', 'Washroom Comments',
+        'Hotel Service', 'Service Comments',
+        'General Comments',
+        'Overall Average',
+        'Location'
+    ])
+    yield flush()
+    
+    conditions, params = ["property_id = ?"], [property_id]
+    if start:
+        conditions.append("created_at >= ?")
+        params.append(start)
+    if end:
+        conditions.append("created_at < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    cur = storage.streaming_cursor(get_db())
+    cur.execute(f"SELECT * FROM reviews {where} ORDER BY created_at DESC", params)
+    
+    while True:
+        reviews = cur.fetchmany(CSV_EXPORT_BATCH_SIZE)
+        if not reviews:
+            break
+        
+        # Write data rows
+        for review in reviews:
+            # Calculate overall average
+            ratings = [review[1], review[3], review[5], review[7], review[9]]
+            overall_avg = sum(ratings) / len(ratings) if ratings else 0
+            
+            # Format date and time
+            date_str, time_str = split_created_at(review[12])
+            
+            writer.writerow([
+                review[0],  # ID
+                date_str,   # Date
+                time_str,   # Time
+                review[1],  # Food Quality
+                review[2] or '',  # Food Comments
+                review[3],  # Seating Arrangement
+                review[4] or '',  # Seating Comments
+                review[5],  # Parking Facility
+                review[6] or '',  # Parking Comments
+                review[7],  # Washroom Cleanliness
+                review[8] or '',  # Washroom Comments
+                review[9],  # Hotel Service
+                review[10] or '',  # Service Comments
+                review[11] or '',  # General Comments
+                f"{overall_avg:.2f}",  # Overall Average
+                review[15]  # Location
+            ])
+        yield flush()
+    cur.close()
+
+@app.route("/admin/export/csv")
+@admin_required
+@rate_limited('export')
+def export_csv():
+    """Export feedback data to CSV, streamed in batches"""
+    try:
+        start, end = parse_export_date_range(request.args)
+        prop = current_property()
+        
+        # Create response with CSV file
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{prop['name'].replace(' ', '_')}_Feedback_{timestamp}.csv"
+        
+        return Response(
+            stream_with_context(generate_reviews_csv(start, end, prop['id'])),
+            mimetype="text/csv",
+            headers={
+                "Content-Disposition": attachment_disposition(filename),
+                "Content-Type": "text/csv; charset=utf-8"
+            }
+        )
+        
+    except Exception as e:
+        logger.exception("Error exporting reviews")
+        return f"""
+        <html>
+        <head><title>Export Error</title></head>
+        <body>
+            <h2>CSV Export Error</h2>
+            <p>Error: {escape(str(e))}</p>
+            <a href="/admin">Back to Admin</a>
+        </body>
+        </html>
+        """
+
+@app.route("/admin/export/recent_alerts_csv")
+@admin_required
+@rate_limited('export')
+def export_recent_alerts_csv():
+    """Export recent alerts to CSV"""
+    try:
+        prop = current_property()
+        alerts_data = get_recent_alerts(hours=168, property_id=prop['id'])  # Last 7 days
+        
+        # Create CSV in memory
+        output = StringIO()
+        writer = csv.writer(output)
+        
+        # Write header
+        writer.writerow([
+            'Feedback ID', 'Date', 'Time',
+            'Alert Category', 'Rating', 'Threshold',
+            'Comments', 'Overall Rating'
+        ])
+        
         # Write data rows
         for alert_group in alerts_data:
             feedback_id = alert_group['feedback_id']
             date_time = alert_group['date']
             
-            if date_time:
-                try:
-                    date_obj = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
-                    date_str = date_obj.strftime('%Y-%m-%d')
-                    time_str = date_obj.strftime('%H:%M:%S')
-                except:
-                    date_str = date_time[:10] if len(date_time) > 10 else date_time
-                    time_str = date_time[11:19] if len(date_time) > 19 else ''
-            else:
-                date_str = ''
-                time_str = ''
+            date_str, time_str = split_created_at(date_time)
             
             for alert in alert_group['alerts']:
                 writer.writerow([
@@ -520,29 +2419,54 @@ def export_recent_alerts_csv():
         
         # Create response with CSV file
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{HOTEL_NAME.replace(' ', '_')}_Alerts_{timestamp}.csv"
+        filename = f"{prop['name'].replace(' ', '_')}_Alerts_{timestamp}.csv"
         
         return Response(
             output.getvalue(),
             mimetype="text/csv",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Disposition": attachment_disposition(filename),
                 "Content-Type": "text/csv; charset=utf-8"
             }
         )
         
     except Exception as e:
+        logger.exception("Error exporting recent alerts")
         return f"""
         <html>
         <head><title>Export Error</title></head>
         <body>
             <h2>Alerts CSV Export Error</h2>
-            <p>Error: {str(e)}</p>
+            <p>Error: {escape(str(e))}</p>
             <a href="/admin">Back to Admin</a>
         </body>
         </html>
         """
 
+# ------------------- ACKNOWLEDGE ALERTS -------------------
+@app.route("/admin/alerts/acknowledge", methods=["POST"])
+@admin_required
+@csrf_protected
+def acknowledge_alerts():
+    """Mark alerts as acknowledged, by alert id or for a whole feedback"""
+    prop = current_property()
+    try:
+        alert_id = int(request.form.get('alert_id') or 0)
+        feedback_id = int(request.form.get('feedback_id') or 0)
+    except ValueError:
+        abort(400)
+    conn = get_db()
+    if alert_id:
+        conn.execute("UPDATE alerts SET acknowledged = 1 WHERE id = ? AND property_id = ?",
+                     (alert_id, prop['id']))
+    elif feedback_id:
+        conn.execute("UPDATE alerts SET acknowledged = 1 WHERE feedback_id = ? AND property_id = ?",
+                     (feedback_id, prop['id']))
+    else:
+        abort(400)
+    conn.commit()
+    return redirect(url_for('admin') + prop['query'])
+
 # ------------------- TEST EMAIL ROUTE -------------------
 @app.route("/test_email")
 @admin_required
@@ -556,7 +2480,7 @@ def test_email():
         'comments': 'This is a test alert to check email functionality'
     }]
     
-    result = send_alert_email(test_alerts, 999)
+    result = send_alert_email(test_alerts, 999, current_property())
     
     return f"""
     <html>
@@ -576,7 +2500,7 @@ def test_email():
                 </h3>
                 <p class="mt-3">Check the terminal for detailed debug information.</p>
                 <div class="mt-4">
-                    <a href="/admin" class="btn btn-primary">← Back to Admin Dashboard</a>
+                    <a href="/admin{current_property()['query']}" class="btn btn-primary">← Back to Admin Dashboard</a>
                 </div>
             </div>
         </div>
@@ -587,1908 +2511,1386 @@ def test_email():
 # ------------------- HOME ROUTE -------------------
 @app.route("/")
 def home():
-    return f"""
-    <html>
-    <head>
-        <title>{HOTEL_NAME} - Food Review</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-        <style>
-            .hotel-logo {{
-                width: 200px;
-                height: 160px;
-                object-fit: cover;
-                border-radius: 10px;
-                border: 3px solid #0d6efd;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                margin: 15px auto;
-                display: block;
-            }}
-            .hotel-header {{
-                background: linear-gradient(135deg, #0d6efd 0%, #198754 100%);
-                color: white;
-                padding: 1.5rem 0;
-                margin-bottom: 2rem;
-                border-radius: 15px;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            }}
-            @media (max-width: 768px) {{
-                .hotel-logo {{
-                    width: 160px;
-                    height: 130px;
-                }}
-            }}
-        </style>
-    </head>
-    <body class="container mt-4">
-        <div class="hotel-header text-center">
-            <h2>🏨 {HOTEL_NAME}</h2>
-            <p class="lead mb-0">Hotel Feedback System</p>
-            <div class="mt-3">
-                <img src="/static/{HOTEL_LOGO}" alt="{HOTEL_NAME} Logo" class="hotel-logo">
-            </div>
-        </div>
-        
-        <div class="card">
-            <div class="card-body">
-                <h5>Welcome!</h5>
-                <p>Scan the QR code to submit your hotel feedback.</p>
-                
-                <div class="alert alert-info">
-                    <strong>🌍 Global QR Code URL:</strong> {BASE_URL}
-                    <br><strong>💻 Local Testing:</strong> http://{LOCAL_IP}:5000
-                    <br><small>Admin Login: admin / harshal@2002</small>
-                </div>
-                <div class="mt-4">
-                    <a href="/generate_qr" class="btn btn-success me-2">📱 Generate QR Code</a>
-                    <a href="/admin" class="btn btn-secondary me-2">👨‍💼 Admin Dashboard</a>
-                    <a href="/review" class="btn btn-primary">📝 Test Feedback Form</a>
-                </div>
-            </div>
-            <div class="card-footer text-center">
-                <small>{HOTEL_NAME} &copy; 2024</small>
-            </div>
-        </div>
-    </body>
-    </html>
+    return cached_fragment('home.html')
+
+# ------------------- BLOB STORAGE -------------------
+# QR images (qr_codes/) and the hotel logo (static/) are read and written
+# through a blob store. The default is the local folders; BLOB_STORE=s3 keeps
+# them in an S3-compatible bucket (AWS S3, MinIO, R2, ...) so any number of
+# instances serve the same files without shared disk.
+BLOB_STORE = os.environ.get('BLOB_STORE', 'local').lower()
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None  # e.g. http://minio:9000
+S3_PREFIX = os.environ.get('S3_PREFIX', 'hotel-feedback/')
+BLOB_NAMESPACES = {'qr_codes': QR_FOLDER, 'static': STATIC_FOLDER}
+
+class LocalBlobStore:
+    """Blobs as files in the local qr_codes/ and static/ folders"""
+    name = 'local'
+
+    def __init__(self, folders):
+        self.folders = folders
+
+    def _path(self, namespace, key):
+        return safe_join(self.folders[namespace], key)
+
+    def get(self, namespace, key):
+        """Return (data, version) or None; version changes with the content"""
+        path = self._path(namespace, key)
+        if path is None or not os.path.isfile(path):
+            return None
+        version = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            return f.read(), version
+
+    def version(self, namespace, key):
+        path = self._path(namespace, key)
+        if path is None or not os.path.isfile(path):
+            return None
+        return os.path.getmtime(path)
+
+    def put(self, namespace, key, data, content_type=None):
+        path = self._path(namespace, key)
+        if path is None:
+            raise ValueError(f"Invalid blob name: {key}")
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def check(self):
+        """Raise if the store cannot be written to"""
+        for folder in self.folders.values():
+            if not os.access(folder, os.W_OK):
+                raise OSError(f"{folder} is not writable")
+
+class S3BlobStore:
+    """Blobs as objects under S3_PREFIX in an S3-compatible bucket"""
+    name = 's3'
+
+    def __init__(self, bucket, endpoint_url=None, prefix=''):
+        global boto3, BotoConfig, ClientError
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("BLOB_STORE=s3 but boto3 is not installed")
+        if not bucket:
+            raise RuntimeError("BLOB_STORE=s3 needs S3_BUCKET")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.prefix = prefix
+        self._client = None
+        self._pid = None
+
+    @property
+    def client(self):
+        # boto3 clients are not fork-safe; make one per worker process
+        if self._pid != os.getpid():
+            self._client = boto3.client('s3', endpoint_url=self.endpoint_url, config=BotoConfig(
+                connect_timeout=5, read_timeout=15, retries={'max_attempts': 2}))
+            self._pid = os.getpid()
+        return self._client
+
+    def _key(self, namespace, key):
+        path = safe_join(namespace, key)
+        return None if path is None else self.prefix + path
+
+    def get(self, namespace, key):
+        """Return (data, version) or None; version is the object's ETag"""
+        object_key = self._key(namespace, key)
+        if object_key is None:
+            return None
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=object_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        return obj['Body'].read(), obj['ETag']
+
+    def version(self, namespace, key):
+        object_key = self._key(namespace, key)
+        if object_key is None:
+            return None
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=object_key)['ETag']
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    def put(self, namespace, key, data, content_type=None):
+        object_key = self._key(namespace, key)
+        if object_key is None:
+            raise ValueError(f"Invalid blob name: {key}")
+        self.client.put_object(Bucket=self.bucket, Key=object_key, Body=data,
+                               ContentType=content_type or 'application/octet-stream')
+
+    def check(self):
+        """Raise if the bucket is unreachable"""
+        self.client.head_bucket(Bucket=self.bucket)
+
+def create_blob_store():
+    """S3 when BLOB_STORE=s3, otherwise the local folders"""
+    if BLOB_STORE == 's3':
+        return S3BlobStore(S3_BUCKET, S3_ENDPOINT_URL, S3_PREFIX)
+    return LocalBlobStore(BLOB_NAMESPACES)
+
+blob_store = create_blob_store()
+
+_blob_cache = {}  # (namespace, key) -> (data, etag, version)
+_blob_cache_lock = threading.Lock()
+
+def _content_etag(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load_blob(namespace, key, immutable=False):
+    """Return (data, etag) for a blob, or None if it does not exist.
+
+    Blobs are kept in memory per worker. Immutable (content-addressed) ones
+    are never re-read; others are revalidated against the store's version
+    so a replaced file is picked up.
     """
+    entry = _blob_cache.get((namespace, key))
+    if entry and immutable:
+        return entry[0], entry[1]
+    if entry and blob_store.version(namespace, key) == entry[2]:
+        return entry[0], entry[1]
+    blob = blob_store.get(namespace, key)
+    if blob is None:
+        _blob_cache.pop((namespace, key), None)
+        return None
+    data, version = blob
+    etag = _content_etag(data)
+    with _blob_cache_lock:
+        _blob_cache[(namespace, key)] = (data, etag, version)
+    return data, etag
+
+@app.cli.command("sync-blobs")
+def sync_blobs_command():
+    """Upload the local static/ and qr_codes/ files to the blob store."""
+    if blob_store.name == 'local':
+        click.echo("Blob store is local - nothing to upload")
+        return
+    uploaded = 0
+    for namespace, folder in BLOB_NAMESPACES.items():
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path) or name.endswith('.tmp'):
+                continue
+            with open(path, 'rb') as f:
+                blob_store.put(namespace, name, f.read(), mimetypes.guess_type(name)[0])
+            uploaded += 1
+    click.echo(f"✅ {uploaded} files uploaded to the {blob_store.name} blob store")
+
+# ------------------- QR CODE CACHE -------------------
+QR_RENDER_OPTIONS = {'box_size': 10, 'border': 4, 'error_correction': 'M'}
+QR_CACHE_MAX_AGE = 365 * 24 * 3600  # Content-addressed images never change
+QR_FILE_MAX_AGE = 3600              # Hand-placed files like 101.png may be replaced
+
+def qr_filename(url, options=None):
+    """Content-addressed filename for a QR image of url with render options"""
+    options = options or QR_RENDER_OPTIONS
+    key = json.dumps([url, sorted(options.items())]).encode('utf-8')
+    return f"qr_{hashlib.sha256(key).hexdigest()[:20]}.png"
+
+def render_qr_png(url, options=None):
+    """Render a QR code for url and return PNG bytes"""
+    import qrcode  # Pulls in PIL; only QR pages and batch jobs need it
+    options = options or QR_RENDER_OPTIONS
+    error_levels = {
+        'L': qrcode.constants.ERROR_CORRECT_L,
+        'M': qrcode.constants.ERROR_CORRECT_M,
+        'Q': qrcode.constants.ERROR_CORRECT_Q,
+        'H': qrcode.constants.ERROR_CORRECT_H,
+    }
+    qr = qrcode.QRCode(
+        box_size=options['box_size'],
+        border=options['border'],
+        error_correction=error_levels[options['error_correction']],
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def get_qr_code(url, options=None):
+    """Return the filename of the QR image for url, rendering it only if no
+    instance has stored it yet"""
+    filename = qr_filename(url, options)
+    if ('qr_codes', filename) in _blob_cache:
+        return filename
+    with _blob_cache_lock:
+        if ('qr_codes', filename) in _blob_cache:
+            return filename
+        blob = blob_store.get('qr_codes', filename)
+        if blob is None:
+            png = render_qr_png(url, options)
+            blob_store.put('qr_codes', filename, png, 'image/png')
+            version = None
+        else:
+            png, version = blob
+        _blob_cache[('qr_codes', filename)] = (png, _content_etag(png), version)
+    return filename
+
+def load_qr_file(filename):
+    """Return (png bytes, etag, content_addressed) for a QR file, or None"""
+    content_addressed = filename.startswith('qr_')
+    entry = load_blob('qr_codes', filename, immutable=content_addressed)
+    if entry is None:
+        return None
+    return entry[0], entry[1], content_addressed
 
 # ------------------- GENERATE SINGLE QR -------------------
 @app.route("/generate_qr")
 def generate_qr():
-    url = f"{BASE_URL}/review"  # Use BASE_URL instead of hardcoded URL
-    img = qrcode.make(url)
-    filepath = os.path.join(QR_FOLDER, "hotel_review_qr.png")
-    img.save(filepath)
+    url = f"{BASE_URL}/review{current_property()['query']}"  # Use BASE_URL instead of hardcoded URL
+    qr_file = get_qr_code(url)  # Rendered once, then served from cache
     
-    return f"""
-    <html>
-    <head>
-        <title>{HOTEL_NAME} - QR Code</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-        <style>
-            .hotel-logo {{
-                width: 200px;
-                height: 160px;
-                object-fit: cover;
-                border-radius: 10px;
-                border: 3px solid #198754;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                margin: 15px auto;
-                display: block;
-            }}
-            .hotel-header {{
-                background: linear-gradient(135deg, #198754 0%, #0d6efd 100%);
-                color: white;
-                padding: 1.5rem 0;
-                margin-bottom: 2rem;
-                border-radius: 15px;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            }}
-            .qr-container {{
-                background: white;
-                padding: 20px;
-                border-radius: 10px;
-                display: inline-block;
-                box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            }}
-            @media (max-width: 768px) {{
-                .hotel-logo {{
-                    width: 160px;
-                    height: 130px;
-                }}
-            }}
-        </style>
-    </head>
-    <body class="container mt-4">
-        <div class="hotel-header text-center">
-            <h3>🏨 {HOTEL_NAME}</h3>
-            <p class="lead mb-0">QR Code for Hotel Feedback</p>
-            <div class="mt-2">
-                <img src="/static/{HOTEL_LOGO}" alt="{HOTEL_NAME} Logo" class="hotel-logo">
-            </div>
-        </div>
-        
-        <div class="card">
-            <div class="card-body text-center">
-                <div class="alert alert-success">
-                    <h5>✅ Ready for Mobile Scanning!</h5>
-                    <p><strong>QR Points to:</strong> {url}</p>
-                    <p><small>Admin Login: admin / harshal@2002</small></p>
-                </div>
-                
-                <div class="qr-container mb-3">
-                    <img src="/qr_codes/hotel_review_qr.png" width="300">
-                </div>
-                
-                <div class="mt-4">
-                    <a href="/qr_codes/hotel_review_qr.png" download="hotel_feedback_qr.png" 
-                       class="btn btn-success btn-lg">
-                        📥 Download QR Code
-                    </a>
-                    <a href="/review" class="btn btn-primary btn-lg ms-2">📝 Test Feedback Form</a>
-                    <a href="/admin" class="btn btn-secondary btn-lg ms-2">👨‍💼 Admin</a>
-                </div>
-            </div>
-            <div class="card-footer text-center">
-                <small>{HOTEL_NAME} &copy; 2024</small>
-            </div>
-        </div>
-    </body>
-    </html>
+    return cached_fragment('generate_qr.html', url=url, qr_file=qr_file)
+
+# ------------------- BULK ROOM / TABLE QR CODES -------------------
+QR_BATCH_MAX = 2000                          # Max codes per batch request
+QR_BATCH_WORKERS = os.cpu_count() or 1       # Render processes per batch
+QR_SHEET_COLUMNS, QR_SHEET_ROWS = 3, 4       # Codes per PDF page
+QR_SHEET_PAGE_SIZE = (1240, 1754)            # A4 at QR_SHEET_DPI
+QR_SHEET_DPI = 150
+
+def location_review_url(location, property_slug=None):
+    """Feedback URL carrying the property (unless default) and room/table"""
+    params = {'property': property_slug} if property_slug else {}
+    params['location'] = location
+    return f"{BASE_URL}/review?{urlencode(params)}"
+
+def _render_location_qr(location, property_slug=None):
+    """Process-pool worker: render one location's QR code"""
+    return location, render_qr_png(location_review_url(location, property_slug))
+
+def parse_location_range(start, end, prefix=''):
+    """Turn a numeric range like 101-450 into location labels"""
+    start, end = int(start), int(end)
+    if end < start:
+        raise ValueError("End of range must not be before start")
+    if end - start + 1 > QR_BATCH_MAX:
+        raise ValueError(f"At most {QR_BATCH_MAX} codes can be generated at once")
+    return [f"{prefix}{number}" for number in range(start, end + 1)]
+
+def render_location_qrs(locations, prop=None):
+    """Yield (location, png bytes) in order, rendered across a process pool"""
+    from concurrent.futures import ProcessPoolExecutor
+    prop = prop or get_property()
+    render = partial(_render_location_qr, property_slug=prop['slug'] if prop['query'] else None)
+    workers = min(QR_BATCH_WORKERS, len(locations)) or 1
+    chunksize = max(1, len(locations) // (workers * 4))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for location, png in pool.map(render, locations, chunksize=chunksize):
+            yield location, png
+    finally:
+        # On an error or a client that disconnected (the generator is
+        # closed), drop the renders still queued instead of waiting for them
+        pool.shutdown(wait=False, cancel_futures=True)
+
+class _ZipStream:
+    """Write-only file object that hands zip output back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def generate_qr_zip(locations, prop=None):
+    """Yield a ZIP archive of per-location PNGs as it is being built"""
+    stream = _ZipStream()
+    # PNGs are already compressed, so store them as-is
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for location, png in render_location_qrs(locations, prop):
+            archive.writestr(f"{location}.png", png)
+            yield stream.pop()
+    yield stream.pop()
+
+def _pdf_object(number, body, stream=None):
+    """One PDF indirect object, with an optional binary stream"""
+    if stream is None:
+        return f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    head = f"{number} 0 obj\n<< {body} /Length {len(stream)} >>\nstream\n".encode('latin-1')
+    return head + stream + b"\nendstream\nendobj\n"
+
+def generate_qr_sheet_pdf(locations, prop=None):
+    """Yield a PDF of labelled QR codes on A4 pages, one page at a time.
+
+    Pages are drawn as 1-bit images and written out as soon as they are
+    full, so memory stays at one page (about 270 KB) however many codes are
+    requested. PIL's own PDF writer would hold every page until the end.
+    """
+    from PIL import Image, ImageDraw
+    prop = prop or get_property()
+    
+    page_width, page_height = QR_SHEET_PAGE_SIZE
+    cell_width = page_width // QR_SHEET_COLUMNS
+    cell_height = page_height // QR_SHEET_ROWS
+    qr_size = min(cell_width, cell_height) - 80
+    per_page = QR_SHEET_COLUMNS * QR_SHEET_ROWS
+    # Pixels at QR_SHEET_DPI -> PDF points (1/72 inch)
+    width_pt, height_pt = page_width * 72 / QR_SHEET_DPI, page_height * 72 / QR_SHEET_DPI
+    
+    offsets = {}  # object number -> byte offset, for the xref table
+    position = 0
+    page_objects = []
+    
+    def emit(number, body, stream=None):
+        nonlocal position
+        data = _pdf_object(number, body, stream)
+        offsets[number] = position
+        position += len(data)
+        return data
+    
+    def finish_page(page):
+        # Objects 1 and 2 are the catalog and page tree; each page takes three
+        image, contents, page_object = (3 + 3 * len(page_objects) + i for i in range(3))
+        page_objects.append(page_object)
+        data = emit(image, f"/Type /XObject /Subtype /Image /Width {page_width} /Height {page_height} "
+                           f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode",
+                    zlib.compress(page.tobytes(), 6))
+        data += emit(contents, "", f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode('latin-1'))
+        data += emit(page_object, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+                                  f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {contents} 0 R >>")
+        return data
+    
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    
+    page = None
+    for index, (location, png) in enumerate(render_location_qrs(locations, prop)):
+        slot = index % per_page
+        if slot == 0:
+            if page is not None:
+                yield finish_page(page)
+            page = Image.new('1', QR_SHEET_PAGE_SIZE, 1)  # White
+        x = (slot % QR_SHEET_COLUMNS) * cell_width
+        y = (slot // QR_SHEET_COLUMNS) * cell_height
+        code = Image.open(BytesIO(png)).convert('1').resize((qr_size, qr_size), Image.NEAREST)
+        page.paste(code, (x + (cell_width - qr_size) // 2, y + 20))
+        draw = ImageDraw.Draw(page)
+        label = f"{prop['name']} - {location}"
+        left, top, right, bottom = draw.textbbox((0, 0), label)
+        draw.text((x + (cell_width - (right - left)) // 2, y + qr_size + 35), label, fill=0)
+    if page is not None:
+        yield finish_page(page)
+    
+    kids = ' '.join(f"{number} 0 R" for number in page_objects)
+    tail = emit(1, "<< /Type /Catalog /Pages 2 0 R >>")
+    tail += emit(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objects)} >>")
+    xref = [f"xref\n0 {len(offsets) + 1}\n", "0000000000 65535 f \n"]
+    xref += [f"{offsets[number]:010d} 00000 n \n" for number in range(1, len(offsets) + 1)]
+    xref.append(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n")
+    yield tail + ''.join(xref).encode('latin-1')
+
+@app.route("/admin/qr_batch")
+@admin_required
+def qr_batch():
+    """Download QR codes for a room/table range as a ZIP or PDF sheet"""
+    prop = current_property()
+    if 'start' not in request.args:
+        return render_template('qr_batch.html', current_property=prop, args=request.args, error=None)
+    
+    prefix = request.args.get('prefix', '').strip()
+    try:
+        locations = parse_location_range(request.args['start'], request.args.get('end', request.args['start']), prefix)
+    except ValueError as e:
+        return render_template('qr_batch.html', current_property=prop, args=request.args, error=str(e)), 400
+    
+    basename = f"{prop['name'].replace(' ', '_')}_QR_{locations[0]}-{locations[-1]}"
+    if request.args.get('format') == 'pdf':
+        return Response(
+            stream_with_context(generate_qr_sheet_pdf(locations, prop)),
+            mimetype="application/pdf",
+            headers={"Content-Disposition": attachment_disposition(f"{basename}.pdf")}
+        )
+    return Response(
+        stream_with_context(generate_qr_zip(locations, prop)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": attachment_disposition(f"{basename}.zip")}
+    )
+
+@app.cli.command("qr-batch")
+@click.argument("start", type=int)
+@click.argument("end", type=int)
+@click.option("--prefix", default="", help="Label prefix, e.g. T for tables")
+@click.option("--format", "fmt", type=click.Choice(["zip", "pdf"]), default="zip")
+@click.option("--output", "-o", default=None, help="Output file (default: in qr_codes/)")
+@click.option("--property", "property_slug", default=None, help="Property slug (default: the main property)")
+def qr_batch_command(start, end, prefix, fmt, output, property_slug):
+    """Generate QR codes for rooms/tables START..END."""
+    prop = get_property(property_slug)
+    if prop is None:
+        raise click.BadParameter(f"unknown property {property_slug!r}", param_hint="--property")
+    locations = parse_location_range(start, end, prefix)
+    output = output or os.path.join(QR_FOLDER, f"{prefix}{start}-{prefix}{end}.{fmt}")
+    started = time.perf_counter()
+    with open(output, 'wb') as f:
+        chunks = generate_qr_sheet_pdf(locations, prop) if fmt == 'pdf' else generate_qr_zip(locations, prop)
+        for chunk in chunks:
+            f.write(chunk)
+    click.echo(f"✅ {len(locations)} QR codes written to {output} "
+               f"in {time.perf_counter() - started:.2f}s using {QR_BATCH_WORKERS} processes")
+
+# ------------------- PRE-RENDERED REVIEW FORM -------------------
+# Every guest scan lands on GET /review and the page only depends on the
+# property's configuration, so it is rendered and compressed once per
+# property (on its first request) and then served from memory. The room or
+# table stays in the URL; the form posts back to it.
+REVIEW_FORM_MAX_AGE = 300  # Browsers revalidate with the ETag after this
+
+def build_review_form_variants():
+    """Return {encoding: (body bytes, strong etag)} for the review form"""
+    html = str(cached_fragment('review_form.html')).encode('utf-8')
+    digest = hashlib.sha256(html).hexdigest()[:32]
+    variants = {}
+    if brotli is not None:
+        variants['br'] = brotli.compress(html, mode=brotli.MODE_TEXT, quality=11)
+    variants['gzip'] = gzip.compress(html, compresslevel=9, mtime=0)
+    variants['identity'] = html
+    # Each encoding is a different byte stream, so each gets its own strong ETag
+    return {encoding: (body, f"{digest}-{encoding}") for encoding, body in variants.items()}
+
+_review_form_variants = {}  # property version -> build_review_form_variants()
+
+def review_form_variants(prop):
+    variants = _review_form_variants.get(prop['version'])
+    if variants is None:
+        variants = _review_form_variants[prop['version']] = build_review_form_variants()
+    return variants
+
+def review_form_response():
+    """Serve the pre-rendered form in the best encoding the client accepts"""
+    variants = review_form_variants(current_property())
+    encoding = request.accept_encodings.best_match(list(variants), default='identity')
+    body, etag = variants[encoding]
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={REVIEW_FORM_MAX_AGE}',
+        'Vary': 'Accept-Encoding',
+    }
+    
+    # Revalidation from a guest's browser: answer before touching the body
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    
+    response = Response(body, mimetype="text/html", headers=headers)
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    return response
+
+# ------------------- IDEMPOTENT SUBMISSIONS -------------------
+# The form page is shared and cached, so the browser mints the one-time
+# token (see review_form.html). A double tap or a retry on a flaky
+# connection posts the same token again and gets the original feedback ID.
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+def clean_idempotency_key(value):
+    """Return the submitted token, or None if it is missing or malformed"""
+    value = (value or '').strip()
+    return value if IDEMPOTENCY_KEY_PATTERN.match(value) else None
+
+def save_review(cur, feedback_data, idempotency_key=None):
+    """Insert one submission and its alerts without committing.
+
+    Returns (feedback_id, alerts). alerts is None when the token was already
+    used: nothing was written and the original feedback ID is returned.
+    Thresholds come from the review's property.
+    """
+    prop = get_property_by_id(feedback_data.get('property_id', DEFAULT_PROPERTY_ID))
+    cur.execute(INSERT_REVIEW_SQL,
+                (feedback_data['food_quality'], feedback_data['food_quality_comments'],
+                 feedback_data['seating_arrangement'], feedback_data['seating_arrangement_comments'],
+                 feedback_data['parking'], feedback_data['parking_comments'],
+                 feedback_data['washroom'], feedback_data['washroom_comments'],
+                 feedback_data['hotel_service'], feedback_data['hotel_service_comments'],
+                 feedback_data['general_comments'], idempotency_key,
+                 prop['id'], feedback_data.get('location', '')))
+    row = cur.fetchone()
+    if row is None:
+        cur.execute(FIND_REVIEW_BY_KEY_SQL, (idempotency_key,))
+        return cur.fetchone()[0], None
+    feedback_id = row[0]
+    
+    # Alerts are stored in the same transaction as the review
+    alerts = check_alert_thresholds(feedback_data, prop['thresholds'])
+    if alerts:
+        record_alerts(cur, feedback_id, alerts)
+    return feedback_id, alerts
+
+# ------------------- WRITE-BEHIND REVIEW PIPELINE -------------------
+# Optional (WRITE_BEHIND=1). A burst of guests submitting at once would each
+# pay for their own transaction commit. Instead, request threads hand the
+# submission to one writer thread per worker, which commits everything that
+# arrives together in a single transaction (group commit). Each request
+# still waits for its batch to commit, so the thank-you page is only shown
+# for feedback that is safely stored.
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 100))     # Max rows per transaction
+WRITE_BEHIND_MAX_DELAY_MS = float(os.environ.get('WRITE_BEHIND_MAX_DELAY_MS', 0))  # Extra wait to fill a batch
+WRITE_BEHIND_TIMEOUT = 10.0  # Seconds a request waits for its batch to commit
+
+class ReviewWriter:
+    """Commits queued review submissions in batches from a background thread.
+
+    submit() blocks until the submission's batch has committed and returns
+    save_review()'s result, or raises its error. If a batch fails, its rows
+    are retried one transaction each so a single bad row only fails its own
+    request. Like AlertDispatcher, the thread is started lazily per process.
     """
 
+    def __init__(self, batch_size=WRITE_BEHIND_BATCH_SIZE, max_delay_ms=WRITE_BEHIND_MAX_DELAY_MS):
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._conn = None
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, feedback_data, idempotency_key=None, timeout=WRITE_BEHIND_TIMEOUT):
+        """Queue one submission and wait for it to be committed"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((feedback_data, idempotency_key, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Not written if the writer has not reached it yet
+            raise
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()  # Items queued in the parent are not ours
+                    self._conn = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='review-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Block for the first submission, then collect more for max_delay"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            try:
+                # Whatever is already queued joins the batch without waiting
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Stop after committing this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self._release()
+                return
+            # Requests that already gave up are not written
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        try:
+            results = self._commit(batch)
+        except Exception as e:
+            logger.warning("Batch of %d reviews failed (%s); retrying one by one", len(batch), e)
+            for item in batch:
+                try:
+                    result = self._commit([item])[0]
+                except Exception as item_error:
+                    item[2].set_exception(item_error)
+                else:
+                    item[2].set_result(result)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit(self, batch):
+        """Save every submission in one transaction and return their results"""
+        if self._conn is None:
+            self._conn = storage.acquire()
+        conn = self._conn
+        try:
+            cur = conn.cursor()
+            results = [save_review(cur, feedback_data, idempotency_key)
+                       for feedback_data, idempotency_key, _ in batch]
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except storage.Error:
+                pass
+            self._release()  # Start the next batch on a fresh connection
+            raise
+        self.batches += 1
+        self.rows += len(batch)
+        return results
+
+    def _release(self):
+        if self._conn is not None:
+            storage.release(self._conn)
+            self._conn = None
+
+    def stop(self, timeout=10):
+        """Commit queued submissions and stop the writer (called at exit)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+review_writer = ReviewWriter()
+atexit.register(review_writer.stop)
+
 # ------------------- REVIEW FORM (SINGLE PAGE FOR ALL) -------------------
 @app.route("/review", methods=["GET", "POST"])
+@rate_limited('review', methods=['POST'])
 def review():
     
     if request.method == "POST":
+        # The form posts back to its own URL, so ?property= and ?location= come along
+        review_url = request.full_path.rstrip('?')
+        prop = current_property()
         try:
-            print(f"📝 Form submission received")
-            print(f"Form data: {dict(request.form)}")
+            # Field names only: comments are guest data and stay out of the logs
+            logger.debug("Form submission received", extra={'fields': sorted(request.form)})
             
             # Get all ratings and comments from form
-            food_quality = int(request.form["food_quality"])
+            food_quality = parse_rating(request.form["food_quality"])
             food_quality_comments = request.form.get("food_quality_comments", "")
             
-            seating_arrangement = int(request.form["seating_arrangement"])
+            seating_arrangement = parse_rating(request.form["seating_arrangement"])
             seating_arrangement_comments = request.form.get("seating_arrangement_comments", "")
             
-            parking = int(request.form["parking"])
+            parking = parse_rating(request.form["parking"])
             parking_comments = request.form.get("parking_comments", "")
             
-            washroom = int(request.form["washroom"])
+            washroom = parse_rating(request.form["washroom"])
             washroom_comments = request.form.get("washroom_comments", "")
             
-            hotel_service = int(request.form["hotel_service"])
+            hotel_service = parse_rating(request.form["hotel_service"])
             hotel_service_comments = request.form.get("hotel_service_comments", "")
             
             general_comments = request.form.get("general_comments", "")
+            idempotency_key = clean_idempotency_key(request.form.get("idempotency_key"))
             
-            print(f"✅ All form data extracted successfully")
-            
-            # Save to database
-            conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
-            cur = conn.cursor()
-            cur.execute("""INSERT INTO reviews 
-                        (food_quality, food_quality_comments, 
-                         seating_arrangement, seating_arrangement_comments,
-                         parking, parking_comments,
-                         washroom, washroom_comments,
-                         hotel_service, hotel_service_comments,
-                         general_comments) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                        (food_quality, food_quality_comments,
-                         seating_arrangement, seating_arrangement_comments,
-                         parking, parking_comments,
-                         washroom, washroom_comments,
-                         hotel_service, hotel_service_comments,
-                         general_comments))
-            
-            # Get the ID of the inserted feedback
-            feedback_id = cur.lastrowid
-            conn.commit()
-            conn.close()
-            
-            print(f"✅ Feedback #{feedback_id} saved to database")
-            
-            # Check for alerts
             feedback_data = {
                 'food_quality': food_quality,
                 'food_quality_comments': food_quality_comments,
-                'seating_arrangement': seating_arrangement,
-                'seating_arrangement_comments': seating_arrangement_comments,
-                'parking': parking,
-                'parking_comments': parking_comments,
-                'washroom': washroom,
-                'washroom_comments': washroom_comments,
-                'hotel_service': hotel_service,
-                'hotel_service_comments': hotel_service_comments
-            }
-            
-            # Calculate overall average for alert checking
-            ratings = [food_quality, seating_arrangement, parking, washroom, hotel_service]
-            overall_avg = sum(ratings) / len(ratings)
-            feedback_data['overall'] = overall_avg
-            
-            alerts = check_alert_thresholds(feedback_data)
-            if alerts:
-                print(f"📊 Alerts detected for feedback #{feedback_id}")
-                if EMAIL_CONFIG['enable_emails']:
-                    print(f"📧 Email enabled, attempting to send alert...")
-                    send_alert_email(alerts, feedback_id)
-                else:
-                    print(f"📧 Email disabled, alerts would have been sent for: {[a['category'] for a in alerts]}")
-            else:
-                print(f"✅ No alerts for feedback #{feedback_id}")
-            
-            return f"""
-            <html>
-            <head>
-                <title>Thank You - {HOTEL_NAME}</title>
-                <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-                <style>
-                    .hotel-logo {{
-                        width: 200px;
-                        height: 160px;
-                        object-fit: cover;
-                        border-radius: 10px;
-                        border: 3px solid #198754;
-                        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                        margin: 15px auto;
-                        display: block;
-                    }}
-                    .hotel-header {{
-                        background: linear-gradient(135deg, #198754 0%, #0d6efd 100%);
-                        color: white;
-                        padding: 1.5rem 0;
-                        margin-bottom: 2rem;
-                        border-radius: 15px;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                    }}
-                    @media (max-width: 768px) {{
-                        .hotel-logo {{
-                            width: 160px;
-                            height: 130px;
-                        }}
-                    }}
-                </style>
-            </head>
-            <body class="container text-center py-5">
-                <div class="hotel-header">
-                    <h3>🏨 {HOTEL_NAME}</h3>
-                    <p class="lead mb-0">Thank You for Your Feedback</p>
-                    <div class="mt-2">
-                        <img src="/static/{HOTEL_LOGO}" alt="{HOTEL_NAME} Logo" class="hotel-logo">
-                    </div>
-                </div>
-                
-                <div class="card shadow mx-auto" style="max-width: 500px;">
-                    <div class="card-body py-5">
-                        <div class="display-1 mb-4">🎉</div>
-                        <h2 class="text-success">Thank You!</h2>
-                        <p class="lead">Your valuable feedback has been submitted successfully.</p>
-                        <p class="text-muted">Feedback ID: #{feedback_id}</p>
-                        
-                        <div class="mt-4">
-                            <a href="/review" class="btn btn-primary">Submit Another Review</a>
-                            <a href="/" class="btn btn-outline-secondary ms-2">Home</a>
-                        </div>
-                    </div>
-                    <div class="card-footer text-center">
-                        <small>{HOTEL_NAME} &copy; 2024</small>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-        
-        except Exception as e:
-            print(f"❌ Error processing feedback: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-            return f"""
-            <html>
-            <head>
-                <title>Error - {HOTEL_NAME}</title>
-                <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-            </head>
-            <body class="container text-center py-5">
-                <div class="alert alert-danger">
-                    <h3>❌ Error Submitting Feedback</h3>
-                    <p>There was an error processing your feedback. Please try again.</p>
-                    <p><small>Error: {str(e)}</small></p>
-                    <div class="mt-3">
-                        <a href="/review" class="btn btn-primary">Go Back to Form</a>
-                        <a href="/" class="btn btn-outline-secondary ms-2">Home</a>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-    
-    # GET request - show the form
-    return f"""
-    <html>
-    <head>
-        <title>Hotel Feedback - {HOTEL_NAME}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-        <style>
-            .hotel-logo {{
-                width: 220px;
-                height: 180px;
-                object-fit: cover;
-                border-radius: 12px;
-                border: 4px solid #0d6efd;
-                box-shadow: 0 6px 12px rgba(0,0,0,0.25);
-                margin: 20px auto;
-                display: block;
-            }}
-            .hotel-header {{
-                background: linear-gradient(135deg, #0d6efd 0%, #198754 100%);
-                color: white;
-                padding: 1.5rem 0;
-                margin-bottom: 2rem;
-                border-radius: 15px;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            }}
-            .rating-item {{
-                background: #f8f9fa;
-                border-radius: 10px;
-                padding: 20px;
-                margin-bottom: 20px;
-                border: 1px solid #dee2e6;
-                transition: transform 0.3s;
-            }}
-            .rating-item:hover {{
-                transform: translateY(-2px);
-                box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            }}
-            .rating-label {{
-                font-weight: 600;
-                color: #495057;
-                margin-bottom: 15px;
-                font-size: 1.1rem;
-                display: flex;
-                align-items: center;
-            }}
-            .rating-label-number {{
-                background: #0d6efd;
-                color: white;
-                width: 28px;
-                height: 28px;
-                border-radius: 50%;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                margin-right: 10px;
-                font-size: 0.9rem;
-            }}
-            .rating-stars {{
-                display: flex;
-                justify-content: center;
-                gap: 8px;
-                font-size: 2.2rem;
-                cursor: pointer;
-            }}
-            .rating-stars .star {{
-                transition: all 0.3s ease;
-                filter: drop-shadow(0 2px 3px rgba(0,0,0,0.2));
-            }}
-            .rating-stars .star:hover {{
-                transform: scale(1.3);
-                filter: drop-shadow(0 3px 5px rgba(0,0,0,0.4));
-            }}
-            .rating-value {{
-                font-size: 1rem;
-                margin-top: 10px;
-                text-align: center;
-                font-weight: 500;
-                padding: 5px 10px;
-                border-radius: 20px;
-                display: inline-block;
-                background: #f1f3f5;
-            }}
-            .rating-bar {{
-                height: 8px;
-                background: #e9ecef;
-                border-radius: 4px;
-                margin-top: 15px;
-                overflow: hidden;
-            }}
-            .rating-fill {{
-                height: 100%;
-                border-radius: 4px;
-                transition: width 0.5s ease, background 0.5s ease;
-            }}
-            .category-comments {{
-                margin-top: 15px;
-                padding: 10px;
-                background: #f8f9fa;
-                border-radius: 8px;
-                border: 1px solid #e9ecef;
-            }}
-            .category-comments textarea {{
-                background: white;
-                border: 1px solid #dee2e6;
-                border-radius: 6px;
-                padding: 10px;
-                font-size: 0.9rem;
-                resize: vertical;
-                min-height: 60px;
-            }}
-            .category-comments textarea:focus {{
-                border-color: #0d6efd;
-                box-shadow: 0 0 0 0.2rem rgba(13, 110, 253, 0.25);
-                outline: none;
-            }}
-            
-            /* Individual star colors - each star has its own fixed color */
-            .star[data-value="1"] {{ color: #ff6b6b; }} /* Red */
-            .star[data-value="2"] {{ color: #ffa726; }} /* Orange */
-            .star[data-value="3"] {{ color: #ffd166; }} /* Yellow */
-            .star[data-value="4"] {{ color: #06d6a0; }} /* Light Green */
-            .star[data-value="5"] {{ color: #118ab2; }} /* Blue */
+                'seating_arrangement': seating_arrangement,
+                'seating_arrangement_comments': seating_arrangement_comments,
+                'parking': parking,
+                'parking_comments': parking_comments,
+                'washroom': washroom,
+                'washroom_comments': washroom_comments,
+                'hotel_service': hotel_service,
+                'hotel_service_comments': hotel_service_comments,
+                'general_comments': general_comments,
+                'property_id': prop['id'],
+                'location': clean_location(request.values.get('location'))
+            }
             
-            /* Default inactive state */
-            .star.inactive {{ 
-                opacity: 0.4;
-                filter: grayscale(0.8);
-            }}
+            # Calculate overall average for alert checking
+            ratings = [food_quality, seating_arrangement, parking, washroom, hotel_service]
+            overall_avg = sum(ratings) / len(ratings)
+            feedback_data['overall'] = overall_avg
             
-            /* Active state */
-            .star.active {{
-                opacity: 1;
-                filter: none;
-                transform: scale(1.1);
-            }}
+            # Save to database
+            if WRITE_BEHIND:
+                feedback_id, alerts = review_writer.submit(feedback_data, idempotency_key)
+            else:
+                conn = get_db()
+                feedback_id, alerts = save_review(conn.cursor(), feedback_data, idempotency_key)
+                conn.commit()
             
-            /* Value display backgrounds */
-            .value-bg-1 {{ background: #ffebee; color: #ff6b6b; }}
-            .value-bg-2 {{ background: #fff3e0; color: #ffa726; }}
-            .value-bg-3 {{ background: #fff9c4; color: #ffd166; }}
-            .value-bg-4 {{ background: #e8f5e9; color: #06d6a0; }}
-            .value-bg-5 {{ background: #e3f2fd; color: #118ab2; }}
+            if alerts is None:
+                # Token already used: a retry of a stored submission. Nothing
+                # was written, so no alerts either.
+                logger.info("Duplicate submission, not saved again", extra={'feedback_id': feedback_id})
+                return render_template('thankyou.html', feedback_id=feedback_id, review_url=review_url)
             
-            /* Bar gradient colors */
-            .bar-1 {{ background: linear-gradient(90deg, #ff6b6b, #ffa726); }}
-            .bar-2 {{ background: linear-gradient(90deg, #ff6b6b, #ffa726); }}
-            .bar-3 {{ background: linear-gradient(90deg, #ff6b6b, #ffd166); }}
-            .bar-4 {{ background: linear-gradient(90deg, #ff6b6b, #06d6a0); }}
-            .bar-5 {{ background: linear-gradient(90deg, #ff6b6b, #118ab2); }}
+            logger.info("Feedback saved", extra={
+                'feedback_id': feedback_id, 'property': prop['slug'], 'overall': round(overall_avg, 2),
+                'alerts': [alert['key'] for alert in alerts]})
             
-            .comments-toggle {{
-                color: #0d6efd;
-                cursor: pointer;
-                font-size: 0.9rem;
-                margin-top: 10px;
-                display: inline-block;
-                text-decoration: none;
-            }}
-            .comments-toggle:hover {{
-                text-decoration: underline;
-            }}
+            if alerts:
+                if EMAIL_CONFIG['enable_emails']:
+                    alert_dispatcher.enqueue(alerts, feedback_id, prop)
+                else:
+                    logger.debug("Email alerts disabled, not queued", extra={'feedback_id': feedback_id})
             
-            @media (max-width: 768px) {{
-                .hotel-logo {{
-                    width: 180px;
-                    height: 150px;
-                }}
-                .rating-stars {{
-                    font-size: 1.8rem;
-                    gap: 5px;
-                }}
-                .rating-label {{
-                    font-size: 1rem;
-                }}
-                .rating-label-number {{
-                    width: 24px;
-                    height: 24px;
-                    font-size: 0.8rem;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <!-- Hotel Header with Logo -->
-        <div class="hotel-header text-center">
-            <div class="container">
-                <h1 class="display-5 mb-3">🏨 {HOTEL_NAME}</h1>
-                <p class="lead mb-0">Detailed Feedback Form</p>
-                <p class="small opacity-75">Rate each aspect and provide specific comments</p>
-                <div class="mt-3">
-                    <img src="/static/{HOTEL_LOGO}" alt="{HOTEL_NAME} Logo" class="hotel-logo">
-                </div>
-            </div>
-        </div>
+            return render_template('thankyou.html', feedback_id=feedback_id, review_url=review_url)
         
-        <!-- Feedback Form -->
-        <div class="container">
-            <div class="row justify-content-center">
-                <div class="col-md-10 col-lg-8">
-                    <div class="card shadow">
-                        <div class="card-header bg-primary text-white">
-                            <h4 class="mb-0">📝 Rate Your Experience</h4>
-                        </div>
-                        <div class="card-body">
-                            <form method="POST" action="/review" id="feedbackForm">
-                                
-                                <!-- Food Quality -->
-                                <div class="rating-item">
-                                    <div class="rating-label">
-                                        <span class="rating-label-number">1</span>
-                                        Food Quality
-                                    </div>
-                                    <div class="rating-stars" data-category="food_quality">
-                                        <span class="star inactive" data-value="1">⭐</span>
-                                        <span class="star inactive" data-value="2">⭐</span>
-                                        <span class="star inactive" data-value="3">⭐</span>
-                                        <span class="star inactive" data-value="4">⭐</span>
-                                        <span class="star inactive" data-value="5">⭐</span>
-                                    </div>
-                                    <div class="text-center mt-3">
-                                        <span class="rating-value" id="food_quality_value">Not rated yet</span>
-                                    </div>
-                                    <div class="rating-bar">
-                                        <div class="rating-fill" id="food_quality_bar" style="width: 0%"></div>
-                                    </div>
-                                    <a class="comments-toggle" onclick="toggleComments('food_quality_comments')">
-                                        💬 Add comments about Food Quality
-                                    </a>
-                                    <div class="category-comments" id="food_quality_comments" style="display: none;">
-                                        <textarea 
-                                            name="food_quality_comments" 
-                                            placeholder="What did you like/dislike about the food quality? Any suggestions?"
-                                            rows="2"></textarea>
-                                    </div>
-                                    <input type="hidden" name="food_quality" id="food_quality" value="" required>
-                                </div>
-                                
-                                <!-- Seating Arrangement -->
-                                <div class="rating-item">
-                                    <div class="rating-label">
-                                        <span class="rating-label-number">2</span>
-                                        Seating Arrangement
-                                    </div>
-                                    <div class="rating-stars" data-category="seating_arrangement">
-                                        <span class="star inactive" data-value="1">⭐</span>
-                                        <span class="star inactive" data-value="2">⭐</span>
-                                        <span class="star inactive" data-value="3">⭐</span>
-                                        <span class="star inactive" data-value="4">⭐</span>
-                                        <span class="star inactive" data-value="5">⭐</span>
-                                    </div>
-                                    <div class="text-center mt-3">
-                                        <span class="rating-value" id="seating_arrangement_value">Not rated yet</span>
-                                    </div>
-                                    <div class="rating-bar">
-                                        <div class="rating-fill" id="seating_arrangement_bar" style="width: 0%"></div>
-                                    </div>
-                                    <a class="comments-toggle" onclick="toggleComments('seating_arrangement_comments')">
-                                        💬 Add comments about Seating Arrangement
-                                    </a>
-                                    <div class="category-comments" id="seating_arrangement_comments" style="display: none;">
-                                        <textarea 
-                                            name="seating_arrangement_comments" 
-                                            placeholder="Was the seating comfortable? Any issues with spacing or arrangement?"
-                                            rows="2"></textarea>
-                                    </div>
-                                    <input type="hidden" name="seating_arrangement" id="seating_arrangement" value="" required>
-                                </div>
-                                
-                                <!-- Parking -->
-                                <div class="rating-item">
-                                    <div class="rating-label">
-                                        <span class="rating-label-number">3</span>
-                                        Parking Facility
-                                    </div>
-                                    <div class="rating-stars" data-category="parking">
-                                        <span class="star inactive" data-value="1">⭐</span>
-                                        <span class="star inactive" data-value="2">⭐</span>
-                                        <span class="star inactive" data-value="3">⭐</span>
-                                        <span class="star inactive" data-value="4">⭐</span>
-                                        <span class="star inactive" data-value="5">⭐</span>
-                                    </div>
-                                    <div class="text-center mt-3">
-                                        <span class="rating-value" id="parking_value">Not rated yet</span>
-                                    </div>
-                                    <div class="rating-bar">
-                                        <div class="rating-fill" id="parking_bar" style="width: 0%"></div>
-                                    </div>
-                                    <a class="comments-toggle" onclick="toggleComments('parking_comments')">
-                                        💬 Add comments about Parking
-                                    </a>
-                                    <div class="category-comments" id="parking_comments" style="display: none;">
-                                        <textarea 
-                                            name="parking_comments" 
-                                            placeholder="Was parking easy to find? Any safety or space concerns?"
-                                            rows="2"></textarea>
-                                    </div>
-                                    <input type="hidden" name="parking" id="parking" value="" required>
-                                </div>
-                                
-                                <!-- Washroom -->
-                                <div class="rating-item">
-                                    <div class="rating-label">
-                                        <span class="rating-label-number">4</span>
-                                        Washroom Cleanliness
-                                    </div>
-                                    <div class="rating-stars" data-category="washroom">
-                                        <span class="star inactive" data-value="1">⭐</span>
-                                        <span class="star inactive" data-value="2">⭐</span>
-                                        <span class="star inactive" data-value="3">⭐</span>
-                                        <span class="star inactive" data-value="4">⭐</span>
-                                        <span class="star inactive" data-value="5">⭐</span>
-                                    </div>
-                                    <div class="text-center mt-3">
-                                        <span class="rating-value" id="washroom_value">Not rated yet</span>
-                                    </div>
-                                    <div class="rating-bar">
-                                        <div class="rating-fill" id="washroom_bar" style="width: 0%"></div>
-                                    </div>
-                                    <a class="comments-toggle" onclick="toggleComments('washroom_comments')">
-                                        💬 Add comments about Washrooms
-                                    </a>
-                                    <div class="category-comments" id="washroom_comments" style="display: none;">
-                                        <textarea 
-                                            name="washroom_comments" 
-                                            placeholder="Were washrooms clean and well-maintained? Any issues?"
-                                            rows="2"></textarea>
-                                    </div>
-                                    <input type="hidden" name="washroom" id="washroom" value="" required>
-                                </div>
-                                
-                                <!-- Hotel Service -->
-                                <div class="rating-item">
-                                    <div class="rating-label">
-                                        <span class="rating-label-number">5</span>
-                                        Hotel's Service
-                                    </div>
-                                    <div class="rating-stars" data-category="hotel_service">
-                                        <span class="star inactive" data-value="1">⭐</span>
-                                        <span class="star inactive" data-value="2">⭐</span>
-                                        <span class="star inactive" data-value="3">⭐</span>
-                                        <span class="star inactive" data-value="4">⭐</span>
-                                        <span class="star inactive" data-value="5">⭐</span>
-                                    </div>
-                                    <div class="text-center mt-3">
-                                        <span class="rating-value" id="hotel_service_value">Not rated yet</span>
-                                    </div>
-                                    <div class="rating-bar">
-                                        <div class="rating-fill" id="hotel_service_bar" style="width: 0%"></div>
-                                    </div>
-                                    <a class="comments-toggle" onclick="toggleComments('hotel_service_comments')">
-                                        💬 Add comments about Hotel Service
-                                    </a>
-                                    <div class="category-comments" id="hotel_service_comments" style="display: none;">
-                                        <textarea 
-                                            name="hotel_service_comments" 
-                                            placeholder="How was staff behavior? Check-in/out experience? Room service?"
-                                            rows="2"></textarea>
-                                    </div>
-                                    <input type="hidden" name="hotel_service" id="hotel_service" value="" required>
-                                </div>
-                                
-                                <!-- General Comments -->
-                                <div class="mb-4">
-                                    <label for="general_comments" class="form-label">
-                                        <strong>📝 Overall Experience & General Comments (Optional)</strong>
-                                    </label>
-                                    <textarea class="form-control" id="general_comments" name="general_comments" 
-                                              rows="4" placeholder="Share your overall experience, any additional feedback, or suggestions for improvement..."></textarea>
-                                    <div class="form-text">Your overall feedback helps us serve you better</div>
-                                </div>
-                                
-                                <!-- Submit Button -->
-                                <div class="d-grid gap-2">
-                                    <button type="submit" class="btn btn-success btn-lg py-3" id="submitBtn">
-                                        ✅ Submit Complete Feedback
-                                    </button>
-                                    <a href="/" class="btn btn-outline-secondary">← Back to Home</a>
-                                </div>
-                            </form>
-                        </div>
-                        <div class="card-footer text-center">
-                            <small>Rate each category and add specific comments for detailed feedback</small>
-                        </div>
-                    </div>
-                    
-                    <!-- Info Box -->
-                    <div class="alert alert-info mt-4">
-                        <h5>📋 How to use this feedback form:</h5>
-                        <ol class="mb-0">
-                            <li><strong>Click stars</strong> to rate each category (1-5 stars)</li>
-                            <li><strong>Click "Add comments"</strong> below any category to provide specific feedback</li>
-                            <li>Each star has its own color: Red(1) → Orange(2) → Yellow(3) → Green(4) → Blue(5)</li>
-                            <li>You must rate ALL 5 categories before submitting</li>
-                            <li>Add overall comments if you wish</li>
-                            <li>Click "Submit Complete Feedback" when done</li>
-                        </ol>
-                    </div>
-                </div>
-            </div>
-        </div>
+        except (KeyError, ValueError) as e:
+            # A missing, non-numeric or out-of-range rating: nothing was saved
+            logger.info("Rejected invalid submission: %s", e)
+            return render_template('review_error.html', error=str(e), review_url=review_url), 400
         
-        <!-- JavaScript for Star Rating -->
-        <script>
-            // Function to toggle comments section
-            function toggleComments(commentId) {{
-                const commentSection = document.getElementById(commentId);
-                const link = event.target;
-                
-                if (commentSection.style.display === 'none') {{
-                    commentSection.style.display = 'block';
-                    link.textContent = '💬 Hide comments';
-                }} else {{
-                    commentSection.style.display = 'none';
-                    link.textContent = '💬 Add comments';
-                }}
-                
-                // Smooth scroll to show the comments
-                commentSection.scrollIntoView({{ behavior: 'smooth', block: 'nearest' }});
-            }}
+        except Exception as e:
+            logger.exception("Error processing feedback")
             
-            document.addEventListener('DOMContentLoaded', function() {{
-                console.log('DOM loaded, initializing rating system...');
-                
-                // Rating texts with emojis
-                const ratingTexts = {{
-                    1: '😞 Poor (1/5)',
-                    2: '😐 Fair (2/5)',
-                    3: '🙂 Good (3/5)',
-                    4: '😊 Very Good (4/5)',
-                    5: '😍 Excellent (5/5)'
-                }};
-                
-                // Bar gradient classes
-                const barClasses = {{
-                    1: 'bar-1',
-                    2: 'bar-2',
-                    3: 'bar-3',
-                    4: 'bar-4',
-                    5: 'bar-5'
-                }};
-                
-                // Value display classes
-                const valueClasses = {{
-                    1: 'value-bg-1',
-                    2: 'value-bg-2',
-                    3: 'value-bg-3',
-                    4: 'value-bg-4',
-                    5: 'value-bg-5'
-                }};
-                
-                // Initialize all rating systems
-                const ratingCategories = [
-                    'food_quality', 
-                    'seating_arrangement', 
-                    'parking', 
-                    'washroom', 
-                    'hotel_service'
-                ];
-                
-                // Track ratings
-                window.ratings = {{
-                    food_quality: null,
-                    seating_arrangement: null,
-                    parking: null,
-                    washroom: null,
-                    hotel_service: null
-                }};
-                
-                // Setup each rating category
-                ratingCategories.forEach(category => {{
-                    const stars = document.querySelectorAll(`[data-category="${{category}}"] .star`);
-                    const hiddenInput = document.getElementById(category);
-                    const valueDisplay = document.getElementById(`${{category}}_value`);
-                    const barFill = document.getElementById(`${{category}}_bar`);
-                    
-                    console.log(`Initializing category: ${{category}}`);
-                    
-                    // Function to update stars based on selected value
-                    function updateStars(selectedValue) {{
-                        console.log(`Updating ${{category}} to: ${{selectedValue}}`);
-                        
-                        stars.forEach(star => {{
-                            const starValue = parseInt(star.getAttribute('data-value'));
-                            
-                            if (starValue <= selectedValue) {{
-                                // Activate stars up to selected value
-                                star.classList.remove('inactive');
-                                star.classList.add('active');
-                                star.style.filter = 'drop-shadow(0 2px 4px rgba(0,0,0,0.3))';
-                            }} else {{
-                                // Deactivate stars beyond selected value
-                                star.classList.remove('active');
-                                star.classList.add('inactive');
-                                star.style.filter = 'none';
-                            }}
-                        }});
-                        
-                        // Update progress bar
-                        const barWidth = (selectedValue / 5) * 100;
-                        barFill.style.width = barWidth + '%';
-                        
-                        // Update bar color class
-                        barFill.className = 'rating-fill ' + (barClasses[selectedValue] || '');
-                        
-                        // Update value display
-                        valueDisplay.textContent = ratingTexts[selectedValue];
-                        valueDisplay.className = 'rating-value ' + valueClasses[selectedValue];
-                        
-                        // Update hidden input
-                        hiddenInput.value = selectedValue;
-                        window.ratings[category] = selectedValue;
-                        
-                        console.log(`Updated hidden input ${{category}}: ${{selectedValue}}`);
-                    }}
-                    
-                    // Add click event to each star
-                    stars.forEach(star => {{
-                        star.addEventListener('click', function() {{
-                            const value = parseInt(this.getAttribute('data-value'));
-                            updateStars(value);
-                        }});
-                        
-                        // Hover effect - preview
-                        star.addEventListener('mouseover', function() {{
-                            const hoverValue = parseInt(this.getAttribute('data-value'));
-                            stars.forEach(s => {{
-                                const starValue = parseInt(s.getAttribute('data-value'));
-                                if (starValue <= hoverValue) {{
-                                    s.style.transform = 'scale(1.2)';
-                                    s.style.filter = 'drop-shadow(0 3px 5px rgba(0,0,0,0.4))';
-                                }}
-                            }});
-                        }});
-                        
-                        star.addEventListener('mouseout', function() {{
-                            const currentValue = parseInt(hiddenInput.value) || 0;
-                            stars.forEach(s => {{
-                                const starValue = parseInt(s.getAttribute('data-value'));
-                                s.style.transform = starValue <= currentValue ? 'scale(1.1)' : 'scale(1)';
-                                s.style.filter = starValue <= currentValue ? 'drop-shadow(0 2px 4px rgba(0,0,0,0.3))' : 'none';
-                            }});
-                        }});
-                    }});
-                    
-                    // Initialize with default value if needed
-                    if (!hiddenInput.value) {{
-                        updateStars(0); // This will set everything to inactive
-                    }}
-                }});
-                
-                // Form validation - FIXED VERSION
-                document.getElementById('feedbackForm').addEventListener('submit', function(e) {{
-                    console.log('Form submission attempted');
-                    console.log('Current ratings:', window.ratings);
-                    
-                    let allRated = true;
-                    const missingCategories = [];
-                    
-                    ratingCategories.forEach(category => {{
-                        const value = window.ratings[category];
-                        console.log(`Checking ${{category}}: ${{value}}`);
-                        if (!value || value === 0) {{
-                            allRated = false;
-                            // Format category name for display
-                            const formattedName = category
-                                .replace('_', ' ')
-                                .replace(/\\b\\w/g, l => l.toUpperCase());
-                            missingCategories.push(formattedName);
-                        }}
-                    }});
-                    
-                    if (!allRated) {{
-                        e.preventDefault();
-                        const missingList = missingCategories.join(', ');
-                        console.log('Missing categories:', missingList);
-                        alert(`Please rate all categories before submitting:\\n\\n${{missingList}}`);
-                        
-                        // Highlight missing categories with animation
-                        missingCategories.forEach(cat => {{
-                            const categoryId = cat.toLowerCase().replace(' ', '_');
-                            const element = document.querySelector(`[data-category="${{categoryId}}"]`);
-                            if (element) {{
-                                element.parentElement.style.border = '2px solid #ff6b6b';
-                                element.parentElement.style.animation = 'pulse 0.5s 3';
-                            }}
-                        }});
-                        
-                        return false;
-                    }} else {{
-                        console.log('All categories rated, submitting form...');
-                        // Disable submit button to prevent double submission
-                        document.getElementById('submitBtn').disabled = true;
-                        document.getElementById('submitBtn').innerHTML = '⏳ Submitting...';
-                    }}
-                }});
-                
-                // Debug: Log when form would normally submit
-                document.getElementById('feedbackForm').addEventListener('submit', function() {{
-                    console.log('Form is submitting...');
-                    ratingCategories.forEach(category => {{
-                        const hiddenInput = document.getElementById(category);
-                        console.log(`Hidden input ${{category}} value: ${{hiddenInput.value}}`);
-                    }});
-                }}, true);
-                
-                // Add CSS animation for highlighting
-                const style = document.createElement('style');
-                style.textContent = `
-                    @keyframes pulse {{
-                        0% {{ box-shadow: 0 0 0 0 rgba(255, 107, 107, 0.7); }}
-                        70% {{ box-shadow: 0 0 0 10px rgba(255, 107, 107, 0); }}
-                        100% {{ box-shadow: 0 0 0 0 rgba(255, 107, 107, 0); }}
-                    }}
-                    #submitBtn:disabled {{
-                        opacity: 0.7;
-                        cursor: not-allowed;
-                    }}
-                `;
-                document.head.appendChild(style);
-                
-                console.log('Rating system initialized successfully');
-            }});
-        </script>
-    </body>
-    </html>
-    """
+            return render_template('review_error.html', error=str(e), review_url=review_url)
+    
+    # GET request - show the pre-rendered form
+    return review_form_response()
 
 # ------------------- ADMIN DASHBOARD (PROTECTED) -------------------
+ADMIN_RATING_CATEGORIES = [
+    {'key': 'food_quality', 'label': 'Food Quality', 'short_label': 'Food Quality', 'icon': 'fa-utensils'},
+    {'key': 'seating_arrangement', 'label': 'Seating Arrangement', 'short_label': 'Seating', 'icon': 'fa-chair'},
+    {'key': 'parking', 'label': 'Parking Facility', 'short_label': 'Parking', 'icon': 'fa-parking'},
+    {'key': 'washroom', 'label': 'Washroom Cleanliness', 'short_label': 'Washroom', 'icon': 'fa-restroom'},
+    {'key': 'hotel_service', 'label': 'Hotel Service', 'short_label': 'Service', 'icon': 'fa-concierge-bell'},
+]
+
+# (label, icon, review column) for each comment shown on a feedback card
+ADMIN_COMMENT_FIELDS = [
+    ('Food', 'fa-utensils', 2),
+    ('Seating', 'fa-chair', 4),
+    ('Parking', 'fa-parking', 6),
+    ('Washroom', 'fa-restroom', 8),
+    ('Service', 'fa-concierge-bell', 10),
+    ('General', 'fa-file-alt', 11),
+]
+
+def format_review_date(created_at):
+    """Human readable timestamp for a feedback card"""
+    if not created_at:
+        return "No date"
+    try:
+        return datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S').strftime('%d %b %Y, %I:%M %p')
+    except ValueError:
+        return created_at[:10]
+
+def format_alert_time(date_time):
+    """(date, time) strings for the alerts table"""
+    if not date_time:
+        return "", ""
+    try:
+        time_obj = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+        return time_obj.strftime('%b %d'), time_obj.strftime('%I:%M %p')
+    except ValueError:
+        return date_time[:10], date_time[11:16]
+
+FEEDBACK_CARD_CACHE_SIZE = 2048  # Rendered cards kept per worker
+
+@lru_cache(maxsize=FEEDBACK_CARD_CACHE_SIZE)
+def render_feedback_card(review, threshold_items):
+    """Render one feedback card.
+
+    Keyed on the full review row and the property's thresholds (as a tuple
+    of items), so an edited row or threshold simply misses the cache; the
+    newest pages are what the dashboard shows most, and those stay warm.
+    """
+    thresholds = dict(threshold_items)
+    ratings = [
+        {
+            'label': category['label'],
+            'icon': category['icon'],
+            'value': review[column],
+            'low': review[column] < thresholds[category['key']],
+            'emoji': get_rating_emoji(review[column]),
+        }
+        for category, column in zip(ADMIN_RATING_CATEGORIES, (1, 3, 5, 7, 9))
+    ]
+    comments = [
+        {'label': label, 'icon': icon, 'text': review[column], 'general': column == 11}
+        for label, icon, column in ADMIN_COMMENT_FIELDS
+        if review[column]
+    ]
+    card = {
+        'id': review[0],
+        'formatted_date': format_review_date(review[12]),
+        'location': review[15],
+        'has_low_rating': any(rating['low'] for rating in ratings),
+        'ratings': ratings,
+        'overall': sum(rating['value'] for rating in ratings) / 5,
+        'comments': comments,
+    }
+    return Markup(render_template('fragments/feedback_card.html', card=card))
+
 @app.route("/admin")
 @admin_required
 def admin():
+    prop = current_property()
     try:
-        conn = sqlite3.connect(os.path.join(DB_FOLDER, "reviews.db"))
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM reviews ORDER BY created_at DESC")
-        reviews = cur.fetchall()
+        page_size = get_page_size(request.args.get('per_page', ADMIN_PAGE_SIZE))
+        cursor = request.args.get('cursor')
+        direction = 'prev' if request.args.get('direction') == 'prev' else 'next'
+        
+        # Server-side filters; only matching rows ever reach the page
+        filters = {name: request.args.get(name, '').strip() for name in REVIEW_FILTER_PARAMS}
+        active_filters = {name: value for name, value in filters.items() if value and value != 'all'}
+        source, conditions, params = review_filter_conditions(active_filters, prop['id'])
+        filter_query = ('&' + urlencode(active_filters)) if active_filters else ''
+        
+        cur = get_db().cursor()
+        reviews, prev_cursor, next_cursor = fetch_reviews_page(cur, cursor, direction, page_size,
+                                                               conditions, params, source)
         
         # Calculate averages
         cur.execute("""
             SELECT 
-                COUNT(*) as total_reviews,
-                AVG(food_quality) as avg_food_quality,
-                AVG(seating_arrangement) as avg_seating,
-                AVG(parking) as avg_parking,
-                AVG(washroom) as avg_washroom,
-                AVG(hotel_service) as avg_service,
-                AVG((food_quality + seating_arrangement + parking + washroom + hotel_service) / 5.0) as avg_overall
-            FROM reviews
-        """)
+                SUM(review_count) as total_reviews,
+                SUM(food_quality_sum) * 1.0 / SUM(review_count) as avg_food_quality,
+                SUM(seating_arrangement_sum) * 1.0 / SUM(review_count) as avg_seating,
+                SUM(parking_sum) * 1.0 / SUM(review_count) as avg_parking,
+                SUM(washroom_sum) * 1.0 / SUM(review_count) as avg_washroom,
+                SUM(hotel_service_sum) * 1.0 / SUM(review_count) as avg_service,
+                SUM(food_quality_sum + seating_arrangement_sum + parking_sum + washroom_sum + hotel_service_sum)
+                    / 5.0 / SUM(review_count) as avg_overall
+            FROM daily_stats
+            WHERE property_id = ?
+        """, (prop['id'],))
         stats = cur.fetchone()
         
-        # Get recent alerts (last 24 hours)
-        recent_alerts = get_recent_alerts(hours=24)
-        total_alerts = len(recent_alerts)
-        
-        # Get low rating categories
-        low_rating_categories = []
-        if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality']:
-            low_rating_categories.append(f"Food Quality ({stats[1]:.1f}/5)")
-        if stats[2] and stats[2] < ALERT_THRESHOLDS['seating_arrangement']:
-            low_rating_categories.append(f"Seating ({stats[2]:.1f}/5)")
-        if stats[3] and stats[3] < ALERT_THRESHOLDS['parking']:
-            low_rating_categories.append(f"Parking ({stats[3]:.1f}/5)")
-        if stats[4] and stats[4] < ALERT_THRESHOLDS['washroom']:
-            low_rating_categories.append(f"Washroom ({stats[4]:.1f}/5)")
-        if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service']:
-            low_rating_categories.append(f"Service ({stats[5]:.1f}/5)")
-        
-        conn.close()
+        averages = dict(zip(RATING_CATEGORIES + ['overall'], (value or 0 for value in stats[1:])))
+        stats = {
+            'total': stats[0] or 0,
+            'averages': averages,
+            'low': {key: bool(value) and value < prop['thresholds'][key] for key, value in averages.items()},
+        }
         
-        # Create feedback cards
-        feedback_cards = ""
-        for review in reviews:
-            # Format date
-            created_at = review[12]
-            if created_at:
-                try:
-                    date_obj = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                    formatted_date = date_obj.strftime('%d %b %Y, %I:%M %p')
-                    short_date = date_obj.strftime('%Y-%m-%d')
-                except:
-                    formatted_date = created_at[:10] if len(created_at) > 10 else created_at
-                    short_date = created_at[:10] if len(created_at) > 10 else created_at
-            else:
-                formatted_date = "No date"
-                short_date = "No date"
-            
-            # Check if there are any comments
-            has_comments = any([
-                review[2],  # food comments
-                review[4],  # seating comments
-                review[6],  # parking comments
-                review[8],  # washroom comments
-                review[10], # service comments
-                review[11]  # general comments
-            ])
-            
-            # Check for low ratings
-            has_low_rating = any([
-                review[1] < ALERT_THRESHOLDS['food_quality'],
-                review[3] < ALERT_THRESHOLDS['seating_arrangement'],
-                review[5] < ALERT_THRESHOLDS['parking'],
-                review[7] < ALERT_THRESHOLDS['washroom'],
-                review[9] < ALERT_THRESHOLDS['hotel_service']
-            ])
-            
-            # Generate card HTML
-            alert_badge = '<span class="alert-badge">⚠️ Low Rating</span>' if has_low_rating else ''
-            
-            feedback_cards += f'''
-            <div class="feedback-card" id="feedback-{review[0]}">
-                <div class="feedback-header">
-                    <span class="feedback-date"><i class="fas fa-calendar"></i> {formatted_date}</span>
-                    <span class="feedback-id">ID: {review[0]} {alert_badge}</span>
-                </div>
-                
-                <div class="feedback-ratings">
-                    <div class="rating-row {'low-rating' if review[1] < ALERT_THRESHOLDS['food_quality'] else ''}">
-                        <span class="rating-category"><i class="fas fa-utensils"></i> Food Quality:</span>
-                        <span class="rating-stars">{"⭐" * review[1]}</span>
-                        <span class="rating-value">{get_rating_emoji(review[1])} {review[1]}/5</span>
-                    </div>
-                    
-                    <div class="rating-row {'low-rating' if review[3] < ALERT_THRESHOLDS['seating_arrangement'] else ''}">
-                        <span class="rating-category"><i class="fas fa-chair"></i> Seating Arrangement:</span>
-                        <span class="rating-stars">{"⭐" * review[3]}</span>
-                        <span class="rating-value">{get_rating_emoji(review[3])} {review[3]}/5</span>
-                    </div>
-                    
-                    <div class="rating-row {'low-rating' if review[5] < ALERT_THRESHOLDS['parking'] else ''}">
-                        <span class="rating-category"><i class="fas fa-parking"></i> Parking Facility:</span>
-                        <span class="rating-stars">{"⭐" * review[5]}</span>
-                        <span class="rating-value">{get_rating_emoji(review[5])} {review[5]}/5</span>
-                    </div>
-                    
-                    <div class="rating-row {'low-rating' if review[7] < ALERT_THRESHOLDS['washroom'] else ''}">
-                        <span class="rating-category"><i class="fas fa-restroom"></i> Washroom Cleanliness:</span>
-                        <span class="rating-stars">{"⭐" * review[7]}</span>
-                        <span class="rating-value">{get_rating_emoji(review[7])} {review[7]}/5</span>
-                    </div>
-                    
-                    <div class="rating-row {'low-rating' if review[9] < ALERT_THRESHOLDS['hotel_service'] else ''}">
-                        <span class="rating-category"><i class="fas fa-concierge-bell"></i> Hotel Service:</span>
-                        <span class="rating-stars">{"⭐" * review[9]}</span>
-                        <span class="rating-value">{get_rating_emoji(review[9])} {review[9]}/5</span>
-                    </div>
-                </div>
-                
-                <div class="feedback-overall">
-                    <div class="overall-rating">
-                        <strong><i class="fas fa-chart-line"></i> Overall Average:</strong>
-                        <span class="overall-score">{((review[1] + review[3] + review[5] + review[7] + review[9]) / 5):.1f}/5.0</span>
-                    </div>
-                </div>
-            '''
-            
-            # Add comments section if there are any comments
-            if has_comments:
-                feedback_cards += '''
-                <div class="feedback-comments-section">
-                    <h6><i class="fas fa-comment"></i> Comments:</h6>
-                    <div class="comments-grid">
-                '''
-                
-                # Food comments
-                if review[2]:
-                    feedback_cards += f'''
-                    <div class="comment-item">
-                        <span class="comment-label"><i class="fas fa-utensils"></i> Food:</span>
-                        <span class="comment-text">{review[2]}</span>
-                    </div>
-                    '''
-                
-                # Seating comments
-                if review[4]:
-                    feedback_cards += f'''
-                    <div class="comment-item">
-                        <span class="comment-label"><i class="fas fa-chair"></i> Seating:</span>
-                        <span class="comment-text">{review[4]}</span>
-                    </div>
-                    '''
-                
-                # Parking comments
-                if review[6]:
-                    feedback_cards += f'''
-                    <div class="comment-item">
-                        <span class="comment-label"><i class="fas fa-parking"></i> Parking:</span>
-                        <span class="comment-text">{review[6]}</span>
-                    </div>
-                    '''
-                
-                # Washroom comments
-                if review[8]:
-                    feedback_cards += f'''
-                    <div class="comment-item">
-                        <span class="comment-label"><i class="fas fa-restroom"></i> Washroom:</span>
-                        <span class="comment-text">{review[8]}</span>
-                    </div>
-                    '''
-                
-                # Service comments
-                if review[10]:
-                    feedback_cards += f'''
-                    <div class="comment-item">
-                        <span class="comment-label"><i class="fas fa-concierge-bell"></i> Service:</span>
-                        <span class="comment-text">{review[10]}</span>
-                    </div>
-                    '''
-                
-                # General comments
-                if review[11]:
-                    feedback_cards += f'''
-                    <div class="comment-item general-comment">
-                        <span class="comment-label"><i class="fas fa-file-alt"></i> General:</span>
-                        <span class="comment-text">{review[11]}</span>
-                    </div>
-                    '''
-                
-                feedback_cards += '''
-                    </div>
-                </div>
-                '''
-            
-            feedback_cards += '</div>'
+        # Unacknowledged alerts from the last 24 hours (show last 10)
+        recent_alerts = get_recent_alerts(hours=24, include_acknowledged=False, property_id=prop['id'])[:10]
+        for alert_group in recent_alerts:
+            alert_group['date_str'], alert_group['time_str'] = format_alert_time(alert_group['date'])
         
-        # Generate HTML for recent alerts table
-        alerts_table = ""
-        if recent_alerts:
-            alerts_table = """
-            <div class="alert-alerts-section mt-4">
-                <h5><i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i> Recent Low Rating Alerts (Last 24 Hours)</h5>
-                <div class="table-responsive">
-                    <table class="table table-sm table-hover">
-                        <thead>
-                            <tr>
-                                <th>Feedback ID</th>
-                                <th>Time</th>
-                                <th>Low Categories</th>
-                                <th>Rating</th>
-                                <th>Comments</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-            """
-            
-            for alert_group in recent_alerts[:10]:  # Show last 10 alerts
-                feedback_id = alert_group['feedback_id']
-                date_time = alert_group['date']
-                
-                # Format time
-                if date_time:
-                    try:
-                        time_obj = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
-                        time_str = time_obj.strftime('%I:%M %p')
-                        date_str = time_obj.strftime('%b %d')
-                    except:
-                        time_str = date_time[11:16] if len(date_time) > 16 else date_time
-                        date_str = date_time[:10]
-                else:
-                    time_str = ""
-                    date_str = ""
-                
-                # Get low categories
-                low_categories = ", ".join([alert['category'] for alert in alert_group['alerts']])
-                
-                # Get first comment
-                first_comment = alert_group['alerts'][0]['comments'][:50] + "..." if len(alert_group['alerts'][0]['comments']) > 50 else alert_group['alerts'][0]['comments']
-                
-                alerts_table += f"""
-                <tr>
-                    <td><a href="#feedback-{feedback_id}" style="text-decoration: none;">#{feedback_id}</a></td>
-                    <td><small>{date_str}<br>{time_str}</small></td>
-                    <td><span class="badge bg-danger">{low_categories}</span></td>
-                    <td>{alert_group['alerts'][0]['rating']}/5</td>
-                    <td><small>{first_comment}</small></td>
-                </tr>
-                """
-            
-            alerts_table += """
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-            """
-        else:
-            alerts_table = """
-            <div class="alert alert-success mt-4">
-                <i class="fas fa-check-circle"></i> No low rating alerts in the last 24 hours. Good job!
-            </div>
-            """
+        threshold_items = tuple(sorted(prop['thresholds'].items()))
+        cards = [render_feedback_card(review, threshold_items) for review in reviews]
         
-        return f"""
-        <html>
-        <head>
-            <title>Admin Dashboard - {HOTEL_NAME}</title>
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-            <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-            <style>
-                * {{
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                }}
-                
-                body {{
-                    background-color: #f5f7fa;
-                    padding: 20px;
-                    color: #333;
-                }}
-                
-                .container {{
-                    max-width: 1400px;
-                    margin: 0 auto;
-                }}
-                
-                .hotel-header {{
-                    background: linear-gradient(135deg, #0d6efd 0%, #198754 100%);
-                    color: white;
-                    padding: 1.5rem 0;
-                    margin-bottom: 2rem;
-                    border-radius: 15px;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                    text-align: center;
-                }}
-                
-                .hotel-logo {{
-                    width: 180px;
-                    height: 140px;
-                    object-fit: cover;
-                    border-radius: 10px;
-                    border: 3px solid white;
-                    box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                    margin: 15px auto;
-                    display: block;
-                }}
-                
-                .dashboard-header {{
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    margin-bottom: 25px;
-                    flex-wrap: wrap;
-                    gap: 15px;
-                }}
-                
-                .stats-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }}
-                
-                .stat-card {{
-                    background: white;
-                    border-radius: 10px;
-                    padding: 20px;
-                    box-shadow: 0 3px 10px rgba(0,0,0,0.08);
-                    text-align: center;
-                    transition: transform 0.3s;
-                }}
-                
-                .stat-card:hover {{
-                    transform: translateY(-5px);
-                    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-                }}
-                
-                .stat-card.primary {{
-                    border-top: 4px solid #0d6efd;
-                }}
-                
-                .stat-card.success {{
-                    border-top: 4px solid #198754;
-                }}
-                
-                .stat-card.warning {{
-                    border-top: 4px solid #ffc107;
-                }}
-                
-                .stat-card.info {{
-                    border-top: 4px solid #17a2b8;
-                }}
-                
-                .stat-card.danger {{
-                    border-top: 4px solid #dc3545;
-                }}
-                
-                .stat-card.critical {{
-                    border-top: 4px solid #dc3545;
-                    animation: pulse 2s infinite;
-                }}
-                
-                .stat-card h3 {{
-                    font-size: 2.5rem;
-                    margin: 10px 0;
-                    color: #2c3e50;
-                }}
-                
-                .stat-card p {{
-                    color: #7f8c8d;
-                    font-size: 0.9rem;
-                }}
-                
-                .controls {{
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    margin-bottom: 25px;
-                    flex-wrap: wrap;
-                    gap: 15px;
-                    background: white;
-                    padding: 15px 20px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-                }}
-                
-                .filter-group {{
-                    display: flex;
-                    gap: 10px;
-                    align-items: center;
-                }}
-                
-                select, input, button {{
-                    padding: 10px 15px;
-                    border: 1px solid #ddd;
-                    border-radius: 6px;
-                    font-size: 0.95rem;
-                }}
-                
-                button {{
-                    background-color: #3498db;
-                    color: white;
-                    border: none;
-                    cursor: pointer;
-                    transition: background-color 0.3s;
-                }}
-                
-                button:hover {{
-                    background-color: #2980b9;
-                }}
-                
-                .feedback-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fill, minmax(500px, 1fr));
-                    gap: 25px;
-                }}
-                
-                @media (max-width: 768px) {{
-                    .feedback-grid {{
-                        grid-template-columns: 1fr;
-                    }}
-                }}
-                
-                .feedback-card {{
-                    background: white;
-                    border-radius: 12px;
-                    padding: 25px;
-                    box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-                    transition: all 0.3s ease;
-                    border-left: 5px solid #3498db;
-                }}
-                
-                .feedback-card:hover {{
-                    transform: translateY(-5px);
-                    box-shadow: 0 8px 25px rgba(0,0,0,0.12);
-                }}
-                
-                .feedback-header {{
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    margin-bottom: 20px;
-                    padding-bottom: 15px;
-                    border-bottom: 1px solid #eee;
-                }}
-                
-                .feedback-date {{
-                    font-weight: 600;
-                    color: #2c3e50;
-                    font-size: 1.1rem;
-                }}
-                
-                .feedback-id {{
-                    background: #f1f8ff;
-                    color: #0366d6;
-                    padding: 5px 12px;
-                    border-radius: 20px;
-                    font-size: 0.85rem;
-                    font-weight: 600;
-                }}
-                
-                .alert-badge {{
-                    background-color: #dc3545;
-                    color: white;
-                    padding: 3px 8px;
-                    border-radius: 12px;
-                    font-size: 0.8rem;
-                    margin-left: 10px;
-                }}
-                
-                .feedback-ratings {{
-                    margin-bottom: 20px;
-                }}
-                
-                .rating-row {{
-                    display: flex;
-                    align-items: center;
-                    justify-content: space-between;
-                    margin-bottom: 12px;
-                    padding: 10px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                }}
-                
-                .rating-row.low-rating {{
-                    background-color: #ffeaea;
-                    border-left: 4px solid #dc3545;
-                }}
-                
-                .rating-category {{
-                    flex: 1;
-                    font-weight: 500;
-                }}
-                
-                .rating-stars {{
-                    flex: 1;
-                    text-align: center;
-                    color: #ffc107;
-                    font-size: 1.2rem;
-                    letter-spacing: 2px;
-                }}
-                
-                .rating-value {{
-                    flex: 1;
-                    text-align: right;
-                    font-weight: 600;
-                    color: #2c3e50;
-                }}
-                
-                .feedback-overall {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 15px;
-                    border-radius: 10px;
-                    margin-bottom: 20px;
-                    text-align: center;
-                }}
-                
-                .overall-rating {{
-                    font-size: 1.1rem;
-                }}
-                
-                .overall-score {{
-                    background: rgba(255,255,255,0.2);
-                    padding: 5px 15px;
-                    border-radius: 20px;
-                    margin-left: 10px;
-                    font-weight: 700;
-                }}
-                
-                .feedback-comments-section {{
-                    background: #f9f9f9;
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin-top: 20px;
-                }}
-                
-                .comments-grid {{
-                    display: grid;
-                    gap: 15px;
-                    margin-top: 15px;
-                }}
-                
-                .comment-item {{
-                    display: flex;
-                    gap: 15px;
-                    padding: 12px;
-                    background: white;
-                    border-radius: 8px;
-                    border-left: 4px solid #4CAF50;
-                }}
-                
-                .comment-item.general-comment {{
-                    border-left-color: #2196F3;
-                }}
-                
-                .comment-label {{
-                    font-weight: 600;
-                    min-width: 80px;
-                    color: #555;
-                }}
-                
-                .comment-text {{
-                    flex: 1;
-                    color: #333;
-                    line-height: 1.5;
-                }}
-                
-                .no-feedback {{
-                    text-align: center;
-                    padding: 50px 20px;
-                    color: #7f8c8d;
-                    font-size: 1.2rem;
-                }}
-                
-                .no-feedback i {{
-                    font-size: 3rem;
-                    margin-bottom: 20px;
-                    color: #bdc3c7;
-                }}
-                
-                .summary-card {{
-                    background: white;
-                    border-radius: 10px;
-                    padding: 25px;
-                    box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-                    margin-bottom: 30px;
-                }}
-                
-                .summary-header {{
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    margin-bottom: 20px;
-                }}
-                
-                .summary-title {{
-                    font-size: 1.4rem;
-                    font-weight: 600;
-                    color: #2c3e50;
-                }}
-                
-                .summary-stats {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                    gap: 15px;
-                }}
-                
-                .summary-stat {{
-                    text-align: center;
-                    padding: 15px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                    border: 2px solid transparent;
-                }}
-                
-                .summary-stat.border-danger {{
-                    border-color: #dc3545 !important;
-                }}
-                
-                .summary-stat h4 {{
-                    color: #3498db;
-                    margin-bottom: 5px;
-                }}
-                
-                .action-buttons {{
-                    display: flex;
-                    gap: 10px;
-                    flex-wrap: wrap;
-                }}
-                
-                .threshold-info {{
-                    background-color: #fff3cd;
-                    border-left: 4px solid #ffc107;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin-bottom: 20px;
-                }}
-                
-                .threshold-list {{
-                    list-style-type: none;
-                    padding-left: 0;
-                }}
-                
-                .threshold-list li {{
-                    padding: 5px 0;
-                    border-bottom: 1px solid #eee;
-                }}
-                
-                .export-buttons {{
-                    display: flex;
-                    gap: 10px;
-                    margin-top: 20px;
-                }}
-                
-                .alert-alerts-section {{
-                    background-color: #f8f9fa;
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin-top: 30px;
-                    border: 1px solid #dee2e6;
-                }}
-                
-                @keyframes pulse {{
-                    0% {{ box-shadow: 0 0 0 0 rgba(220, 53, 69, 0.4); }}
-                    70% {{ box-shadow: 0 0 0 10px rgba(220, 53, 69, 0); }}
-                    100% {{ box-shadow: 0 0 0 0 rgba(220, 53, 69, 0); }}
-                }}
-                
-                @media (max-width: 768px) {{
-                    .hotel-logo {{
-                        width: 150px;
-                        height: 120px;
-                    }}
-                    .dashboard-header {{
-                        flex-direction: column;
-                        align-items: stretch;
-                    }}
-                    .action-buttons {{
-                        justify-content: center;
-                    }}
-                    .export-buttons {{
-                        flex-direction: column;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <!-- Hotel Header -->
-                <div class="hotel-header">
-                    <h2><i class="fas fa-user-shield"></i> Admin Dashboard - {HOTEL_NAME}</h2>
-                    <p class="lead mb-0">Feedback System with Alerts & Export</p>
-                    <div class="mt-3">
-                        <img src="/static/{HOTEL_LOGO}" alt="{HOTEL_NAME} Logo" class="hotel-logo">
-                    </div>
-                    <small class="d-block mt-2">Mobile Access: http://{LOCAL_IP}:5000/admin</small>
-                </div>
-                
-                <!-- Dashboard Header -->
-                <div class="dashboard-header">
-                    <h3><i class="fas fa-chart-bar"></i> Feedback Overview</h3>
-                    <div class="action-buttons">
-                        <a href="/generate_qr" class="btn btn-success">
-                            <i class="fas fa-qrcode"></i> View QR Code
-                        </a>
-                        <a href="/test_email" class="btn btn-info">
-                            <i class="fas fa-envelope"></i> Test Email
-                        </a>
-                        <a href="/" class="btn btn-primary">
-                            <i class="fas fa-home"></i> Home
-                        </a>
-                        <a href="/review" class="btn btn-warning">
-                            <i class="fas fa-plus"></i> Test Form
-                        </a>
-                    </div>
-                </div>
-                
-                <!-- Threshold Information -->
-                <div class="threshold-info">
-                    <h5><i class="fas fa-exclamation-circle" style="color: #ffc107;"></i> Alert Thresholds</h5>
-                    <p>Alerts are triggered when ratings fall below these thresholds:</p>
-                    <div class="row">
-                        <div class="col-md-6">
-                            <ul class="threshold-list">
-                                <li><strong>Food Quality:</strong> Below {ALERT_THRESHOLDS['food_quality']}/5</li>
-                                <li><strong>Seating Arrangement:</strong> Below {ALERT_THRESHOLDS['seating_arrangement']}/5</li>
-                                <li><strong>Parking Facility:</strong> Below {ALERT_THRESHOLDS['parking']}/5</li>
-                            </ul>
-                        </div>
-                        <div class="col-md-6">
-                            <ul class="threshold-list">
-                                <li><strong>Washroom Cleanliness:</strong> Below {ALERT_THRESHOLDS['washroom']}/5</li>
-                                <li><strong>Hotel Service:</strong> Below {ALERT_THRESHOLDS['hotel_service']}/5</li>
-                                <li><strong>Overall Average:</strong> Below {ALERT_THRESHOLDS['overall']}/5</li>
-                            </ul>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Statistics Grid -->
-                <div class="stats-grid">
-                    <div class="stat-card primary">
-                        <i class="fas fa-comments fa-2x mb-3" style="color: #0d6efd;"></i>
-                        <h3>{stats[0] or 0}</h3>
-                        <p>Total Feedbacks</p>
-                    </div>
-                    
-                    <div class="stat-card {'critical' if stats[6] and stats[6] < ALERT_THRESHOLDS['overall'] else 'success'}">
-                        <i class="fas fa-star fa-2x mb-3" style="color: {'#dc3545' if stats[6] and stats[6] < ALERT_THRESHOLDS['overall'] else '#198754'}"></i>
-                        <h3>{'%.1f' % (stats[6] or 0) if stats[6] else '0.0'}/5.0</h3>
-                        <p>Overall Average</p>
-                        {'<small style="color: #dc3545;">⚠️ Below threshold</small>' if stats[6] and stats[6] < ALERT_THRESHOLDS['overall'] else ''}
-                    </div>
-                    
-                    <div class="stat-card {'critical' if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality'] else 'warning'}">
-                        <i class="fas fa-utensils fa-2x mb-3" style="color: {'#dc3545' if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality'] else '#ffc107'}"></i>
-                        <h3>{'%.1f' % (stats[1] or 0) if stats[1] else '0.0'}/5.0</h3>
-                        <p>Food Quality Avg</p>
-                    </div>
-                    
-                    <div class="stat-card {'critical' if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service'] else 'info'}">
-                        <i class="fas fa-concierge-bell fa-2x mb-3" style="color: {'#dc3545' if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service'] else '#17a2b8'}"></i>
-                        <h3>{'%.1f' % (stats[5] or 0) if stats[5] else '0.0'}/5.0</h3>
-                        <p>Service Avg</p>
-                    </div>
-                </div>
-                
-                <!-- Export Buttons -->
-                <div class="export-buttons">
-                    <a href="/admin/export/csv" class="btn btn-success">
-                        <i class="fas fa-file-csv"></i> Export All Data to CSV
-                    </a>
-                    <a href="/admin/export/recent_alerts_csv" class="btn btn-danger">
-                        <i class="fas fa-exclamation-triangle"></i> Export Recent Alerts to CSV
-                    </a>
-                </div>
-                
-                <!-- Recent Alerts Section -->
-                {alerts_table}
-                
-                <!-- Summary Card -->
-                <div class="summary-card">
-                    <div class="summary-header">
-                        <div class="summary-title"><i class="fas fa-chart-line"></i> Category Averages</div>
-                        <small>Based on {stats[0] or 0} feedback submissions</small>
-                    </div>
-                    <div class="summary-stats">
-                        <div class="summary-stat {'border-danger' if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality'] else ''}">
-                            <h4 style="color: {'#dc3545' if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality'] else '#3498db'}">
-                                {'%.1f' % (stats[1] or 0) if stats[1] else '0.0'}/5.0
-                                {'<i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i>' if stats[1] and stats[1] < ALERT_THRESHOLDS['food_quality'] else ''}
-                            </h4>
-                            <p><i class="fas fa-utensils"></i> Food Quality</p>
-                        </div>
-                        <div class="summary-stat {'border-danger' if stats[2] and stats[2] < ALERT_THRESHOLDS['seating_arrangement'] else ''}">
-                            <h4 style="color: {'#dc3545' if stats[2] and stats[2] < ALERT_THRESHOLDS['seating_arrangement'] else '#3498db'}">
-                                {'%.1f' % (stats[2] or 0) if stats[2] else '0.0'}/5.0
-                                {'<i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i>' if stats[2] and stats[2] < ALERT_THRESHOLDS['seating_arrangement'] else ''}
-                            </h4>
-                            <p><i class="fas fa-chair"></i> Seating Arrangement</p>
-                        </div>
-                        <div class="summary-stat {'border-danger' if stats[3] and stats[3] < ALERT_THRESHOLDS['parking'] else ''}">
-                            <h4 style="color: {'#dc3545' if stats[3] and stats[3] < ALERT_THRESHOLDS['parking'] else '#3498db'}">
-                                {'%.1f' % (stats[3] or 0) if stats[3] else '0.0'}/5.0
-                                {'<i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i>' if stats[3] and stats[3] < ALERT_THRESHOLDS['parking'] else ''}
-                            </h4>
-                            <p><i class="fas fa-parking"></i> Parking Facility</p>
-                        </div>
-                        <div class="summary-stat {'border-danger' if stats[4] and stats[4] < ALERT_THRESHOLDS['washroom'] else ''}">
-                            <h4 style="color: {'#dc3545' if stats[4] and stats[4] < ALERT_THRESHOLDS['washroom'] else '#3498db'}">
-                                {'%.1f' % (stats[4] or 0) if stats[4] else '0.0'}/5.0
-                                {'<i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i>' if stats[4] and stats[4] < ALERT_THRESHOLDS['washroom'] else ''}
-                            </h4>
-                            <p><i class="fas fa-restroom"></i> Washroom Cleanliness</p>
-                        </div>
-                        <div class="summary-stat {'border-danger' if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service'] else ''}">
-                            <h4 style="color: {'#dc3545' if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service'] else '#3498db'}">
-                                {'%.1f' % (stats[5] or 0) if stats[5] else '0.0'}/5.0
-                                {'<i class="fas fa-exclamation-triangle" style="color: #dc3545;"></i>' if stats[5] and stats[5] < ALERT_THRESHOLDS['hotel_service'] else ''}
-                            </h4>
-                            <p><i class="fas fa-concierge-bell"></i> Hotel Service</p>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Controls -->
-                <div class="controls">
-                    <div>
-                        <h5 style="margin: 0;"><i class="fas fa-list"></i> All Feedback Entries ({len(reviews)})</h5>
-                        <small style="color: #7f8c8d;">Showing most recent first</small>
-                    </div>
-                    <div class="filter-group">
-                        <select id="filterCategory">
-                            <option value="all">All Categories</option>
-                            <option value="food">Food Quality</option>
-                            <option value="seating">Seating</option>
-                            <option value="parking">Parking</option>
-                            <option value="washroom">Washroom</option>
-                            <option value="service">Service</option>
-                        </select>
-                        <input type="text" id="searchInput" placeholder="Search feedback...">
-                        <button onclick="filterFeedback()"><i class="fas fa-filter"></i> Filter</button>
-                    </div>
-                </div>
-                
-                <!-- Feedback Cards Grid -->
-                <div class="feedback-grid">
-                    {feedback_cards if feedback_cards else '''
-                    <div class="no-feedback">
-                        <i class="fas fa-inbox"></i>
-                        <h3>No feedback yet</h3>
-                        <p>No feedback submissions have been received.</p>
-                        <p>Generate QR code and share with customers to collect feedback.</p>
-                        <a href="/generate_qr" class="btn btn-primary mt-3"><i class="fas fa-qrcode"></i> Generate QR Code</a>
-                    </div>
-                    '''}
-                </div>
-                
-                <!-- Footer -->
-                <div class="text-center mt-5 mb-3" style="color: #7f8c8d;">
-                    <small>{HOTEL_NAME} &copy; 2024 - Feedback Management System v2.0</small>
-                    <br><small>Features: CSV Export | Email Alerts | Rating Thresholds</small>
-                </div>
-            </div>
-            
-            <script>
-                function filterFeedback() {{
-                    const category = document.getElementById('filterCategory').value;
-                    const searchTerm = document.getElementById('searchInput').value.toLowerCase();
-                    const cards = document.querySelectorAll('.feedback-card');
-                    
-                    cards.forEach(card => {{
-                        const cardText = card.textContent.toLowerCase();
-                        const hasSearchTerm = searchTerm === '' || cardText.includes(searchTerm);
-                        
-                        let hasCategory = true;
-                        if (category !== 'all') {{
-                            const categoryKeywords = {{
-                                'food': ['food', 'utensils'],
-                                'seating': ['seating', 'chair'],
-                                'parking': ['parking'],
-                                'washroom': ['washroom', 'restroom'],
-                                'service': ['service', 'concierge']
-                            }};
-                            
-                            const keywords = categoryKeywords[category] || [];
-                            hasCategory = keywords.some(keyword => cardText.includes(keyword));
-                        }}
-                        
-                        if (hasSearchTerm && hasCategory) {{
-                            card.style.display = 'block';
-                        }} else {{
-                            card.style.display = 'none';
-                        }}
-                    }});
-                }}
-                
-                // Add keyboard shortcut for search (Ctrl+F)
-                document.addEventListener('keydown', function(e) {{
-                    if (e.ctrlKey && e.key === 'f') {{
-                        e.preventDefault();
-                        document.getElementById('searchInput').focus();
-                    }}
-                }});
-            </script>
-        </body>
-        </html>
-        """
+        return render_template(
+            'admin.html',
+            properties=list(load_properties()['by_id'].values()),
+            current_property=prop,
+            stats=stats,
+            recent_alerts=recent_alerts,
+            rating_categories=ADMIN_RATING_CATEGORIES,
+            cards=cards,
+            filters=filters,
+            active_filters=active_filters,
+            filter_query=filter_query,
+            page_size=page_size,
+            prev_cursor=prev_cursor,
+            next_cursor=next_cursor,
+        )
+    except ValueError as e:
+        # Bad filter input (e.g. min_rating=abc), as the JSON API answers it
+        return admin_error_page(e), 400
     except Exception as e:
-        return f"""
+        logger.exception("Error loading admin dashboard")
+        return admin_error_page(e)
+
+def admin_error_page(error):
+    return f"""
         <html>
         <head>
             <title>Admin Error</title>
         </head>
         <body>
             <h2>Admin Error</h2>
-            <p>Error: {str(e)}</p>
+            <p>Error: {escape(str(error))}</p>
             <a href="/">Home</a>
         </body>
         </html>
         """
 
+# ------------------- JSON API (v1) -------------------
+# Fields clients may request with ?fields=, mapped to their SQL expressions
+API_REVIEW_FIELDS = {
+    'id': 'id',
+    'food_quality': 'food_quality',
+    'food_quality_comments': 'food_quality_comments',
+    'seating_arrangement': 'seating_arrangement',
+    'seating_arrangement_comments': 'seating_arrangement_comments',
+    'parking': 'parking',
+    'parking_comments': 'parking_comments',
+    'washroom': 'washroom',
+    'washroom_comments': 'washroom_comments',
+    'hotel_service': 'hotel_service',
+    'hotel_service_comments': 'hotel_service_comments',
+    'general_comments': 'general_comments',
+    'location': 'location',
+    'overall': '(food_quality + seating_arrangement + parking + washroom + hotel_service) / 5.0',
+    'created_at': 'created_at',
+}
+API_ALERT_FIELDS = {
+    'id': 'id',
+    'feedback_id': 'feedback_id',
+    'category': 'category',
+    'rating': 'rating',
+    'threshold': 'threshold',
+    'created_at': 'created_at',
+    'acknowledged': 'acknowledged',
+}
+
+def api_error(message, status=400):
+    return jsonify({'error': message}), status
+
+def parse_api_fields(allowed):
+    """Validate ?fields=a,b,c against allowed; default is every field"""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(allowed)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def api_keyset_page(table, fields, field_sql, conditions, params):
+    """Run a newest-first keyset query on table (or a join, see
+    review_filter_conditions) and return the JSON payload.
+
+    created_at and id are always selected so the next cursor can be built,
+    but only the requested fields are returned.
+    """
+    limit = get_page_size(request.args.get('limit', ADMIN_PAGE_SIZE))
+    conditions, params = list(conditions), list(params)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError("Invalid cursor")
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(position)
+    
+    columns = ', '.join(f"{field_sql[field]} AS {field}" for field in fields)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur = get_db().cursor()
+    cur.execute(f"""
+        SELECT created_at AS _created_at, id AS _id, {columns}
+        FROM {table} {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """, params + [limit + 1])
+    rows = cur.fetchall()
+    
+    next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+    data = [dict(zip(fields, row[2:])) for row in rows[:limit]]
+    return jsonify({'data': data, 'next_cursor': next_cursor})
+
+def api_date_conditions(column='created_at'):
+    start, end = parse_export_date_range(request.args)
+    conditions, params = [], []
+    if start:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        conditions.append(f"{column} < ?")
+        params.append(end)
+    return conditions, params
+
+@app.route("/api/v1/reviews")
+@admin_required
+def api_reviews():
+    """One property's reviews (?property=), newest first. Filters: see
+    review_filter_conditions(). Paging: limit, cursor. Projection: fields."""
+    try:
+        fields = parse_api_fields(API_REVIEW_FIELDS)
+        source, conditions, params = review_filter_conditions(request.args, current_property()['id'])
+        return api_keyset_page(source, fields, API_REVIEW_FIELDS, conditions, params)
+    except ValueError as e:
+        return api_error(str(e))
+
+@app.route("/api/v1/alerts")
+@admin_required
+def api_alerts():
+    """One property's alerts (?property=), newest first. Filters: start_date,
+    end_date, category, acknowledged=0|1. Paging: limit, cursor. Projection: fields."""
+    try:
+        fields = parse_api_fields(API_ALERT_FIELDS)
+        conditions, params = api_date_conditions()
+        conditions.insert(0, "property_id = ?")
+        params.insert(0, current_property()['id'])
+        
+        if request.args.get('category'):
+            conditions.append("category = ?")
+            params.append(request.args['category'])
+        if request.args.get('acknowledged') in ('0', '1'):
+            conditions.append("acknowledged = ?")
+            params.append(int(request.args['acknowledged']))
+        
+        return api_keyset_page('alerts', fields, API_ALERT_FIELDS, conditions, params)
+    except ValueError as e:
+        return api_error(str(e))
+
+@app.route("/api/v1/stats")
+@admin_required
+def api_stats():
+    """One property's totals, averages, histograms and low-rating counts from
+    daily_stats. Filters: start_date, end_date, category, location. Projection: fields."""
+    try:
+        start, end = parse_export_date_range(request.args)
+        categories = RATING_CATEGORIES
+        if request.args.get('category'):
+            if request.args['category'] not in RATING_CATEGORIES:
+                raise ValueError(f"Unknown category: {request.args['category']}")
+            categories = [request.args['category']]
+        fields = parse_api_fields(['total_reviews', 'overall_average', 'low_rating_count',
+                                   'averages', 'histograms'])
+    except ValueError as e:
+        return api_error(str(e))
+    
+    conditions, params = ["property_id = ?"], [current_property()['id']]
+    if request.args.get('location'):
+        conditions.append("location = ?")
+        params.append(clean_location(request.args['location']))
+    if start:
+        conditions.append("day >= ?")
+        params.append(start[:10])
+    if end:
+        conditions.append("day < ?")
+        params.append(end[:10])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    sums = ', '.join(f"SUM({column})" for column in DAILY_STATS_COLUMNS)
+    cur = get_db().cursor()
+    cur.execute(f"SELECT {sums} FROM daily_stats {where}", params)
+    totals = dict(zip(DAILY_STATS_COLUMNS, (value or 0 for value in cur.fetchone())))
+    count = totals['review_count']
+    
+    stats = {
+        'total_reviews': count,
+        'overall_average': round(sum(totals[f'{c}_sum'] for c in RATING_CATEGORIES) / (5 * count), 3) if count else None,
+        'low_rating_count': totals['low_rating_count'],
+        'averages': {c: round(totals[f'{c}_sum'] / count, 3) if count else None for c in categories},
+        'histograms': {c: {str(r): totals[f'{c}_{r}'] for r in range(1, 6)} for c in categories},
+    }
+    return jsonify({field: stats[field] for field in fields})
+
+# ------------------- RATING TRENDS -------------------
+# Per-category means, counts and percentiles by day or week, with a rolling
+# window, so a washroom problem that began last Tuesday stands out against
+# the all-time averages on the dashboard. Everything comes from one grouped
+# query on daily_stats (a row per day, however many reviews there are), and
+# NumPy turns the per-day 1-5 histograms into windowed means and
+# percentiles with no Python loop per day or per review. Results are cached
+# until a new review arrives.
+TRENDS_PERIODS = {'day': 1, 'week': 7}
+TRENDS_DEFAULT_WINDOW = {'day': 7, 'week': 4}  # Periods in the rolling window
+TRENDS_MAX_WINDOW = 90
+TRENDS_DEFAULT_DAYS = 90  # Range shown when no start_date is given
+TRENDS_MAX_DAYS = 3660
+TRENDS_PERCENTILES = (10, 25, 50, 75, 90)
+TRENDS_CACHE_SIZE = 64
+TRENDS_COLUMNS = (['review_count'] + [f'{category}_sum' for category in RATING_CATEGORIES]
+                  + [f'{category}_{rating}' for category in RATING_CATEGORIES for rating in range(1, 6)])
+
+# Every entry belongs to the newest review id it was computed at; a new
+# review (in any worker) moves MAX(id) on and empties the cache
+_trends_cache = {'latest_review_id': None, 'entries': {}}
+_trends_cache_lock = threading.Lock()
+
+def parse_trends_args(args):
+    """Validate ?period=, ?window=, ?start_date=, ?end_date= and ?location="""
+    period = args.get('period', 'day')
+    if period not in TRENDS_PERIODS:
+        raise ValueError(f"Unknown period: {period} (use day or week)")
+    try:
+        window = int(args.get('window', TRENDS_DEFAULT_WINDOW[period]))
+    except ValueError:
+        raise ValueError("window must be a whole number of periods")
+    if not 1 <= window <= TRENDS_MAX_WINDOW:
+        raise ValueError(f"window must be between 1 and {TRENDS_MAX_WINDOW}")
+    
+    start, end = parse_export_date_range(args)
+    end_day = datetime.strptime(end[:10], '%Y-%m-%d').date() if end else datetime.now().date() + timedelta(days=1)
+    if start:
+        start_day = datetime.strptime(start[:10], '%Y-%m-%d').date()
+    else:
+        start_day = end_day - timedelta(days=TRENDS_DEFAULT_DAYS)
+    if not 0 < (end_day - start_day).days <= TRENDS_MAX_DAYS:
+        raise ValueError(f"start_date must be before end_date and at most {TRENDS_MAX_DAYS} days earlier")
+    if period == 'week':
+        # Weeks run Monday to Sunday; widen the range to whole weeks
+        start_day -= timedelta(days=start_day.weekday())
+        end_day += timedelta(days=-end_day.weekday() % 7)
+    return {
+        'period': period,
+        'window': window,
+        'start_day': start_day,
+        'end_day': end_day,  # Exclusive
+        'location': clean_location(args['location']) if args.get('location') else None,
+    }
+
+def fetch_trend_days(cur, property_id, location, first_day, end_day):
+    """daily_stats rows [day, *TRENDS_COLUMNS] summed over locations, oldest first"""
+    conditions, params = ["property_id = ?", "day >= ?", "day < ?"], [property_id, str(first_day), str(end_day)]
+    if location is not None:
+        conditions.append("location = ?")
+        params.append(location)
+    sums = ', '.join(f"SUM({column})" for column in TRENDS_COLUMNS)
+    cur.execute(f"""
+        SELECT day, {sums}
+        FROM daily_stats
+        WHERE {' AND '.join(conditions)}
+        GROUP BY day
+        ORDER BY day
+    """, params)
+    return cur.fetchall()
+
+def histogram_percentiles(histograms, pct):
+    """Nearest-rank percentile of 1-5 ratings from (..., 5) histograms; NaN where empty.
+    Ranks come from each histogram's own total, not the review count, so
+    ratings that missed every bucket can't push the result past 5."""
+    import numpy as np
+    cumulative = histograms.cumsum(axis=-1)
+    totals = cumulative[..., -1:]
+    rank = np.maximum(np.ceil(totals * pct / 100), 1)
+    ratings = np.clip((cumulative < rank).sum(axis=-1) + 1.0, RATING_MIN, RATING_MAX)
+    return np.where(totals[..., 0] > 0, ratings, np.nan)
+
+def _series(values, digits=3):
+    """Floats for JSON, with NaN (no reviews) as null"""
+    return [None if value != value else round(value, digits) for value in values.tolist()]
+
+def compute_trends(cur, property_id, params):
+    """Per-period and rolling statistics for one property, as JSON-ready lists"""
+    import numpy as np  # Heavy import; only the trends pages need it
+    period_days = TRENDS_PERIODS[params['period']]
+    window = params['window']
+    start_day, end_day = params['start_day'], params['end_day']
+    # Load window - 1 extra periods so the first rolling values are complete
+    first_day = start_day - timedelta(days=(window - 1) * period_days)
+    rows = fetch_trend_days(cur, property_id, params['location'], first_day, end_day)
+    
+    days = np.zeros(((end_day - first_day).days, len(TRENDS_COLUMNS)))
+    if rows:
+        offsets = (np.array([str(row[0])[:10] for row in rows], dtype='datetime64[D]')
+                   - np.datetime64(first_day)).astype(int)
+        days[offsets] = np.array([row[1:] for row in rows], dtype=float)
+    periods = days.reshape(-1, period_days, len(TRENDS_COLUMNS)).sum(axis=1)
+    
+    # Rolling sums over the last `window` periods, from one cumulative sum
+    cumulative = np.vstack([np.zeros((1, len(TRENDS_COLUMNS))), periods.cumsum(axis=0)])
+    window_start = np.maximum(np.arange(1, len(periods) + 1) - window, 0)
+    rolling = cumulative[1:] - cumulative[window_start]
+    
+    lead = window - 1  # The extra periods loaded above are not reported
+    periods, rolling = periods[lead:], rolling[lead:]
+    count, rolling_count = periods[:, 0], rolling[:, 0]
+    categories = len(RATING_CATEGORIES)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = periods[:, 1:1 + categories] / count[:, None]
+        rolling_means = rolling[:, 1:1 + categories] / rolling_count[:, None]
+        overall = periods[:, 1:1 + categories].sum(axis=1) / (categories * count)
+        rolling_overall = rolling[:, 1:1 + categories].sum(axis=1) / (categories * rolling_count)
+    # Percentiles describe the rolling window: one day is often too few reviews
+    histograms = rolling[:, 1 + categories:].reshape(-1, categories, 5)
+    percentiles = {pct: histogram_percentiles(histograms, pct) for pct in TRENDS_PERCENTILES}
+    
+    period_starts = np.arange(np.datetime64(start_day), np.datetime64(end_day), period_days)
+    trends = {
+        'period': params['period'],
+        'window': window,
+        'location': params['location'],
+        'start_date': str(start_day),
+        'end_date': str(end_day - timedelta(days=1)),
+        'periods': [str(day) for day in period_starts],
+        'count': count.astype(int).tolist(),
+        'rolling_count': rolling_count.astype(int).tolist(),
+        'overall': {'mean': _series(overall), 'rolling_mean': _series(rolling_overall)},
+        'categories': {},
+    }
+    for index, category in enumerate(RATING_CATEGORIES):
+        trends['categories'][category] = {
+            'mean': _series(means[:, index]),
+            'rolling_mean': _series(rolling_means[:, index]),
+            **{f'p{pct}': _series(values[:, index], 1) for pct, values in percentiles.items()},
+        }
+    return trends
+
+def get_trends(cur, prop, params):
+    """compute_trends(), cached until the next review is stored"""
+    cur.execute("SELECT MAX(id) FROM reviews")
+    latest_review_id = cur.fetchone()[0]
+    key = (prop['id'],) + tuple(sorted(params.items()))
+    with _trends_cache_lock:
+        if _trends_cache['latest_review_id'] != latest_review_id:
+            _trends_cache.update(latest_review_id=latest_review_id, entries={})
+        trends = _trends_cache['entries'].get(key)
+    if trends is None:
+        trends = compute_trends(cur, prop['id'], params)
+        with _trends_cache_lock:
+            if _trends_cache['latest_review_id'] == latest_review_id:
+                entries = _trends_cache['entries']
+                if len(entries) >= TRENDS_CACHE_SIZE:
+                    entries.clear()
+                entries[key] = trends
+    return trends
+
+def sparkline_points(values, width=160, height=36):
+    """SVG polyline points for a 1-5 rating series; gaps (None) are skipped"""
+    step = width / max(len(values) - 1, 1)
+    return ' '.join(f"{i * step:.1f},{(5 - value) / 4 * height:.1f}"
+                    for i, value in enumerate(values) if value is not None)
+
+@app.route("/admin/trends")
+@admin_required
+def admin_trends():
+    prop = current_property()
+    context = {
+        'current_property': prop,
+        'properties': list(load_properties()['by_id'].values()),
+        'rating_categories': ADMIN_RATING_CATEGORIES,
+        'args': request.args,
+    }
+    try:
+        params = parse_trends_args(request.args)
+    except ValueError as e:
+        return render_template('trends.html', error=str(e), trends=None, **context), 400
+    trends = get_trends(get_db().cursor(), prop, params)
+    
+    # A card per category with its latest rolling mean and a sparkline
+    summaries = []
+    for category in ADMIN_RATING_CATEGORIES + [{'key': 'overall', 'label': 'Overall', 'icon': 'fa-star'}]:
+        series = trends['overall'] if category['key'] == 'overall' else trends['categories'][category['key']]
+        latest = next((value for value in reversed(series['rolling_mean']) if value is not None), None)
+        summaries.append({
+            **category,
+            'latest': latest,
+            'low': latest is not None and latest < prop['thresholds'][category['key']],
+            'points': sparkline_points(series['rolling_mean']),
+        })
+    # Newest period first in the table
+    rows = [{'period': trends['periods'][i],
+             'count': trends['count'][i],
+             'rolling_count': trends['rolling_count'][i],
+             'means': {key: series['rolling_mean'][i] for key, series in trends['categories'].items()},
+             'medians': {key: series['p50'][i] for key, series in trends['categories'].items()}}
+            for i in reversed(range(len(trends['periods'])))]
+    return render_template('trends.html', error=None, trends=trends, summaries=summaries, rows=rows, **context)
+
+@app.route("/api/v1/trends")
+@admin_required
+def api_trends():
+    """One property's rating trends (?property=). Options: period=day|week,
+    window (periods), start_date, end_date, location. Series are oldest first."""
+    try:
+        params = parse_trends_args(request.args)
+    except ValueError as e:
+        return api_error(str(e))
+    return jsonify(get_trends(get_db().cursor(), current_property(), params))
+
 # ------------------- SERVE STATIC FILES -------------------
+STATIC_MAX_AGE = 3600  # The logo may be replaced, so revalidate hourly
+
 @app.route("/static/<path:filename>")
 def serve_static(filename):
-    return send_from_directory(STATIC_FOLDER, filename)
+    entry = load_blob('static', filename)
+    if entry is None:
+        abort(404)
+    data, etag = entry
+    
+    response = Response(data, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_MAX_AGE
+    return response.make_conditional(request)
 
 # ------------------- SERVE QR FILES -------------------
 @app.route("/qr_codes/<filename>")
 def serve_qr(filename):
-    return send_from_directory(QR_FOLDER, filename)
+    entry = load_qr_file(filename)
+    if entry is None:
+        abort(404)
+    png, etag, content_addressed = entry
+    
+    response = Response(png, mimetype="image/png")
+    response.set_etag(etag)  # Strong ETag over the PNG bytes
+    response.cache_control.public = True
+    if content_addressed:
+        response.cache_control.max_age = QR_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = QR_FILE_MAX_AGE
+    return response.make_conditional(request)
+
+# ------------------- HEALTH CHECKS -------------------
+def check_database():
+    get_db().execute("SELECT 1").fetchone()
+
+@app.route("/healthz")
+def healthz():
+    """Liveness: the worker is up and answering requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: database and blob store are reachable.
+
+    A 503 tells the load balancer to stop routing traffic to this instance.
+    """
+    checks = {}
+    for name, backend, check in [('database', storage.name, check_database),
+                                 ('blob_store', blob_store.name, blob_store.check)]:
+        started = time.perf_counter()
+        try:
+            check()
+            checks[name] = {'status': 'ok', 'backend': backend}
+        except Exception as e:
+            checks[name] = {'status': 'error', 'backend': backend, 'error': str(e)}
+        checks[name]['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    
+    ready = all(check['status'] == 'ok' for check in checks.values())
+    response = jsonify({'status': 'ok' if ready else 'unavailable', 'checks': checks})
+    response.status_code = 200 if ready else 503
+    response.cache_control.no_store = True
+    return response
 
 # ------------------- INITIALIZE & RUN -------------------
 if __name__ == "__main__":
-    # Check if hotel logo exists
-    logo_path = os.path.join(STATIC_FOLDER, HOTEL_LOGO)
-    if not os.path.exists(logo_path):
-        print(f"⚠️ Warning: Hotel logo '{HOTEL_LOGO}' not found in static folder.")
-        print(f"📁 Please place the image in: {STATIC_FOLDER}")
-        print("Using placeholder image...")
+    create_app()
     
-    # Check and fix database
-    check_and_fix_db()
+    # Check if hotel logo exists
+    if blob_store.version('static', HOTEL_LOGO) is None:
+        logger.warning("Hotel logo %r not found; place it in %s. Using a placeholder image.",
+                       HOTEL_LOGO, STATIC_FOLDER)
     
-    # Test email configuration
-    email_test_result = test_email_config()
+    # The SMTP login can take seconds; check it without holding up startup
+    def report_email_config():
+        if not test_email_config():
+            logger.warning("Email alerts may not work: for Gmail, put a 16-character App Password "
+                           "(not the regular password) in EMAIL_CONFIG['sender_password'] and set "
+                           "EMAIL_CONFIG['enable_emails'] = True")
+    threading.Thread(target=report_email_config, name='email-check', daemon=True).start()
     
     print("\n" + "="*60)
     print(f"🚀 {HOTEL_NAME} - Hotel Feedback System Starting...")
     print(f"🏨 Hotel Logo: {HOTEL_LOGO}")
-    print(f"📧 Email Status: {'✅ CONFIGURED' if email_test_result else '❌ NOT CONFIGURED'}")
+    print(f"📧 Email Status: checking in the background (see the log)")
     print(f"📊 Admin Dashboard: Enhanced with CSV Export & Alerts")
     print(f"📈 Alert Thresholds: Food={ALERT_THRESHOLDS['food_quality']}, Service={ALERT_THRESHOLDS['hotel_service']}")
     print(f"📧 Email Alerts: {'ENABLED' if EMAIL_CONFIG['enable_emails'] else 'DISABLED (configure EMAIL_CONFIG to enable)'}")
@@ -2496,16 +3898,8 @@ if __name__ == "__main__":
     print(f"📧 Email Test: /test_email (Admin only)")
     print(f"💻 Local Access: http://127.0.0.1:5000")
     print(f"🌍 QR Codes Work Globally: {BASE_URL}")
-    print(f"💻 Local Testing: http://{LOCAL_IP}:5000")
+    print(f"💻 Local Testing: http://{get_local_ip()}:5000")
     print(f"🔒 Admin Login: admin / harshal@2002")
     print("="*60 + "\n")
     
-    if not email_test_result:
-        print("⚠️  EMAIL ALERTS MAY NOT WORK!")
-        print("   To fix email issues:")
-        print("   1. For Gmail, create an App Password (not regular password)")
-        print("   2. Update EMAIL_CONFIG['sender_password'] with the 16-character App Password")
-        print("   3. Make sure EMAIL_CONFIG['enable_emails'] is set to True")
-        print("\n   You can still test the system, but emails won't be sent until fixed.\n")
-    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
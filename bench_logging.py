@@ -0,0 +1,107 @@
+"""
+Per-request cost of logging on POST /review.
+
+Swaps stdout for a sink where every write takes --write-latency-us, like a
+log pipe whose reader (the platform's log collector) is falling behind,
+then posts reviews through the Flask test client and reports latency with
+a fast sink and with the slow one. Run it on two commits to compare
+logging changes:
+
+    python bench_logging.py --requests 2000 --write-latency-us 200
+
+Runs against a throwaway SQLite file.
+"""
+import argparse
+import contextlib
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+
+hotel_app = None  # Imported by main() once stdout is the slow sink
+
+
+class SlowSink:
+    """Write-only stream that blocks for `latency` seconds per write"""
+
+    def __init__(self):
+        self.latency = 0.0
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def review_form():
+    form = {field: str(random.randint(1, 5)) for field in hotel_app.RATING_CATEGORIES}
+    form['general_comments'] = 'Generated by bench_logging.py'
+    form['idempotency_key'] = secrets.token_hex(16)
+    return form
+
+
+def measure(client, sink, total):
+    """POST total reviews; return (sorted latencies, sink writes per request)"""
+    writes_before = sink.writes
+    latencies = []
+    for _ in range(total):
+        started = time.perf_counter()
+        resp = client.post('/review', data=review_form())
+        resp.close()
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies), (sink.writes - writes_before) / total
+
+
+def main():
+    global hotel_app
+    parser = argparse.ArgumentParser(description="Benchmark the per-request cost of logging")
+    parser.add_argument('--requests', type=int, default=2000, help='Reviews posted per run')
+    parser.add_argument('--write-latency-us', type=float, default=200, help='Time each stdout write blocks')
+    args = parser.parse_args()
+
+    # The sink has to be stdout before app.py is imported, since log
+    # handlers keep a reference to the stream they were created with
+    real_stdout, sink = sys.stdout, SlowSink()
+    with contextlib.redirect_stdout(sink):
+        import app as hotel_app
+        hotel_app.EMAIL_CONFIG['enable_emails'] = False  # Low ratings would otherwise try to send mail
+        hotel_app.rate_limit_store = None  # Every request comes from the same client
+        if hotel_app.storage.name == 'sqlite':
+            scratch = os.path.join(tempfile.mkdtemp(prefix='bench_logging_'), 'reviews.db')
+            hotel_app.storage = hotel_app.SQLiteStorage(scratch)
+        hotel_app.migrate_db()
+        client = hotel_app.app.test_client()
+        measure(client, sink, min(200, args.requests))  # Warm up
+
+        results = []
+        for latency_us in [0, args.write_latency_us]:
+            sink.latency = latency_us / 1e6
+            results.append((latency_us,) + measure(client, sink, args.requests))
+        sink.latency = 0
+
+    print(f"\nPOST /review x {args.requests} on {hotel_app.storage.name}", file=real_stdout)
+    print(f"{'write latency':>14s}{'writes/req':>12s}{'mean ms':>10s}{'p50 ms':>10s}{'p99 ms':>10s}",
+          file=real_stdout)
+    for latency_us, latencies, writes in results:
+        mean = sum(latencies) / len(latencies)
+        print(f"{latency_us:>12.0f}us{writes:12.1f}{mean * 1000:10.3f}"
+              f"{percentile(latencies, 50) * 1000:10.3f}{percentile(latencies, 99) * 1000:10.3f}",
+              file=real_stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cost of the rate limiter on the hot path.
+
+First times store.take() on its own, for the in-memory and the shared
+SQLite bucket stores, from one thread and from --threads threads at once.
+Then posts reviews through the Flask test client with the limiter off,
+with each store, and reports the per-request overhead. Clients are spread
+over --clients addresses so the limits themselves never kick in:
+
+    python bench_ratelimit.py --requests 2000 --threads 16
+
+Runs against throwaway SQLite files.
+"""
+import argparse
+import os
+import random
+import secrets
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as hotel_app
+
+RATING_FIELDS = hotel_app.RATING_CATEGORIES
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def review_form():
+    form = {field: str(random.randint(1, 5)) for field in RATING_FIELDS}
+    form['general_comments'] = 'Generated by bench_ratelimit.py'
+    form['idempotency_key'] = secrets.token_hex(16)
+    return form
+
+
+def time_takes(store, calls, threads, clients):
+    """Microseconds per take() (wall time / calls) with `threads` callers"""
+    limit = hotel_app.RATE_LIMITS['review']
+    keys = [f"review:10.0.{i // 250}.{i % 250}" for i in range(clients)]
+
+    def worker(count):
+        for _ in range(count):
+            store.take(random.choice(keys), limit['rate'], limit['burst'])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, [calls // threads] * threads))
+    return (time.perf_counter() - started) / (calls // threads * threads) * 1e6
+
+
+def time_posts(client, total, clients):
+    """Latencies of `total` POST /review from random client addresses"""
+    latencies = []
+    for _ in range(total):
+        address = f"10.1.{random.randrange(clients) // 250}.{random.randrange(250)}"
+        started = time.perf_counter()
+        resp = client.post('/review', data=review_form(), environ_base={'REMOTE_ADDR': address})
+        resp.close()
+        latencies.append(time.perf_counter() - started)
+        assert resp.status_code == 200, resp.status_code
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter overhead")
+    parser.add_argument('--requests', type=int, default=2000, help='Reviews posted per limiter setting')
+    parser.add_argument('--calls', type=int, default=50000, help='take() calls per store and thread count')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent callers for the take() test')
+    parser.add_argument('--rounds', type=int, default=10, help='Times each setting takes a turn')
+    parser.add_argument('--clients', type=int, default=5000, help='Distinct client addresses')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='bench_ratelimit_')
+    stores = {
+        'memory': hotel_app.MemoryRateLimitStore(),
+        'sqlite': hotel_app.SQLiteRateLimitStore(os.path.join(scratch, 'ratelimit.db')),
+    }
+
+    print(f"\ntake() cost, {args.clients} clients")
+    print(f"{'store':10s}{'1 thread us':>14s}{f'{args.threads} threads us':>16s}")
+    for name, store in stores.items():
+        single = time_takes(store, args.calls, 1, args.clients)
+        many = time_takes(store, args.calls, args.threads, args.clients)
+        print(f"{name:10s}{single:14.2f}{many:16.2f}")
+
+    hotel_app.log_handler.target.setStream(open(os.devnull, 'w'))  # Keep request logs out of the report
+    hotel_app.EMAIL_CONFIG['enable_emails'] = False  # Low ratings would otherwise try to send mail
+    hotel_app.storage = hotel_app.SQLiteStorage(os.path.join(scratch, 'reviews.db'))
+    hotel_app.migrate_db()
+    client = hotel_app.app.test_client()
+    hotel_app.rate_limit_store = None
+    time_posts(client, min(200, args.requests), args.clients)  # Warm up
+
+    # Settings take turns, in a new order each round, so the growing reviews
+    # table and any drift in the machine's speed hit them all alike
+    settings = [('off', None)] + list(stores.items())
+    latencies = {name: [] for name, _ in settings}
+    for _ in range(args.rounds):
+        random.shuffle(settings)
+        for name, store in settings:
+            hotel_app.rate_limit_store = store
+            latencies[name] += time_posts(client, args.requests // args.rounds, args.clients)
+
+    print(f"\nPOST /review x {args.requests // args.rounds * args.rounds} per setting")
+    print(f"{'limiter':10s}{'mean ms':>10s}{'p50 ms':>10s}{'p99 ms':>10s}{'overhead us':>14s}")
+    baseline = sum(latencies['off']) / len(latencies['off'])
+    for name, values in latencies.items():
+        values.sort()
+        mean = sum(values) / len(values)
+        print(f"{name:10s}{mean * 1000:10.3f}{percentile(values, 50) * 1000:10.3f}"
+              f"{percentile(values, 99) * 1000:10.3f}{(mean - baseline) * 1e6:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
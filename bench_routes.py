@@ -0,0 +1,306 @@
+"""
+Route benchmarks for the Hotel Feedback System.
+
+Seeds a scratch database with synthetic reviews (and the alerts they
+trigger) at each size, then times the main routes in-process through the
+Flask test client: POST /review, /admin, /api/v1/trends, /admin/export/csv
+and /admin/export/recent_alerts_csv. Reports p50/p95/p99 latency and the
+worker's resident memory (RSS) while each route runs, and writes
+everything to a JSON file so a later run can be compared against it.
+
+Usage:
+    python bench_routes.py --sizes 1000,100000,1000000 --output bench_results.json
+
+Compare a run against an earlier one (lists routes that got slower):
+    python bench_routes.py --sizes 1000,100000 --compare bench_results.json --output new.json
+
+Runs against a throwaway SQLite file. Set DATABASE_URL to benchmark
+PostgreSQL instead; that needs --reset because reviews, alerts and
+daily_stats are emptied first, so only ever point it at a scratch database.
+Latency excludes the network and WSGI server - use loadtest.py for that.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import app as hotel_app
+
+RATING_FIELDS = hotel_app.RATING_CATEGORIES
+ADMIN_HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'admin:harshal@2002').decode('ascii')}
+SEED_BATCH_SIZE = 10000
+RSS_SAMPLE_INTERVAL = 0.01  # Seconds between memory samples while a route runs
+COMMENTS = ['', '', 'Great stay', 'Room was noisy at night', 'Friendly staff, slow check-in',
+            'Washroom needs cleaning', 'Parking was full', 'Food arrived cold']
+
+SEED_REVIEW_SQL = """
+    INSERT INTO reviews
+        (food_quality, food_quality_comments,
+         seating_arrangement, seating_arrangement_comments,
+         parking, parking_comments,
+         washroom, washroom_comments,
+         hotel_service, hotel_service_comments,
+         general_comments, created_at, location)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SEED_ALERT_SQL = """
+    INSERT INTO alerts (feedback_id, category, rating, threshold, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+# ------------------- SEEDING -------------------
+def random_review(days):
+    """One synthetic reviews row, created up to `days` days ago"""
+    row = []
+    for _ in RATING_FIELDS:
+        row += [random.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 4])[0], random.choice(COMMENTS)]
+    created_at = datetime.now() - timedelta(seconds=random.randint(0, days * 86400))
+    row += [random.choice(COMMENTS), created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            random.choice(['', '', '101', '102', '205', 'T1', 'T2'])]
+    return row
+
+
+def alert_rows(cur, after_id):
+    """Alerts rows for every review with id > after_id, as review() would record them"""
+    cur.execute(f"SELECT id, {', '.join(RATING_FIELDS)}, created_at FROM reviews WHERE id > ?", (after_id,))
+    rows = []
+    for review in cur.fetchall():
+        ratings = dict(zip(RATING_FIELDS, review[1:6]))
+        ratings['overall'] = sum(review[1:6]) / len(RATING_FIELDS)
+        for alert in hotel_app.check_alert_thresholds(ratings):
+            rows.append((review[0], alert['key'], alert['rating'], alert['threshold'], review[6]))
+    return rows
+
+
+def count_reviews():
+    conn = hotel_app.storage.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM reviews")
+        return cur.fetchone()
+    finally:
+        hotel_app.storage.release(conn)
+
+
+def seed(target, days):
+    """Top the reviews table up to `target` rows; return seconds taken"""
+    count, max_id = count_reviews()
+    started = time.perf_counter()
+    conn = hotel_app.storage.acquire()
+    try:
+        cur = conn.cursor()
+        while count < target:
+            batch = min(SEED_BATCH_SIZE, target - count)
+            cur.executemany(SEED_REVIEW_SQL, [random_review(days) for _ in range(batch)])
+            cur.executemany(SEED_ALERT_SQL, alert_rows(cur, max_id))
+            conn.commit()
+            cur.execute("SELECT MAX(id) FROM reviews")
+            max_id = cur.fetchone()[0]
+            count += batch
+            print(f"   seeded {count}/{target} reviews", end='\r', flush=True)
+    finally:
+        hotel_app.storage.release(conn)
+    print()
+    return time.perf_counter() - started
+
+
+def reset_database():
+    conn = hotel_app.storage.acquire()
+    try:
+        for table in ['alerts', 'reviews', 'daily_stats']:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+    finally:
+        hotel_app.storage.release(conn)
+
+
+# ------------------- MEASURING -------------------
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource  # Peak rather than current RSS off Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class RSSSampler:
+    """Track the highest RSS seen while the with-block runs"""
+
+    def __init__(self):
+        self.start = self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def review_form():
+    form = {field: str(random.randint(1, 5)) for field in RATING_FIELDS}
+    form['general_comments'] = 'Generated by bench_routes.py'
+    form['idempotency_key'] = secrets.token_hex(16)
+    return form
+
+
+def time_route(client, method, path, requests):
+    """Issue `requests` requests, reading each streamed body to the end"""
+    latencies, errors, body_bytes = [], 0, 0
+    with RSSSampler() as rss:
+        for _ in range(requests):
+            started = time.perf_counter()
+            if method == 'POST':
+                resp = client.post(path, data=review_form())
+            else:
+                resp = client.get(path, headers=ADMIN_HEADERS)
+            size = sum(len(chunk) for chunk in resp.iter_encoded())
+            resp.close()
+            latencies.append(time.perf_counter() - started)
+            errors += resp.status_code != 200
+            body_bytes = size
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'rss_start_mb': round(rss.start, 1),
+        'rss_peak_mb': round(rss.peak, 1),
+        'response_bytes': body_bytes,
+    }
+
+
+def run_size(client, size, args):
+    seed_seconds = seed(size, args.days)
+    routes = [
+        ('POST', '/review', args.requests),
+        ('GET', '/admin', args.requests),
+        ('GET', '/api/v1/trends', args.requests),  # First request computes, the rest hit the cache
+        ('GET', '/admin/export/csv', args.export_requests),
+        ('GET', '/admin/export/recent_alerts_csv', args.export_requests),
+    ]
+    result = {'rows': size, 'seed_seconds': round(seed_seconds, 1), 'routes': {}}
+    for method, path, requests in routes:
+        stats = time_route(client, method, path, requests)
+        name = f"{method} {path}"
+        result['routes'][name] = stats
+        print(f"{size:>9}  {name:38s}{stats['p50_ms']:10.1f}{stats['p95_ms']:10.1f}{stats['p99_ms']:10.1f}"
+              f"{stats['rss_peak_mb']:10.1f}{stats['errors']:8d}")
+    return result
+
+
+# ------------------- REPORTING -------------------
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=hotel_app.BASE_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(baseline_path, results, tolerance):
+    """Print routes whose p95 latency or peak RSS grew by more than tolerance"""
+    with open(baseline_path) as f:
+        baseline = {entry['rows']: entry['routes'] for entry in json.load(f)['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (flagging > {tolerance:.0%} worse):")
+    for entry in results:
+        for name, stats in entry['routes'].items():
+            old = baseline.get(entry['rows'], {}).get(name)
+            if not old:
+                continue
+            for metric in ['p95_ms', 'rss_peak_mb']:
+                if old[metric] and stats[metric] > old[metric] * (1 + tolerance):
+                    regressions += 1
+                    print(f"   {entry['rows']:>9}  {name:38s}{metric:12s}"
+                          f"{old[metric]:10.1f} -> {stats[metric]:.1f}")
+    if not regressions:
+        print("   no regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main routes at several database sizes")
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='Comma-separated review counts')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per size for /review and /admin')
+    parser.add_argument('--export-requests', type=int, default=3, help='Requests per size for the CSV exports')
+    parser.add_argument('--days', type=int, default=90, help='Spread seeded reviews over this many days')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before flagging')
+    parser.add_argument('--reset', action='store_true', help='Empty the DATABASE_URL database before seeding')
+    parser.add_argument('--seed', type=int, default=2002, help='Random seed for the synthetic data')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    hotel_app.log_handler.target.setStream(open(os.devnull, 'w'))  # Keep request logs out of the report
+    hotel_app.EMAIL_CONFIG['enable_emails'] = False  # Low ratings would otherwise try to send mail
+    hotel_app.rate_limit_store = None  # Every request comes from the same client
+    if hotel_app.storage.name == 'sqlite':
+        scratch = os.path.join(tempfile.mkdtemp(prefix='bench_routes_'), 'reviews.db')
+        hotel_app.storage = hotel_app.SQLiteStorage(scratch)
+    elif not args.reset:
+        parser.error("DATABASE_URL is set: pass --reset to empty that (scratch!) database first")
+    hotel_app.migrate_db()
+    if args.reset:
+        reset_database()
+
+    sizes = sorted(int(size) for size in args.sizes.split(',') if size.strip())
+    client = hotel_app.app.test_client()
+    print(f"\n{hotel_app.storage.name}: {args.requests} requests per route "
+          f"({args.export_requests} per export) at {', '.join(map(str, sizes))} reviews")
+    print(f"{'rows':>9}  {'route':38s}{'p50 ms':>10s}{'p95 ms':>10s}{'p99 ms':>10s}{'peak MB':>10s}{'errors':>8s}")
+    results = [run_size(client, size, args) for size in sizes]
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'backend': hotel_app.storage.name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {key: getattr(args, key) for key in ['requests', 'export_requests', 'days', 'seed']},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(args.compare, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
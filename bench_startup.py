@@ -0,0 +1,122 @@
+"""
+Cold-start cost of the Hotel Feedback System.
+
+Starts a fresh interpreter --runs times and measures, in each one, how long
+`import app` takes, then create_app() (schema migration and warm-up), then
+the first GET /review, GET /admin and POST /review through the Flask test
+client. Also runs `python -X importtime -c "import app"` and lists the
+slowest modules app.py imports directly. Point --app-dir at another
+checkout to compare two commits:
+
+    git worktree add /tmp/before HEAD~1
+    python bench_startup.py --app-dir /tmp/before
+    python bench_startup.py
+
+Every run uses a throwaway SQLite file, whatever DATABASE_URL says.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MARKER = 'BENCH_STARTUP '
+PHASES = ['import', 'create_app', 'first GET /review', 'first GET /admin', 'first POST /review']
+
+# Runs in a fresh interpreter so nothing is imported or cached yet
+CHILD = """
+import base64, json, os, secrets, sys, time
+started = time.perf_counter()
+import app as hotel_app
+timings = {'import': time.perf_counter() - started}
+
+hotel_app.EMAIL_CONFIG['enable_emails'] = False
+hotel_app.storage = hotel_app.SQLiteStorage(os.path.join(sys.argv[1], 'reviews.db'))
+started = time.perf_counter()
+if hasattr(hotel_app, 'create_app'):
+    hotel_app.create_app()
+else:  # Commits before the app factory migrated from the __main__ block
+    hotel_app.migrate_db()
+timings['create_app'] = time.perf_counter() - started
+
+client = hotel_app.app.test_client()
+admin = {'Authorization': 'Basic ' + base64.b64encode(b'admin:harshal@2002').decode('ascii')}
+form = {field: '4' for field in ['food_quality', 'seating_arrangement', 'parking', 'washroom', 'hotel_service']}
+form['idempotency_key'] = secrets.token_hex(16)
+for name, call in [('first GET /review', lambda: client.get('/review')),
+                   ('first GET /admin', lambda: client.get('/admin', headers=admin)),
+                   ('first POST /review', lambda: client.post('/review', data=form))]:
+    started = time.perf_counter()
+    resp = call()
+    resp.get_data()
+    resp.close()
+    timings[name] = time.perf_counter() - started
+    assert resp.status_code == 200, (name, resp.status_code)
+print('MARKER' + json.dumps(timings), flush=True)
+""".replace('MARKER', MARKER)
+
+
+def child_env():
+    env = dict(os.environ, LOG_LEVEL='WARNING', METRICS_ENABLED='0')
+    env.pop('DATABASE_URL', None)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    return env
+
+
+def time_startup(app_dir):
+    """Phase timings in seconds from one fresh interpreter"""
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as scratch:
+        proc = subprocess.run([sys.executable, '-c', CHILD, scratch], cwd=app_dir, env=child_env(),
+                              capture_output=True, text=True, timeout=120)
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER):])
+    raise RuntimeError(f"startup run failed:\n{proc.stdout}\n{proc.stderr}")
+
+
+def import_profile(app_dir):
+    """(seconds for `import app`, [(seconds, module)] for the modules app.py imports directly)"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=app_dir,
+                          env=child_env(), capture_output=True, text=True, timeout=120)
+    children = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # A module's imports are listed before it, indented
+        if depth == 1:
+            children.append((int(cumulative) / 1e6, name.strip()))
+        elif depth == 0:
+            if name.strip() == 'app':
+                return int(cumulative) / 1e6, sorted(children, reverse=True)
+            children = []
+    raise RuntimeError(f"import app failed:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import and first-request time")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start; medians are reported')
+    parser.add_argument('--app-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Checkout whose app.py is measured')
+    parser.add_argument('--top', type=int, default=10, help='Heaviest imports to list')
+    args = parser.parse_args()
+
+    runs = [time_startup(args.app_dir) for _ in range(args.runs)]
+    print(f"\n{args.app_dir}: median of {args.runs} fresh interpreters")
+    print(f"{'phase':22s}{'median ms':>12s}{'min ms':>10s}{'max ms':>10s}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:22s}{statistics.median(values):12.1f}{min(values):10.1f}{max(values):10.1f}")
+    to_first_response = [sum(run[phase] for phase in PHASES[:3]) * 1000 for run in runs]
+    print(f"{'import to first page':22s}{statistics.median(to_first_response):12.1f}")
+
+    total, modules = import_profile(args.app_dir)
+    print(f"\n-X importtime: import app takes {total * 1000:.1f} ms; heaviest direct imports:")
+    for seconds, name in modules[:args.top]:
+        print(f"   {seconds * 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Insert throughput of the write-behind review pipeline.
+
+Many threads save reviews at once, first committing each one on its own
+(what /review does by default), then through ReviewWriter group commits
+at each batch size. Reports rows per second, rows per commit and latency.
+
+Usage:
+    python bench_writes.py --reviews 3000 --concurrency 32 --batch-sizes 1,10,50,100
+
+Runs against a throwaway SQLite file. Set DATABASE_URL to benchmark
+PostgreSQL instead - use a scratch database, rows are really inserted.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as hotel_app
+
+RATING_FIELDS = hotel_app.RATING_CATEGORIES
+
+
+def random_feedback():
+    feedback = {field: random.randint(1, 5) for field in RATING_FIELDS}
+    feedback.update({f"{field}_comments": 'Benchmark comment' for field in RATING_FIELDS})
+    feedback['general_comments'] = 'Generated by bench_writes.py'
+    feedback['overall'] = sum(feedback[field] for field in RATING_FIELDS) / len(RATING_FIELDS)
+    return feedback
+
+
+def save_inline(feedback):
+    """One connection, transaction and commit per review, like review()"""
+    storage = hotel_app.storage
+    conn = storage.acquire()
+    try:
+        hotel_app.save_review(conn.cursor(), feedback)
+        conn.commit()
+    finally:
+        storage.release(conn)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(save, total, concurrency):
+    """Run save() total times from concurrency threads; return (elapsed, latencies)"""
+    def timed(feedback):
+        started = time.perf_counter()
+        save(feedback)
+        return time.perf_counter() - started
+
+    feedbacks = [random_feedback() for _ in range(total)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, feedbacks))
+    return time.perf_counter() - started, latencies
+
+
+def report(label, total, elapsed, latencies, rows_per_commit):
+    print(f"{label:14s}{total / elapsed:10.0f}{rows_per_commit:12.1f}"
+          f"{percentile(latencies, 50) * 1000:10.1f}{percentile(latencies, 99) * 1000:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark write-behind batch sizes")
+    parser.add_argument('--reviews', type=int, default=3000, help='Reviews saved per run')
+    parser.add_argument('--concurrency', type=int, default=32, help='Threads submitting at once')
+    parser.add_argument('--batch-sizes', default='1,10,50,100', help='Comma-separated batch sizes')
+    parser.add_argument('--max-delay-ms', type=float, default=hotel_app.WRITE_BEHIND_MAX_DELAY_MS,
+                        help='How long the writer waits to fill a batch')
+    args = parser.parse_args()
+
+    if hotel_app.storage.name == 'sqlite':
+        scratch = os.path.join(tempfile.mkdtemp(prefix='bench_writes_'), 'reviews.db')
+        hotel_app.storage = hotel_app.SQLiteStorage(scratch)
+    hotel_app.migrate_db()
+    print(f"\n{hotel_app.storage.name}: {args.reviews} reviews from {args.concurrency} threads, "
+          f"max delay {args.max_delay_ms:g} ms")
+    print(f"{'mode':14s}{'rows/s':>10s}{'rows/commit':>12s}{'p50 ms':>10s}{'p99 ms':>10s}")
+
+    elapsed, latencies = measure(save_inline, args.reviews, args.concurrency)
+    report('inline', args.reviews, elapsed, latencies, 1)
+
+    for batch_size in [int(size) for size in args.batch_sizes.split(',') if size.strip()]:
+        writer = hotel_app.ReviewWriter(batch_size=batch_size, max_delay_ms=args.max_delay_ms)
+        try:
+            elapsed, latencies = measure(writer.submit, args.reviews, args.concurrency)
+        finally:
+            writer.stop()
+        report(f"batch {batch_size}", args.reviews, elapsed, latencies, writer.rows / max(writer.batches, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Gunicorn settings for the Hotel Feedback System.
+
+The Procfile and render.yaml start the app with it:
+
+    gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+Everything can be tuned with environment variables:
+
+    GUNICORN_WORKER_CLASS   gthread (default), gevent or sync
+    WEB_CONCURRENCY         worker processes (default: 2 x CPUs + 1, max 8)
+    GUNICORN_THREADS        threads per gthread worker (default: 4)
+    GUNICORN_CONNECTIONS    concurrent clients per gevent worker (default: 100)
+    PORT                    port to listen on (default: 8000)
+    PROMETHEUS_MULTIPROC_DIR  where workers write /metrics samples (default:
+                              a private directory made for this master and
+                              removed when it exits)
+    RATE_LIMIT_STORE        memory (default, each worker counts on its own),
+                            sqlite (workers share one count) or off
+
+gthread keeps a slow request (an admin export, an SMTP hiccup) from blocking
+guest submissions on the same worker. gevent suits many slow mobile clients
+but needs `pip install gevent`; SQLite and psycopg2 calls still block the
+worker's event loop, so keep requests short.
+"""
+import atexit
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before app.py is imported (preload_app) so sockets, ssl and
+    # threading in the app and its libraries are all cooperative
+    from gevent import monkey
+    monkey.patch_all()
+
+# ------------------- WORKERS -------------------
+cpu_count = multiprocessing.cpu_count()
+workers = int(os.environ.get('WEB_CONCURRENCY', min(cpu_count * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 100))
+
+# One pooled database connection per thread. gevent workers keep the default
+# pool size; greenlets wait their turn for a PostgreSQL connection.
+if worker_class == 'gthread':
+    os.environ.setdefault('DB_POOL_SIZE', str(threads))
+
+# ------------------- PRELOAD & RECYCLING -------------------
+# Import app.py and run create_app() once in the master: the schema is
+# migrated and templates and the pre-rendered review form are warm before
+# the workers fork. Connection pools and background threads are created per
+# worker after the fork.
+preload_app = True
+
+# Restart each worker after roughly 1000 requests to cap slow memory growth.
+# The jitter keeps workers from all restarting at the same moment.
+max_requests = 1000
+max_requests_jitter = 100
+
+timeout = 30           # Kill a worker stuck for longer than this
+graceful_timeout = 30  # Time to finish in-flight requests on restart
+
+# ------------------- NETWORK -------------------
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Phones on hotel Wi-Fi load the form and post it a minute later over the
+# same connection; keep it open a little longer than the 2s default.
+keepalive = 15
+backlog = 2048
+
+accesslog = '-'
+errorlog = '-'
+# The default format plus the X-Request-ID that the app's own log lines carry
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %({x-request-id}o)s'
+
+# ------------------- METRICS -------------------
+def remove_metrics_dir(master_pid, path):
+    """Remove our metrics directory when the master exits, even when the
+    app fails to load; workers leave through sys.exit() too and must not"""
+    if os.getpid() == master_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Each worker writes its Prometheus samples to files in this directory and
+# /metrics adds them up. It has to exist before preload imports app.py. By
+# default every master gets its own mkdtemp() directory (mode 0700, name not
+# guessable), so instances on one host never share or wipe each other's
+# samples. A configured directory only has its sample files cleared, so
+# counters from a previous run don't leak in. (A HUP re-reads this file with
+# our own directory already in the environment; that one is kept as it is.)
+metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if not metrics_dir:
+    metrics_dir = tempfile.mkdtemp(prefix='hotel_feedback_metrics_')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.environ['HOTEL_FEEDBACK_METRICS_TMPDIR'] = metrics_dir
+    atexit.register(remove_metrics_dir, os.getpid(), metrics_dir)
+elif metrics_dir != os.environ.get('HOTEL_FEEDBACK_METRICS_TMPDIR'):
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(name)
+
+
+def child_exit(server, worker):
+    """Drop the in-flight gauge of a worker that exited or was recycled"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,246 @@
+"""
+Simple load generator for the Hotel Feedback System.
+
+Fires concurrent feedback submissions at a running server and reports
+sustained submissions per second, latency percentiles and errors.
+Optionally mixes in admin dashboard loads and slow clients (phones on weak
+hotel Wi-Fi trickling their form upload), which tie up a sync worker.
+
+Usage (every submission comes from one IP, so switch the rate limiter off):
+    RATE_LIMIT_STORE=off gunicorn -c gunicorn.conf.py 'app:create_app()' &
+    python loadtest.py --url http://127.0.0.1:8000 --requests 1000 --concurrency 16
+
+Compare gunicorn worker classes (starts and stops gunicorn for each one):
+    python loadtest.py --compare sync,gthread,gevent --workers 2 --slow-clients 4
+
+Check that concurrent retries of one submission are stored once:
+    python loadtest.py --retries 4 --requests 400
+"""
+import argparse
+import base64
+import os
+import random
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RATING_FIELDS = ['food_quality', 'seating_arrangement', 'parking', 'washroom', 'hotel_service']
+ADMIN_AUTH = 'Basic ' + base64.b64encode(b'admin:harshal@2002').decode('ascii')
+FEEDBACK_ID_PATTERN = re.compile(rb'Feedback ID: #(\d+)')
+
+
+def random_submission(idempotency_key=None):
+    """Build one form body with random ratings and short comments"""
+    form = {field: str(random.randint(1, 5)) for field in RATING_FIELDS}
+    form['food_quality_comments'] = 'Load test comment'
+    form['general_comments'] = 'Generated by loadtest.py'
+    form['idempotency_key'] = idempotency_key or secrets.token_hex(16)
+    return urllib.parse.urlencode(form).encode('utf-8')
+
+
+def post_review(url, data):
+    """POST one form body and return (latency_seconds, feedback_id or None)"""
+    started = time.perf_counter()
+    feedback_id = None
+    try:
+        req = urllib.request.Request(f"{url}/review", data=data, method='POST')
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            body = resp.read()
+            match = FEEDBACK_ID_PATTERN.search(body)
+            if resp.status == 200 and b'Thank You' in body and match:
+                feedback_id = int(match.group(1))
+    except (urllib.error.URLError, OSError):
+        pass
+    return time.perf_counter() - started, feedback_id
+
+
+def submit_review(url):
+    """POST one review and return (latency_seconds, ok)"""
+    latency, feedback_id = post_review(url, random_submission())
+    return latency, feedback_id is not None
+
+
+def load_admin(url):
+    """GET the admin dashboard and return (latency_seconds, ok)"""
+    started = time.perf_counter()
+    try:
+        req = urllib.request.Request(f"{url}/admin", headers={'Authorization': ADMIN_AUTH})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            ok = resp.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def slow_client(url, stop):
+    """Trickle one submission a byte at a time until stop is set"""
+    parsed = urllib.parse.urlsplit(url)
+    body = random_submission()
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=30) as sock:
+            sock.sendall((f"POST /review HTTP/1.1\r\nHost: {parsed.netloc}\r\n"
+                          "Content-Type: application/x-www-form-urlencoded\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n").encode('ascii'))
+            for i in range(len(body) - 1):
+                if stop.wait(0.5):
+                    return
+                sock.sendall(body[i:i + 1])
+            stop.wait()
+    except OSError:
+        pass
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(url, total, concurrency, admin_every=0, slow_clients=0):
+    """Send the load and return a summary dict for the submissions"""
+    def one(i):
+        if admin_every and i % admin_every == 0:
+            return 'admin', load_admin(url)
+        return 'review', submit_review(url)
+
+    stop = threading.Event()
+    trickles = [threading.Thread(target=slow_client, args=(url, stop), daemon=True)
+                for _ in range(slow_clients)]
+    for trickle in trickles:
+        trickle.start()
+    time.sleep(0.5 if trickles else 0)
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+    finally:
+        stop.set()
+    elapsed = time.perf_counter() - started
+
+    reviews = [result for kind, result in results if kind == 'review']
+    latencies = sorted(latency for latency, _ in reviews)
+    errors = sum(1 for _, (_, ok) in results if not ok)
+    summary = {
+        'requests': total,
+        'reviews': len(reviews),
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': sum(1 for _, ok in reviews if ok) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+    print(f"Requests:     {total} ({concurrency} concurrent, {total - len(reviews)} admin loads, "
+          f"{slow_clients} slow clients)")
+    print(f"Errors:       {errors}")
+    print(f"Elapsed:      {elapsed:.2f}s")
+    print(f"Throughput:   {summary['throughput']:.1f} submissions/s")
+    print(f"Latency p50:  {summary['p50']:.1f} ms")
+    print(f"Latency p95:  {summary['p95']:.1f} ms")
+    print(f"Latency p99:  {summary['p99']:.1f} ms")
+    return summary
+
+
+def check_retries(url, total, copies, concurrency):
+    """Post each submission `copies` times at once with the same token
+
+    Every copy must come back with the same feedback ID; any other outcome
+    means a retry was stored twice (or failed).
+    """
+    bodies = [random_submission(secrets.token_hex(16)) for _ in range(max(1, total // copies))]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [[pool.submit(post_review, url, body) for _ in range(copies)] for body in bodies]
+        outcomes = [{future.result()[1] for future in group} for group in futures]
+    elapsed = time.perf_counter() - started
+
+    stored_once = sum(1 for ids in outcomes if len(ids) == 1 and None not in ids)
+    failed = sum(1 for ids in outcomes if None in ids)
+    duplicated = sum(1 for ids in outcomes if len(ids - {None}) > 1)
+    print(f"Submissions:  {len(bodies)} x {copies} concurrent copies ({concurrency} clients)")
+    print(f"Elapsed:      {elapsed:.2f}s")
+    print(f"Stored once:  {stored_once}")
+    print(f"Duplicated:   {duplicated}")
+    print(f"Failed:       {failed}")
+    return duplicated == 0 and failed == 0
+
+
+# ------------------- WORKER CLASS COMPARISON -------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, server, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/healthz", timeout=2):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not become ready in time")
+
+
+def compare(worker_classes, workers, total, concurrency, admin_every, slow_clients):
+    """Run the same load against gunicorn started with each worker class"""
+    summaries = {}
+    for worker_class in worker_classes:
+        port = free_port()
+        env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class,
+                   WEB_CONCURRENCY=str(workers), PORT=str(port), RATE_LIMIT_STORE='off')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(url, server)
+            print(f"\n=== {worker_class} ({workers} workers) ===")
+            summaries[worker_class] = run(url, total, concurrency, admin_every, slow_clients)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(f"\n{'worker class':14s}{'subs/s':>10s}{'p50 ms':>10s}{'p95 ms':>10s}{'p99 ms':>10s}{'errors':>8s}")
+    for worker_class, summary in summaries.items():
+        print(f"{worker_class:14s}{summary['throughput']:10.1f}{summary['p50']:10.1f}"
+              f"{summary['p95']:10.1f}{summary['p99']:10.1f}{summary['errors']:8d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /review submissions")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running app')
+    parser.add_argument('--requests', type=int, default=500, help='Total submissions to send')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--admin-every', type=int, default=0,
+                        help='Load the admin dashboard instead of submitting every Nth request')
+    parser.add_argument('--slow-clients', type=int, default=0,
+                        help='Extra clients that upload a submission one byte every 0.5s')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='Instead of a load test, post every submission N times concurrently '
+                             'with one idempotency token and check it is stored once')
+    parser.add_argument('--compare', help='Comma-separated gunicorn worker classes to start and compare, '
+                                          'e.g. sync,gthread,gevent (run from the project folder)')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per run with --compare')
+    args = parser.parse_args()
+    if args.retries:
+        sys.exit(0 if check_retries(args.url.rstrip('/'), args.requests, args.retries, args.concurrency) else 1)
+    elif args.compare:
+        compare([name.strip() for name in args.compare.split(',') if name.strip()],
+                args.workers, args.requests, args.concurrency, args.admin_every, args.slow_clients)
+    else:
+        run(args.url.rstrip('/'), args.requests, args.concurrency, args.admin_every, args.slow_clients)
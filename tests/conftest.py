@@ -0,0 +1,83 @@
+"""
+Shared fixtures. Every test runs against a throwaway database with alert
+mail and rate limiting turned off, once on SQLite and once on PostgreSQL.
+The PostgreSQL runs start a local server with pgserver and are skipped
+when it isn't installed:
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import base64
+import os
+import secrets
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as hotel_app  # noqa: E402
+
+hotel_app.log_handler.target.setStream(open(os.devnull, 'w'))  # Keep request logs out of the report
+
+ADMIN_HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'admin:harshal@2002').decode('ascii')}
+
+
+@pytest.fixture(scope='session')
+def postgres_server(tmp_path_factory):
+    """A throwaway PostgreSQL server from pgserver; tests needing it skip without it"""
+    pytest.importorskip('psycopg2')
+    pgserver = pytest.importorskip('pgserver')
+    server = pgserver.get_server(tmp_path_factory.mktemp('pgdata'), cleanup_mode='stop')
+    yield server
+    server.cleanup()
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    """A SQLite database in the test's temporary directory"""
+    storage = hotel_app.SQLiteStorage(str(tmp_path / 'reviews.db'))
+    yield storage
+    storage.pool.close_all()
+
+
+@pytest.fixture
+def postgres_storage(postgres_server):
+    """A fresh database on the session's PostgreSQL server"""
+    name = f"reviews_{secrets.token_hex(4)}"
+    postgres_server.psql(f"CREATE DATABASE {name};")
+    storage = hotel_app.PostgresStorage(postgres_server.get_uri(name))
+    yield storage
+    storage.pool.close_all()
+    postgres_server.psql(f"DROP DATABASE {name} WITH (FORCE);")
+
+
+@pytest.fixture(params=['sqlite', 'postgres'])
+def storage(request):
+    """Each test that uses the database runs once per backend"""
+    return request.getfixturevalue(f"{request.param}_storage")
+
+
+@pytest.fixture
+def hotel(monkeypatch, storage):
+    """The app module, migrated and wired to `storage`"""
+    monkeypatch.setattr(hotel_app, 'storage', storage)
+    monkeypatch.setattr(hotel_app, 'rate_limit_store', None)
+    monkeypatch.setitem(hotel_app.EMAIL_CONFIG, 'enable_emails', False)
+    monkeypatch.setitem(hotel_app._properties, 'expires', 0.0)  # Reload properties from this database
+    hotel_app.migrate_db()
+    yield hotel_app
+    hotel_app._properties['expires'] = 0.0
+
+
+@pytest.fixture
+def client(hotel):
+    return hotel.app.test_client()
+
+
+def review_form(rating=4, idempotency_key=None, **fields):
+    """POST /review form data with every category rated `rating`"""
+    form = {category: str(rating) for category in hotel_app.RATING_CATEGORIES}
+    form['idempotency_key'] = idempotency_key or secrets.token_hex(16)
+    form.update(fields)
+    return form
@@ -0,0 +1,139 @@
+"""
+Admin routes that change data or echo what they were given: acknowledging
+alerts, the room QR batch form and the dashboard filters.
+"""
+import re
+
+import pytest
+
+from conftest import ADMIN_HEADERS, review_form
+
+
+@pytest.fixture
+def low_review(client):
+    """ID of a review whose low food rating raised an alert"""
+    resp = client.post('/review', data=review_form(rating=5, food_quality='1'))
+    feedback_id = int(re.search(r'Feedback ID: #(\d+)', resp.get_data(as_text=True)).group(1))
+    resp.close()
+    return feedback_id
+
+
+def unacknowledged(hotel):
+    conn = hotel.storage.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM alerts WHERE acknowledged = 0")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def dashboard_token(client):
+    """The csrf_token field from the dashboard's Acknowledge form"""
+    resp = client.get('/admin', headers=ADMIN_HEADERS)
+    token = re.search(r'name="csrf_token" value="(\w+)"', resp.get_data(as_text=True)).group(1)
+    resp.close()
+    return token
+
+
+def acknowledge(client, form, **headers):
+    resp = client.post('/admin/alerts/acknowledge', data=form, headers=dict(ADMIN_HEADERS, **headers))
+    resp.close()
+    return resp.status_code
+
+
+def test_acknowledge_from_dashboard_form(hotel, client, low_review):
+    form = {'csrf_token': dashboard_token(client), 'feedback_id': str(low_review)}
+
+    assert acknowledge(client, form, Origin='http://localhost') == 302
+    assert unacknowledged(hotel) == 0
+
+
+def test_acknowledge_without_origin_or_referer(hotel, client, low_review):
+    form = {'csrf_token': dashboard_token(client), 'feedback_id': str(low_review)}
+
+    assert acknowledge(client, form) == 302
+    assert unacknowledged(hotel) == 0
+
+
+@pytest.mark.parametrize('token, headers', [
+    (None, {}),
+    ('0' * 64, {}),
+    ('valid', {'Origin': 'https://evil.example'}),
+    ('valid', {'Referer': 'https://evil.example/page'}),
+    ('valid', {'Origin': 'null'}),
+])
+def test_forged_acknowledge_is_refused(hotel, client, low_review, token, headers):
+    form = {'feedback_id': str(low_review)}
+    if token:
+        form['csrf_token'] = dashboard_token(client) if token == 'valid' else token
+
+    assert acknowledge(client, form, **headers) == 403
+    assert unacknowledged(hotel) == 1
+
+
+@pytest.mark.parametrize('field, value', [
+    ('feedback_id', 'abc'),
+    ('alert_id', '1.5'),
+    ('feedback_id', ''),
+])
+def test_acknowledge_rejects_bad_ids(hotel, client, low_review, field, value):
+    form = {'csrf_token': dashboard_token(client), field: value}
+
+    assert acknowledge(client, form) == 400
+    assert unacknowledged(hotel) == 1
+
+
+def test_qr_batch_form(client):
+    resp = client.get('/admin/qr_batch', headers=ADMIN_HEADERS)
+    page = resp.get_data(as_text=True)
+    resp.close()
+
+    assert resp.status_code == 200
+    assert 'name="start"' in page and 'Invalid range' not in page
+
+
+def test_qr_batch_error_is_escaped(client):
+    resp = client.get('/admin/qr_batch?start=<script>alert(1)</script>&end=5&prefix=T', headers=ADMIN_HEADERS)
+    page = resp.get_data(as_text=True)
+    resp.close()
+
+    assert resp.status_code == 400
+    assert 'Invalid range' in page
+    assert '<script>' not in page and '&lt;script&gt;' in page
+    assert 'value="T"' in page  # The form keeps what was typed
+
+
+@pytest.mark.parametrize('query', ['min_rating=abc', 'start_date=2020-13-01', 'category=password'])
+def test_dashboard_rejects_bad_filters(client, query):
+    resp = client.get(f'/admin?{query}', headers=ADMIN_HEADERS)
+    page = resp.get_data(as_text=True)
+    resp.close()
+
+    assert resp.status_code == 400
+    assert 'Admin Error' in page
+
+
+def test_dashboard_with_filters(client):
+    resp = client.get('/admin?min_rating=2&start_date=2020-12-01&category=parking', headers=ADMIN_HEADERS)
+    resp.close()
+
+    assert resp.status_code == 200
+
+
+def test_abandoned_qr_batch_cancels_pending_renders(hotel, monkeypatch):
+    import concurrent.futures
+    shutdowns = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def shutdown(self, wait=True, **kwargs):
+            shutdowns.append(dict(kwargs, wait=wait))
+            super().shutdown(wait=wait, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', RecordingPool)
+    renders = hotel.render_location_qrs([str(room) for room in range(101, 141)])
+    location, png = next(renders)
+    renders.close()  # As when the client goes away mid-download
+
+    assert location == '101' and png.startswith(b'\x89PNG')
+    assert shutdowns == [{'wait': False, 'cancel_futures': True}]
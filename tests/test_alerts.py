@@ -0,0 +1,104 @@
+"""
+Low-rating alert mail goes out from AlertDispatcher's background thread,
+here through an in-process stand-in for smtplib.SMTP: alerts arriving
+within the batch window make one digest, and a send that fails for a while
+is retried until it gets through with every alert still in it.
+"""
+import smtplib
+
+import pytest
+
+from conftest import review_form
+
+
+class FakeSMTP:
+    """Records what was sent; the first `failures` sends fail as a dropped
+    connection would"""
+    failures = 0
+    connections = 0
+    sent = []
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+
+    def ehlo(self):
+        return 250, b'ok'
+
+    def starttls(self):
+        return 220, b'ready'
+
+    def login(self, user, password):
+        return 235, b'authenticated'
+
+    def noop(self):
+        return 250, b'ok'
+
+    def send_message(self, msg):
+        if FakeSMTP.failures:
+            FakeSMTP.failures -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        FakeSMTP.sent.append(msg)
+
+    def quit(self):
+        return 221, b'bye'
+
+
+@pytest.fixture
+def storage(sqlite_storage):
+    """Alert delivery doesn't depend on the database backend"""
+    return sqlite_storage
+
+
+@pytest.fixture
+def dispatcher(hotel, monkeypatch):
+    """A fresh AlertDispatcher mailing through FakeSMTP, with a batch window
+    long enough that only stop() ends the batch"""
+    monkeypatch.setattr(smtplib, 'SMTP', FakeSMTP)
+    monkeypatch.setattr(FakeSMTP, 'failures', 0)
+    monkeypatch.setattr(FakeSMTP, 'connections', 0)
+    monkeypatch.setattr(FakeSMTP, 'sent', [])
+    monkeypatch.setitem(hotel.EMAIL_CONFIG, 'enable_emails', True)
+    monkeypatch.setattr(hotel, 'ALERT_BATCH_WINDOW', 30.0)
+    monkeypatch.setattr(hotel, 'ALERT_RETRY_BASE_DELAY', 0.01)
+    dispatcher = hotel.AlertDispatcher()
+    monkeypatch.setattr(hotel, 'alert_dispatcher', dispatcher)
+    yield dispatcher
+    dispatcher.stop()
+
+
+def post_low_reviews(client, count):
+    for _ in range(count):
+        resp = client.post('/review', data=review_form(rating=5, food_quality='1'))
+        resp.close()
+        assert resp.status_code == 200
+
+
+def test_alerts_within_the_window_make_one_digest(client, dispatcher):
+    post_low_reviews(client, 3)
+    dispatcher.stop()
+
+    assert len(FakeSMTP.sent) == 1
+    digest = FakeSMTP.sent[0]
+    assert '3 Feedbacks' in digest['Subject']
+    body = digest.get_payload()[0].get_payload(decode=True).decode('utf-8')
+    assert '#1, #2, #3' in body
+
+
+def test_failed_sends_are_retried_with_every_alert(hotel, client, dispatcher):
+    FakeSMTP.failures = hotel.ALERT_MAX_RETRIES - 1
+    post_low_reviews(client, 2)
+    dispatcher.stop()
+
+    assert FakeSMTP.failures == 0
+    assert len(FakeSMTP.sent) == 1
+    assert '2 Feedbacks' in FakeSMTP.sent[0]['Subject']
+    assert FakeSMTP.connections == hotel.ALERT_MAX_RETRIES  # A failed connection is not reused
+
+
+def test_digest_is_dropped_after_the_last_retry(hotel, client, dispatcher):
+    FakeSMTP.failures = hotel.ALERT_MAX_RETRIES
+    post_low_reviews(client, 1)
+    dispatcher.stop()
+
+    assert FakeSMTP.sent == []
+    assert FakeSMTP.connections == hotel.ALERT_MAX_RETRIES
@@ -0,0 +1,123 @@
+"""
+BLOB_STORE=s3 against a local S3 stand-in (moto's server, over real HTTP):
+object round trips, QR codes shared between app instances, and /readyz
+when the bucket can't be reached. Skipped when moto isn't installed.
+"""
+import re
+import socket
+
+import pytest
+
+BUCKET = 'hotel-feedback-test'
+
+
+@pytest.fixture(scope='session')
+def s3_endpoint():
+    moto_server = pytest.importorskip('moto.server')
+    server = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def storage(sqlite_storage):
+    """The database isn't what these tests are about"""
+    return sqlite_storage
+
+
+@pytest.fixture
+def s3_store(hotel, s3_endpoint, monkeypatch, request):
+    """Factory for S3BlobStores under a prefix of the test's own, each with
+    its own client as a separate app instance would have"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    prefix = f"{request.node.name}/"
+
+    def make(endpoint=s3_endpoint):
+        return hotel.S3BlobStore(BUCKET, endpoint, prefix)
+
+    make().client.create_bucket(Bucket=BUCKET)
+    return make
+
+
+def unreachable_endpoint():
+    """An http:// URL on a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def new_instance(hotel, monkeypatch, store):
+    """Point the app at `store` with an empty per-worker blob cache"""
+    monkeypatch.setattr(hotel, 'blob_store', store)
+    monkeypatch.setattr(hotel, '_blob_cache', {})
+
+
+def test_put_get_version_round_trip(s3_store):
+    store = s3_store()
+    assert store.get('qr_codes', '101.png') is None
+    assert store.version('qr_codes', '101.png') is None
+
+    store.put('qr_codes', '101.png', b'first', 'image/png')
+    data, version = store.get('qr_codes', '101.png')
+    assert data == b'first'
+    assert store.version('qr_codes', '101.png') == version
+
+    store.put('qr_codes', '101.png', b'second', 'image/png')
+    data, replaced = store.get('qr_codes', '101.png')
+    assert data == b'second'
+    assert replaced != version
+    assert store.get('static', '101.png') is None  # Namespaces don't overlap
+
+
+def test_keys_cannot_leave_their_namespace(s3_store):
+    store = s3_store()
+    assert store.get('qr_codes', '../static/logo.png') is None
+    with pytest.raises(ValueError):
+        store.put('qr_codes', '../static/logo.png', b'x')
+
+
+def test_qr_rendered_by_one_instance_is_served_by_another(hotel, s3_store, monkeypatch):
+    new_instance(hotel, monkeypatch, s3_store())
+    resp = hotel.app.test_client().get('/generate_qr')
+    qr_file = re.search(r'/qr_codes/(qr_\w+\.png)', resp.get_data(as_text=True)).group(1)
+    resp.close()
+
+    new_instance(hotel, monkeypatch, s3_store())
+
+    def render_qr_png(*args, **kwargs):
+        raise AssertionError("the second instance rendered the QR again")
+
+    monkeypatch.setattr(hotel, 'render_qr_png', render_qr_png)
+    resp = hotel.app.test_client().get(f'/qr_codes/{qr_file}')
+    png = resp.get_data()
+    resp.close()
+
+    assert resp.status_code == 200
+    assert png.startswith(b'\x89PNG')
+    assert png == s3_store().get('qr_codes', qr_file)[0]
+    assert hotel.get_qr_code(f"{hotel.BASE_URL}/review") == qr_file  # Found, not rendered
+
+
+def test_readyz_reports_the_blob_store(hotel, s3_store, monkeypatch):
+    client = hotel.app.test_client()
+
+    new_instance(hotel, monkeypatch, s3_store())
+    resp = client.get('/readyz')
+    check = resp.get_json()['checks']['blob_store']
+    resp.close()
+    assert resp.status_code == 200
+    assert (check['status'], check['backend']) == ('ok', 's3')
+
+    new_instance(hotel, monkeypatch, s3_store(unreachable_endpoint()))
+    resp = client.get('/readyz')
+    body = resp.get_json()
+    resp.close()
+    assert resp.status_code == 503
+    assert body['status'] == 'unavailable'
+    assert body['checks']['blob_store']['status'] == 'error'
+    assert body['checks']['database']['status'] == 'ok'
@@ -0,0 +1,95 @@
+"""
+A guest's double tap, or a retry after a dropped response, posts the same
+idempotency_key more than once, possibly at the same moment. Exactly one
+review and one set of alerts may come of it, and every response must show
+the same feedback ID.
+"""
+import re
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import review_form
+
+CONCURRENT_POSTS = 16
+
+
+@pytest.fixture(params=['direct', 'write-behind'])
+def write_path(request, hotel, monkeypatch):
+    """Reviews saved by the request itself, or batched through a ReviewWriter"""
+    if request.param == 'write-behind':
+        # A short delay makes the duplicates share a batch as well as race it
+        writer = hotel.ReviewWriter(batch_size=100, max_delay_ms=20)
+        monkeypatch.setattr(hotel, 'WRITE_BEHIND', True)
+        monkeypatch.setattr(hotel, 'review_writer', writer)
+        yield request.param
+        writer.stop()
+    else:
+        yield request.param
+
+
+@pytest.fixture
+def dispatched(hotel, monkeypatch):
+    """Feedback IDs whose alerts were handed to the mail dispatcher"""
+    feedback_ids = []
+    monkeypatch.setitem(hotel.EMAIL_CONFIG, 'enable_emails', True)
+    monkeypatch.setattr(hotel.alert_dispatcher, 'enqueue',
+                        lambda alerts, feedback_id, prop: feedback_ids.append(feedback_id))
+    return feedback_ids
+
+
+def count(hotel, table):
+    conn = hotel.storage.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def post_concurrently(hotel, form, posts=CONCURRENT_POSTS):
+    """POST /review `posts` times at once; returns the response bodies"""
+    start = threading.Barrier(posts)
+
+    def post(_):
+        client = hotel.app.test_client()
+        start.wait()
+        resp = client.post('/review', data=form)
+        body = resp.get_data(as_text=True)
+        resp.close()
+        assert resp.status_code == 200
+        return body
+
+    with ThreadPoolExecutor(max_workers=posts) as pool:
+        return list(pool.map(post, range(posts)))
+
+
+def feedback_ids(bodies):
+    ids = [re.search(r'Feedback ID: #(\d+)', body) for body in bodies]
+    assert all(ids), [body for body, found in zip(bodies, ids) if not found][0]
+    return {int(found.group(1)) for found in ids}
+
+
+def test_concurrent_duplicates_save_one_review(hotel, write_path, dispatched):
+    form = review_form(rating=5, food_quality='1', idempotency_key=secrets.token_hex(16))
+
+    ids = feedback_ids(post_concurrently(hotel, form))
+
+    assert len(ids) == 1
+    assert count(hotel, 'reviews') == 1
+    assert count(hotel, 'alerts') == 1  # The low food rating, recorded once
+    assert dispatched == list(ids)
+
+
+def test_distinct_keys_are_not_merged(hotel, write_path, dispatched):
+    bodies = []
+    for _ in range(3):
+        bodies += post_concurrently(hotel, review_form(rating=5, food_quality='1'), posts=4)
+
+    assert len(feedback_ids(bodies)) == 3
+    assert count(hotel, 'reviews') == 3
+    assert count(hotel, 'alerts') == 3
+    assert len(dispatched) == 3
@@ -0,0 +1,128 @@
+"""
+The admin dashboard's hot queries must be index range scans, never a walk
+over the whole reviews table. Each test captures the SQL a real request
+runs (with its parameters filled in) and checks SQLite's EXPLAIN QUERY PLAN.
+"""
+import re
+
+import pytest
+
+from conftest import ADMIN_HEADERS, review_form
+
+
+@pytest.fixture
+def storage(sqlite_storage):
+    """The plans checked here are SQLite's"""
+    return sqlite_storage
+
+
+@pytest.fixture
+def executed_sql(hotel, monkeypatch):
+    """Statements run on pooled connections while the test runs"""
+    statements = []
+    acquire, release = hotel.storage.acquire, hotel.storage.release
+
+    def traced_acquire():
+        conn = acquire()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    def untraced_release(conn):
+        conn.set_trace_callback(None)
+        release(conn)
+
+    monkeypatch.setattr(hotel.storage, 'acquire', traced_acquire)
+    monkeypatch.setattr(hotel.storage, 'release', untraced_release)
+    return statements
+
+
+@pytest.fixture
+def reviews(client):
+    """Sixty reviews, every third one with low ratings (and so alerts)"""
+    for i in range(60):
+        client.post('/review', data=review_form(rating=1 if i % 3 == 0 else 5,
+                                                general_comments=f'review {i}')).close()
+
+
+def query_plan(hotel, sql):
+    conn = hotel.storage.connect()
+    try:
+        return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    finally:
+        conn.close()
+
+
+def dashboard_queries(client, executed_sql, url):
+    """The statements GET `url` ran, keyed by the table each one reads first"""
+    executed_sql.clear()
+    resp = client.get(url, headers=ADMIN_HEADERS)
+    resp.close()
+    assert resp.status_code == 200
+    queries = {}
+    for sql in executed_sql:
+        words = sql.split()
+        if words[0].upper() == 'SELECT' and 'FROM' in words:
+            queries.setdefault(words[words.index('FROM') + 1], sql)
+    return queries
+
+
+def assert_no_table_scan(plan):
+    """A SCAN step over reviews or alerts (or their aliases) reads every row"""
+    scans = [step for step in plan if step.split()[:2] in (['SCAN', 'reviews'], ['SCAN', 'r'], ['SCAN', 'a'])]
+    assert not scans, plan
+
+
+def test_dashboard_page_uses_property_created_at_index(hotel, client, reviews, executed_sql):
+    sql = dashboard_queries(client, executed_sql, '/admin')['reviews']
+    plan = query_plan(hotel, sql)
+    assert any('USING INDEX idx_reviews_property_created_at' in step for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan  # Rows come out of the index in page order
+    assert_no_table_scan(plan)
+
+
+def test_dashboard_next_page_seeks_the_same_index(hotel, client, reviews, executed_sql):
+    resp = client.get('/admin?per_page=5', headers=ADMIN_HEADERS)
+    page = resp.get_data(as_text=True)
+    resp.close()
+    cursor = re.search(r'/admin\?cursor=([\w=-]+)&per_page', page).group(1)  # The "Next" link
+
+    sql = dashboard_queries(client, executed_sql, f'/admin?per_page=5&cursor={cursor}')['reviews']
+    assert '(created_at, id) <' in sql
+    plan = query_plan(hotel, sql)
+    assert any('USING INDEX idx_reviews_property_created_at' in step for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+    assert_no_table_scan(plan)
+
+
+def test_low_rating_filter_uses_partial_index(hotel, client, reviews, executed_sql):
+    sql = dashboard_queries(client, executed_sql, '/admin?low=1')['reviews']
+    plan = query_plan(hotel, sql)
+    assert any('USING INDEX idx_reviews_property_low_rating' in step for step in plan), plan
+    assert_no_table_scan(plan)
+
+
+def test_time_window_alert_query_is_a_range_scan(hotel, client, reviews, executed_sql):
+    sql = dashboard_queries(client, executed_sql, '/admin')['alerts']
+    assert 'a.created_at >=' in sql
+    plan = query_plan(hotel, sql)
+    assert any('USING INDEX idx_alerts_property_created_at (property_id=? AND created_at>?)' in step
+               for step in plan), plan
+    assert any('SEARCH r USING INTEGER PRIMARY KEY' in step for step in plan), plan
+    assert_no_table_scan(plan)
+
+
+def test_comment_search_is_driven_by_the_fts_index(hotel, client, reviews, executed_sql):
+    dashboard_queries(client, executed_sql, '/admin?q=review&low=1')
+    sql = next(sql for sql in executed_sql if 'CROSS JOIN reviews' in sql)
+    plan = query_plan(hotel, sql)
+    assert plan[0].startswith('SCAN reviews_fts VIRTUAL TABLE'), plan  # Matches first...
+    assert any('SEARCH reviews USING INTEGER PRIMARY KEY' in step for step in plan), plan  # ...then their rows
+    assert_no_table_scan(plan)
+
+
+def test_common_search_words_walk_the_created_at_index(hotel, client, reviews, executed_sql, monkeypatch):
+    monkeypatch.setattr(hotel, 'FTS_DRIVEN_MAX_MATCHES', 10)  # All 60 reviews match 'review'
+    queries = dashboard_queries(client, executed_sql, '/admin?q=review')
+    plan = query_plan(hotel, queries['reviews'])
+    assert any('USING INDEX idx_reviews_property_created_at' in step for step in plan), plan
+    assert_no_table_scan(plan)
@@ -0,0 +1,54 @@
+"""
+create_app() and migrate_db(): the one-off work a process does before serving.
+"""
+import os
+import stat
+import threading
+import time
+
+from conftest import hotel_app
+
+
+def test_template_cache_is_private_to_this_user(hotel, monkeypatch):
+    monkeypatch.setattr(hotel, '_app_ready', False)
+    monkeypatch.setattr(hotel.app.jinja_env, 'bytecode_cache', None)
+
+    hotel.create_app()
+
+    directory = os.stat(hotel.app.jinja_env.bytecode_cache.directory)
+    assert directory.st_uid == os.getuid()
+    assert stat.S_IMODE(directory.st_mode) == 0o700
+
+
+def test_processes_starting_together_migrate_sqlite_once(tmp_path, monkeypatch):
+    applied = []
+
+    def counted(version, migration):
+        def apply(cur):
+            applied.append(version)
+            time.sleep(0.01)  # Widen the window in which the others catch up
+            migration(cur)
+        return apply
+
+    monkeypatch.setattr(hotel_app, 'MIGRATIONS', [(version, description, counted(version, migration))
+                                                  for version, description, migration in hotel_app.MIGRATIONS])
+    path = str(tmp_path / 'reviews.db')
+    start, versions, errors = threading.Barrier(4), [], []
+
+    def migrate():
+        start.wait()
+        try:
+            versions.append(hotel_app.SQLiteStorage(path).migrate())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=migrate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latest = hotel_app.MIGRATIONS[-1][0]
+    assert errors == []
+    assert versions == [latest] * 4
+    assert sorted(applied) == [version for version, _, _ in hotel_app.MIGRATIONS]
@@ -0,0 +1,117 @@
+"""
+SQLite and PostgreSQL must be interchangeable: the same requests give the
+same rows, in the same order and with the same values, on either backend.
+"""
+import pytest
+
+from conftest import ADMIN_HEADERS, review_form
+
+
+def get_json(client, url):
+    resp = client.get(url, headers=ADMIN_HEADERS)
+    data = resp.get_json()
+    resp.close()
+    assert resp.status_code == 200, data
+    return data
+
+
+def post_reviews(client, forms):
+    for form in forms:
+        resp = client.post('/review', data=form)
+        resp.close()
+        assert resp.status_code == 200
+
+
+def test_migrate_is_repeatable(hotel):
+    version = hotel.migrate_db()
+    assert version > 0
+    assert hotel.migrate_db() == version
+
+
+def test_review_rows_look_the_same(hotel, client):
+    post_reviews(client, [review_form(rating=2, general_comments='Cold soup', location='12')])
+
+    review = get_json(client, '/api/v1/reviews')['data'][0]
+
+    assert review['general_comments'] == 'Cold soup'
+    assert review['location'] == '12'
+    assert isinstance(review['food_quality'], int) and review['food_quality'] == 2
+    assert review['overall'] == 2.0
+    assert isinstance(review['created_at'], str) and len(review['created_at']) == len('2024-01-31 12:00:00')
+
+
+def test_keyset_pages_cover_every_review_once(hotel, client):
+    post_reviews(client, [review_form(rating=1 + i % 5) for i in range(10)])
+
+    seen, url = [], '/api/v1/reviews?limit=3&fields=id,created_at'
+    while url:
+        page = get_json(client, url)
+        seen += page['data']
+        url = page['next_cursor'] and f"/api/v1/reviews?limit=3&fields=id,created_at&cursor={page['next_cursor']}"
+
+    assert sorted(review['id'] for review in seen) == list(range(1, 11))
+    positions = [(review['created_at'], review['id']) for review in seen]
+    assert positions == sorted(positions, reverse=True)
+
+
+def test_comment_search_matches_word_prefixes(hotel, client):
+    post_reviews(client, [review_form(general_comments='The washbasin was spotless'),
+                          review_form(parking_comments='No spaces left after 8pm'),
+                          review_form(general_comments='Lovely dinner')])
+
+    def search(text):
+        return sorted(review['id'] for review in get_json(client, f'/api/v1/reviews?q={text}&fields=id')['data'])
+
+    assert search('spotless') == [1]
+    assert search('spot') == [1]
+    assert search('space') == [2]
+    assert search('dinner lovely') == [3]
+    assert search('breakfast') == []
+
+
+def test_stats_follow_new_reviews(hotel, client):
+    post_reviews(client, [review_form(rating=rating) for rating in (1, 3, 5, 5)])
+
+    stats = get_json(client, '/api/v1/stats')
+
+    assert stats['total_reviews'] == 4
+    assert stats['averages']['parking'] == 3.5
+    assert stats['histograms']['washroom'] == {'1': 1, '2': 0, '3': 1, '4': 0, '5': 2}
+    assert stats['low_rating_count'] == 1
+
+
+def review_count(hotel):
+    conn = hotel.storage.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM reviews")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('parking', ['0', '6', '-1', 'abc'])
+def test_out_of_range_ratings_are_refused(hotel, client, parking):
+    resp = client.post('/review', data=review_form(parking=parking))
+    resp.close()
+
+    assert resp.status_code == 400
+    assert review_count(hotel) == 0
+
+
+def test_schema_refuses_out_of_range_ratings(hotel, client):
+    post_reviews(client, [review_form()])
+    conn = hotel.storage.connect()
+    try:
+        cur = conn.cursor()
+        with pytest.raises(hotel.storage.Error, match='CHECK constraint|reviews_rating_range'):
+            cur.execute("UPDATE reviews SET washroom = 9")
+        conn.rollback()
+        with pytest.raises(hotel.storage.Error, match='CHECK constraint|reviews_rating_range'):
+            cur.execute("INSERT INTO reviews (food_quality, seating_arrangement, parking, washroom, hotel_service) "
+                        "VALUES (0, 3, 3, 3, 3)")
+        conn.rollback()
+    finally:
+        conn.close()
+
+    assert get_json(client, '/api/v1/stats')['histograms']['washroom']['4'] == 1
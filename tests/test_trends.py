@@ -0,0 +1,38 @@
+"""
+Rating percentiles on the trends pages come from daily_stats' 1-5 star
+histograms and must stay 1-5 (or NaN for no reviews) however sparse or
+inconsistent those histograms are.
+"""
+import pytest
+
+from conftest import hotel_app
+
+np = pytest.importorskip('numpy')
+
+
+def percentiles(histogram, pct):
+    """histogram_percentiles for a single one-category histogram"""
+    return hotel_app.histogram_percentiles(np.array([[histogram]], dtype=float), pct)[0, 0]
+
+
+@pytest.mark.parametrize('pct, expected', [(10, 1.0), (50, 1.0), (51, 5.0), (90, 5.0)])
+def test_nearest_rank(pct, expected):
+    assert percentiles([5, 0, 0, 0, 5], pct) == expected
+
+
+def test_empty_histogram_has_no_percentile():
+    assert np.isnan(percentiles([0, 0, 0, 0, 0], 50))
+
+
+@pytest.mark.parametrize('histogram', [[0, 0, 0, 0, 1], [0, 1, 0, 0, 0], [0, 0, 0, 0, 0.5]])
+def test_sparse_histograms_stay_in_range(histogram):
+    for pct in hotel_app.TRENDS_PERCENTILES + (100,):
+        assert 1 <= percentiles(histogram, pct) <= 5
+
+
+def test_ratings_missing_from_the_histogram_cannot_give_six():
+    # Four reviews were counted but one rating (say a 9 stored before ratings
+    # were checked) has no bucket: the percentile comes from the three that do
+    histograms = np.array([[[0, 0, 1, 1, 1]] * len(hotel_app.RATING_CATEGORIES)], dtype=float)
+    assert (hotel_app.histogram_percentiles(histograms, 90) == 5.0).all()
+    assert (hotel_app.histogram_percentiles(histograms, 50) == 4.0).all()